@@ -11,6 +11,11 @@ class Settings(BaseSettings):
     supabase_key: str
     supabase_table_name: str = "bible_chunks"
     
+    # 번역본 (적재한 번역본 코드를 쉼표로 구분, supabase_translations.sql 적용 후 설정)
+    # 비어 있으면 translation 컬럼이 없는 단일 번역본 DB로 보고 번역본 조건 없이 조회
+    translations: str = ""
+    default_translation: str = "krv"  # 질문에 번역본이 없을 때 검색할 번역본
+    
     # Google Generative AI 설정
     google_api_key: str
     
@@ -28,11 +33,110 @@ class Settings(BaseSettings):
     # LLM 설정 (Google Gemini)
     llm_model: str = "gemini-pro"  # 또는 "gemini-1.5-pro", "gemini-1.5-flash" 등
     
+    # 모델 티어 (짧은 구절 조회는 fast, 긴 설명/전체 책/긴 대화는 quality)
+    model_tiering_enabled: bool = False  # 켜려면 FAST_LLM_MODEL도 지정
+    fast_llm_model: str = ""  # fast 티어 (지연 시간 예산이 부족할 때도 사용, 비어 있으면 llm_model)
+    quality_llm_model: str = ""  # quality 티어 (비어 있으면 llm_model)
+    tier_long_query_chars: int = 80  # 질문이 이보다 길면 quality
+    tier_deep_conversation_messages: int = 6  # 이전 메시지가 이만큼 이상이면 quality
+    
+    # 시작 설정
+    warm_up_on_startup: bool = True  # 시작 후 백그라운드에서 클라이언트/에이전트를 미리 생성 (헬스 체크는 기다리지 않음)
+    gzip_minimum_size: int = 1000  # 이보다 큰 응답만 gzip 압축 (SSE 스트림 제외)
+    
+    # 명확한 구절 참조(예: "창세기 1장 1절")는 에이전트 루프 없이 직접 조회 후 한 번만 생성
+    direct_reference_enabled: bool = True
+    # 에이전트의 첫 LLM 호출과 병렬로 사용자 메시지 검색을 미리 실행 (도구 호출 쿼리가 같으면 결과 재사용)
+    speculative_search_enabled: bool = True
+    speculative_search_workers: int = 0  # 추측 검색 스레드 수 (0이면 llm_max_concurrency, 슬롯을 받은 요청마다 하나)
+    # 동시에 들어온 같은 임베딩/검색/첫 질문 답변을 한 번만 실행하고 결과 공유
+    single_flight_enabled: bool = True
+    
+    # 벡터 검색 최소 유사도 (evaluate_retrieval로 재현율/컨텍스트 크기 확인)
+    search_match_threshold: float = 0.5  # search_bible 도구
+    rag_match_threshold: float = 0.7  # RAGService
+    
+    # 벡터 인덱스 검색 정확도 (0이면 DB 기본값, benchmark_vector_search로 재현율/지연 시간 확인)
+    vector_ef_search: int = 0  # HNSW hnsw.ef_search (클수록 재현율↑ 지연 시간↑)
+    vector_probes: int = 0  # IVFFlat ivfflat.probes
+    
+    # coarse-to-fine 검색 (임베딩 앞부분 저차원 벡터로 후보를 고른 뒤 전체 차원으로 재정렬)
+    # 근사 검색이므로 evaluate_retrieval로 재현율이 plain과 같은지 확인한 뒤 켭니다.
+    coarse_to_fine_enabled: bool = False
+    coarse_embedding_dimension: int = 256  # bible_chunks.embedding_coarse 차원과 같아야 함
+    coarse_candidates: int = 100  # 1단계에서 고를 후보 수
+    
+    # 2단계 장 라우팅 검색 (장 중심 임베딩으로 가까운 장을 고른 뒤 그 장의 청크만 검색)
+    # 근사 검색이므로 evaluate_retrieval로 재현율을 확인한 뒤 켭니다. coarse-to-fine과 함께 켜면 라우팅이 우선이고,
+    # 라우팅 함수가 없을 때만 coarse-to-fine을 사용합니다.
+    chapter_routing_enabled: bool = False
+    route_chapter_count: int = 8  # 1단계에서 고를 장 수
+    
+    # 검색 결과마다 미리 계산한 이웃 테이블(bible_chunk_neighbors)에서 관련 구절을 붙임
+    related_passages_enabled: bool = True
+    related_passages_per_hit: int = 3
+    
+    # 동시에 들어온 서로 다른 쿼리 임베딩을 모아 한 번의 배치 호출로 처리
+    embedding_batching_enabled: bool = True
+    embedding_batch_max_size: int = 32  # 배치 최대 크기 (Gemini 상한 100)
+    embedding_batch_max_wait_ms: float = 5.0  # 첫 요청 후 배치를 모으는 최대 시간
+    embedding_batch_concurrency: int = 4  # 동시에 진행할 배치 호출 수
+    
+    # 워커 간 공유 캐시 (같은 호스트의 uvicorn 워커들이 하나의 로컬 SQLite 파일을 함께 사용)
+    shared_cache_enabled: bool = True
+    shared_cache_path: str = ".cache/shared_cache.sqlite3"
+    shared_cache_max_entries: int = 20000  # 캐시별 최대 항목 수
+    embedding_cache_ttl_seconds: float = 86400.0  # 쿼리 임베딩 (모델/차원이 같으면 결과가 같음)
+    search_cache_ttl_seconds: float = 600.0  # search_bible 검색 결과
+    answer_cache_ttl_seconds: float = 0.0  # 새 대화 첫 질문의 답변 (/api/chat, 0이면 사용 안 함)
+    conversation_version_ttl_seconds: float = 60.0  # 대화 조회 ETag용 버전 (여러 호스트에서 실행하면 0으로 두고 매번 DB 확인)
+    source_text_cache_ttl_seconds: float = 604800.0  # 메시지 출처에 채우는 구절 본문 (본문은 바뀌지 않으므로 길게)
+    
+    # 질문 기록(messages) 기반 캐시 예열 (시작 후 백그라운드에서 자주 나온 질문을 미리 검색)
+    cache_warm_enabled: bool = True
+    cache_warm_interval_seconds: float = 0.0  # 다시 예열하는 주기 (0이면 시작할 때만, 검색 캐시 TTL 정도가 적당)
+    cache_warm_history_limit: int = 2000  # 살펴볼 최근 사용자 질문 수
+    cache_warm_min_count: int = 2  # 이만큼 이상 나온 질문만 예열
+    cache_warm_max_queries: int = 200  # 한 번에 예열할 최대 질문 수
+    cache_warm_max_query_chars: int = 200  # 이보다 긴 질문은 반복될 가능성이 낮아 제외
+    cache_warm_time_budget_seconds: float = 120.0  # 한 번 예열에 쓸 최대 시간
+    cache_warm_max_bytes: int = 2_000_000  # 한 번 예열에서 저장할 검색 결과 최대 크기
+    
+    # 지연 시간 예산 (남은 시간이 부족하면 단계적으로 검색/생성을 단순화)
+    request_budget_seconds: float = 25.0  # 요청 도착부터 답변 완료까지의 목표 시간
+    degrade_reduced_below_seconds: float = 12.0  # 남은 시간이 이보다 적으면 reduced 모드
+    degrade_minimal_below_seconds: float = 6.0  # 남은 시간이 이보다 적으면 minimal 모드
+    degraded_context_chars: int = 6000  # reduced 모드의 검색 결과 최대 길이 (minimal은 절반)
+    
+    # LLM 동시 실행 제한 (워커 프로세스 단위)
+    llm_max_concurrency: int = 8  # 동시에 실행할 에이전트/LLM 작업 수
+    llm_queue_size: int = 32  # 대기열 최대 길이 (넘으면 즉시 503)
+    llm_queue_timeout_seconds: float = 10.0  # 대기열 최대 대기 시간 (넘으면 503)
+    
+    # 스트리밍 설정
+    stream_checkpoint_interval: float = 2.0  # 부분 답변을 DB에 저장하는 주기 (초)
+    stream_resume_grace_seconds: float = 10.0  # 연결이 끊긴 뒤 재연결을 기다리는 시간 (지나면 생성 취소)
+    stream_session_ttl_seconds: float = 60.0  # 완료된 스트림을 Last-Event-ID 재개용으로 보관하는 시간
+    
+    # 관리자 설정 (비어 있으면 관리자 엔드포인트 비활성화)
+    admin_token: str = ""
+    
+    # 요청 프로파일링 설정 (X-Profile 헤더에 관리자 토큰을 넣거나 샘플링 비율로 활성화)
+    profile_sample_rate: float = 0.0  # 0.0이면 샘플링 비활성화 (예: 0.01 = 1%)
+    profile_interval_ms: float = 5.0  # 스택 샘플링 간격 (ms)
+    profile_dir: str = ".profiles"  # 프로파일 결과 저장 디렉토리
+    profile_max_artifacts: int = 50  # 보관할 최대 프로파일 수 (오래된 것부터 삭제)
+    
     @property
     def allowed_origins_list(self) -> List[str]:
         """허용된 오리진 리스트 반환"""
         return [origin.strip() for origin in self.allowed_origins.split(",")]
     
+    @property
+    def translations_list(self) -> List[str]:
+        """적재된 번역본 코드 리스트 (단일 번역본 DB면 빈 리스트)"""
+        return [code.strip() for code in self.translations.split(",") if code.strip()]
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -1,34 +1,24 @@
-import os
 import re
+from uuid import uuid4
 from dotenv import load_dotenv, find_dotenv
-from langchain.agents import create_agent
 from langchain.agents.middleware.types import AgentMiddleware
-from langchain_core.messages import ToolMessage
+from langchain_core.messages import AIMessage, SystemMessage, ToolMessage
 from langchain.tools import tool
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
-from supabase import create_client
 from app.config import settings
+from app.services.providers import get_supabase, get_llm, get_or_create
+from app.services.telemetry import trace_span
+from app.services.stream_sessions import StreamCancelledError, raise_if_cancelled
+from app.services.single_flight import SingleFlight
+from app.services.embedding_batcher import embedding_batcher
+from app.services.shared_cache import embedding_cache, search_cache
+from app.services import degradation, vector_search
+from app.services.speculation import speculate, take_speculation
 
 load_dotenv(find_dotenv(), override=True)
 
-# Google API 키 환경변수 설정
-os.environ["GOOGLE_API_KEY"] = settings.google_api_key
-
-# Supabase 클라이언트 생성
-supabase = create_client(settings.supabase_url, settings.supabase_key)
-
-# 임베딩 모델 초기화 (쿼리용)
-embeddings = GoogleGenerativeAIEmbeddings(
-    model=settings.embedding_model,
-    task_type="RETRIEVAL_QUERY"
-)
-
-# LLM 모델 초기화 (Gemini)
-llm = ChatGoogleGenerativeAI(
-    model=settings.llm_model,
-    temperature=0.7,
-    google_api_key=settings.google_api_key
-)
+# 동시에 들어온 같은 임베딩/검색 요청 합치기
+_embedding_flight = SingleFlight("embedding")
+_retrieval_flight = SingleFlight("retrieval")
 
 # 한국어 책 이름 목록 (검색 쿼리 파싱용)
 KOREAN_BOOK_NAMES = [
@@ -48,6 +38,59 @@ KOREAN_BOOK_NAMES = [
     "유다서", "요한계시록"
 ]
 
+# 책 묶음 이름 (검색 범위 필터용, 공백을 지운 쿼리에서 긴 이름부터 찾음)
+BOOK_GROUPS = {
+    "구약": KOREAN_BOOK_NAMES[:39],
+    "신약": KOREAN_BOOK_NAMES[39:],
+    "모세오경": KOREAN_BOOK_NAMES[:5],
+    "율법서": KOREAN_BOOK_NAMES[:5],
+    "시가서": KOREAN_BOOK_NAMES[17:22],
+    "선지서": KOREAN_BOOK_NAMES[22:39],
+    "예언서": KOREAN_BOOK_NAMES[22:39],
+    "복음서": KOREAN_BOOK_NAMES[39:43],
+    "공관복음": KOREAN_BOOK_NAMES[39:42],
+    "바울서신": KOREAN_BOOK_NAMES[44:57],
+    "서신서": KOREAN_BOOK_NAMES[44:65],
+}
+
+# 번역본 코드별 표시 이름 (bible_chunks.translation)
+TRANSLATION_NAMES = {
+    "krv": "개역한글",
+    "nkrv": "개역개정",
+    "rnksv": "새번역",
+    "kcbs": "공동번역",
+    "kjv": "KJV",
+    "niv": "NIV",
+    "esv": "ESV",
+}
+
+# 질문에서 번역본을 알아볼 별칭 (영문은 대문자로 비교)
+TRANSLATION_ALIASES = {
+    "개역한글": "krv",
+    "한글개역": "krv",
+    "개역개정": "nkrv",
+    "새번역": "rnksv",
+    "표준새번역": "rnksv",
+    "공동번역": "kcbs",
+    "킹제임스": "kjv",
+    "KJV": "kjv",
+    "NIV": "niv",
+    "ESV": "esv",
+}
+
+# 번역본 언급과 뒤따르는 조사 (예: "개역개정이랑", "KJV로")
+TRANSLATION_MENTION_PATTERN = re.compile(
+    "(" + "|".join(re.escape(alias) for alias in sorted(TRANSLATION_ALIASES, key=len, reverse=True)) + ")"
+    r"\s*(?:성경|번역|판)?(?:으로|이랑|랑|하고|과|와|로|의|은|는)?",
+    re.IGNORECASE
+)
+
+# 같은 구절을 번역본별로 나란히 보여 달라는 키워드
+COMPARE_KEYWORDS = ("비교", "대조", "나란히")
+
+# 전체 책을 뜻하는 키워드
+FULL_BOOK_KEYWORDS = ["전체", "전부", "모두", "요약", "전체를", "전부를", "모두를"]
+
 def parse_bible_reference(query: str) -> tuple[str | None, str | None, str | None, bool]:
     """
     쿼리에서 책 이름, 장, 절을 파싱합니다.
@@ -65,8 +108,7 @@ def parse_bible_reference(query: str) -> tuple[str | None, str | None, str | Non
         is_full_book: 전체 책을 의미하는지 여부 (책 이름만 있고 장이 없을 때)
     """
     # "전체", "전부", "모두", "요약" 같은 키워드 확인
-    full_book_keywords = ["전체", "전부", "모두", "요약", "전체를", "전부를", "모두를"]
-    is_full_book = any(keyword in query for keyword in full_book_keywords)
+    is_full_book = any(keyword in query for keyword in FULL_BOOK_KEYWORDS)
     # 숫자:숫자 형식 (예: 3:16)
     colon_pattern = r'(\d+):(\d+)'
     colon_match = re.search(colon_pattern, query)
@@ -139,6 +181,475 @@ def improve_query_for_search(query: str, book: str | None = None, chapter: str |
         return improved
     return query
 
+# 여러 장을 언급하는지 확인하는 패턴 (예: "1장과 2장", "3:16, 4:1")
+CHAPTER_MENTION_PATTERN = re.compile(r'\d+\s*장|\d+\s*:\s*\d+')
+
+def count_book_mentions(query: str) -> int:
+    """쿼리에 언급된 책 이름 수 (긴 이름부터 매칭하여 "예레미야애가"를 "예레미야"로 중복 계산하지 않음)"""
+    count = 0
+    for book in sorted(KOREAN_BOOK_NAMES, key=len, reverse=True):
+        if book in query:
+            count += query.count(book)
+            query = query.replace(book, " ")
+    return count
+
+def parse_translations(query: str) -> tuple[list[str], str]:
+    """
+    질문에서 조회할 번역본을 찾습니다 (적재된 번역본만, 단일 번역본 DB면 항상 ([], query)).
+    
+    예시 (TRANSLATIONS=krv,nkrv, DEFAULT_TRANSLATION=krv):
+    - "요한복음 3:16" -> ([], "요한복음 3:16") 기본 번역본
+    - "개역개정 요한복음 3:16" -> (["nkrv"], " 요한복음 3:16")
+    - "요한복음 3:16 개역개정이랑 비교해줘" -> (["krv", "nkrv"], ...) 기본 번역본과 나란히
+    - "요한복음 3:16 번역본 비교" -> 적재된 모든 번역본
+    
+    Returns:
+        (번역본 코드 목록, 번역본 언급을 뺀 질문) 튜플. 코드가 둘 이상이면 번역본별 나란히 조회
+    """
+    available = settings.translations_list
+    if not available:
+        return [], query
+    codes = []
+    for match in TRANSLATION_MENTION_PATTERN.finditer(query):
+        alias = match.group(1)
+        code = TRANSLATION_ALIASES.get(alias) or TRANSLATION_ALIASES.get(alias.upper())
+        if code in available and code not in codes:
+            codes.append(code)
+    stripped = TRANSLATION_MENTION_PATTERN.sub(" ", query)
+    if any(keyword in query for keyword in COMPARE_KEYWORDS):
+        if not codes and "번역" in query:
+            codes = list(available)
+        elif len(codes) == 1 and codes[0] != settings.default_translation and settings.default_translation in available:
+            codes.insert(0, settings.default_translation)
+    return codes, stripped
+
+def mentioned_books(query: str) -> list[str]:
+    """쿼리에 언급된 책 이름 목록 (언급 순서, 긴 이름부터 매칭)"""
+    found = []
+    for book in sorted(KOREAN_BOOK_NAMES, key=len, reverse=True):
+        position = query.find(book)
+        if position >= 0:
+            found.append((position, book))
+            query = query.replace(book, " " * len(book))
+    return [book for _, book in sorted(found)]
+
+# 장 범위 패턴 (예: "3-5장", "3~5장", "3장부터 5장")
+CHAPTER_RANGE_PATTERN = re.compile(r'(\d+)\s*장?\s*[-~]\s*(\d+)\s*장|(\d+)\s*장\s*(?:부터|에서)\s*(\d+)\s*장')
+
+def parse_search_filter(query: str) -> tuple[list[str] | None, tuple[int, int] | None]:
+    """
+    벡터 검색 범위를 좁힐 책 목록과 장 범위를 쿼리에서 찾습니다.
+    
+    예시:
+    - "요한복음에서 사랑에 대한 말씀" -> (["요한복음"], None)
+    - "신약에서 믿음에 대한 구절" -> (신약 27권, None)
+    - "복음서의 비유" -> (["마태복음", "마가복음", "누가복음", "요한복음"], None)
+    - "창세기 1~3장의 창조" -> (["창세기"], (1, 3))
+    
+    Returns:
+        (books, chapter_range) 튜플 (범위가 없으면 각각 None)
+    """
+    books = mentioned_books(query)
+    if not books:
+        # 긴 이름부터 매칭하여 "공관복음서"를 "공관복음"과 "복음서"로 중복 해석하지 않음
+        compact = re.sub(r'\s+', '', query)
+        for keyword in sorted(BOOK_GROUPS, key=len, reverse=True):
+            if keyword in compact:
+                books.extend(book for book in BOOK_GROUPS[keyword] if book not in books)
+                compact = compact.replace(keyword, " ")
+    
+    # 장 범위는 책이 하나일 때만 적용
+    chapter_range = None
+    if len(books) == 1:
+        match = CHAPTER_RANGE_PATTERN.search(query)
+        if match:
+            start, end = sorted(int(number) for number in match.groups() if number)
+            chapter_range = (start, end)
+        else:
+            _, chapter, _, _ = parse_bible_reference(query)
+            if chapter:
+                chapter_range = (int(chapter), int(chapter))
+    return (books or None, chapter_range)
+
+# 책 안의 주제를 묻는다는 명시적 표현 (책 이름을 뺀 질문에서 찾음)
+TOPICAL_CUE_PATTERN = re.compile(r'에서|에\s*나오는|에\s*나온|에\s*(?:대한|대해|관한|관해)|관련')
+
+# 주제 판단에서 무시할 일반적인 요청 단어
+GENERIC_QUERY_WORDS = {"알려줘", "알려주세요", "설명", "설명해줘", "설명해주세요", "뭐야", "무엇", "무슨", "어떤", "내용", "말씀", "구절", "대해", "대한", "관한", "관해", "성경", "번역본", "비교", "비교해줘", "비교해주세요"}
+
+def is_topical_book_query(query: str, book: str) -> bool:
+    """
+    장 없이 책만 언급한 질문이 책 전체가 아니라 책 안의 주제를 묻는지 판단합니다.
+    
+    "에서", "에 대한" 같은 명시적 표현과 일반 요청 단어가 아닌 키워드가 함께 있어야 주제 질문으로 봅니다.
+    
+    예시:
+    - "요한복음에서 사랑에 대한 말씀" -> True (요한복음 안에서 벡터 검색)
+    - "요한복음 내용 알려줘", "요한복음 요약해줘", "요한복음 정리해줘" -> False (전체 책 조회)
+    """
+    if any(keyword in query for keyword in FULL_BOOK_KEYWORDS):
+        return False
+    remainder = query.replace(book, " ")
+    if not TOPICAL_CUE_PATTERN.search(remainder):
+        return False
+    for word in re.findall(r'[가-힣A-Za-z]+', TOPICAL_CUE_PATTERN.sub(" ", remainder)):
+        keyword = lexical_keyword(word)
+        if keyword and keyword not in GENERIC_QUERY_WORDS:
+            return True
+    return False
+
+def parse_direct_reference(query: str) -> tuple[str, str, str | None] | None:
+    """
+    에이전트 없이 바로 본문을 조회할 수 있는 명확한 참조인지 판단합니다.
+    
+    책 하나와 장 하나가 분명하게 지정된 경우만 해당합니다.
+    (예: "창세기 1장 1절", "요한복음 3:16 설명해줘")
+    전체 책 요약, 여러 책/장 비교 등은 에이전트가 여러 번 검색하도록 둡니다.
+    
+    Returns:
+        (book_name, chapter, verse) 튜플 (명확하지 않으면 None)
+    """
+    book, chapter, verse, is_full_book = parse_bible_reference(query)
+    if not book or not chapter or is_full_book:
+        return None
+    if count_book_mentions(query) != 1 or len(CHAPTER_MENTION_PATTERN.findall(query)) > 1:
+        return None
+    return (book, chapter, verse)
+
+def format_book_results(book: str, docs: list[dict]) -> str:
+    """전체 책 조회 결과를 도구 출력 형식으로 변환합니다."""
+    result_parts = []
+    for doc in docs:
+        chapter_num = doc.get('chapter', '')
+        citation = f"{book}"
+        if chapter_num:
+            citation += f" {chapter_num}장"
+        result_parts.append(
+            f"[{citation}] {doc.get('content', '')}"
+        )
+    return "\n\n".join(result_parts)
+
+def format_chapter_results(book: str, chapter: str, docs: list[dict]) -> str:
+    """책/장 직접 조회 결과를 도구 출력 형식으로 변환합니다."""
+    result_parts = []
+    for doc in docs:
+        result_parts.append(
+            f"[{book} {chapter}장] {doc.get('content', '')}"
+        )
+    return "\n\n".join(result_parts)
+
+def format_parallel_results(book: str, chapter: str, rows_by_translation: dict[str, list[dict]]) -> str:
+    """같은 장/절의 번역본별 조회 결과를 도구 출력 형식으로 변환합니다 (번역본 순서대로 묶음)."""
+    groups = []
+    for translation, docs in rows_by_translation.items():
+        name = TRANSLATION_NAMES.get(translation, translation)
+        groups.append("\n".join(f"[{book} {chapter}장 {name}] {doc.get('content', '')}" for doc in docs))
+    return "\n\n".join(groups)
+
+def label_translation(result: str, translation: str | None) -> str:
+    """기본 번역본이 아닌 번역본의 결과에 번역본 이름을 표시합니다."""
+    if not translation or translation == settings.default_translation:
+        return result
+    return f"(번역본: {TRANSLATION_NAMES.get(translation, translation)})\n\n{result}"
+
+def format_citation(book: str, chapter: str = '', verse: str = '') -> str:
+    """출처 표기 (예: "창세기 1장 1절")"""
+    citation = f"{book}"
+    if chapter:
+        citation += f" {chapter}장"
+    if verse:
+        citation += f" {verse}절"
+    return citation
+
+def format_similarity_results(docs: list[dict], related: dict[int, list[dict]] | None = None) -> str:
+    """
+    벡터 검색 결과를 유사도와 함께 도구 출력 형식으로 변환합니다.
+    
+    같은 장의 청크는 한 묶음으로 이어 붙이고, 묶음은 가장 유사한 청크 순서로 나열합니다.
+    related(청크 id별 관련 구절)가 있으면 청크마다 결과에 없는 관련 구절을 한 줄로 덧붙입니다.
+    """
+    hit_citations = {
+        format_citation(doc.get('book', ''), doc.get('chapter', ''), doc.get('verse', ''))
+        for doc in docs
+    }
+    groups: dict[tuple[str, str], list[str]] = {}
+    for doc in docs:
+        book = doc.get('book', '')
+        chapter = doc.get('chapter', '')
+        content = doc.get('content', '')
+        similarity = doc.get('similarity', 0)
+        citation = format_citation(book, chapter, doc.get('verse', ''))
+        
+        part = f"[{citation}] {content}\n(유사도: {similarity:.4f})"
+        if related:
+            # 출처 추출 패턴([출처] 본문)에 걸리지 않도록 대괄호 없이 표기
+            passages = list(dict.fromkeys(
+                format_citation(row.get('book', ''), row.get('chapter', ''), row.get('verse', ''))
+                for row in related.get(doc.get('id'), [])
+            ))
+            passages = [passage for passage in passages if passage not in hit_citations]
+            if passages:
+                part += f"\n(관련 구절: {', '.join(passages)})"
+        groups.setdefault((book, chapter), []).append(part)
+    
+    return "\n\n".join("\n".join(parts) for parts in groups.values())
+
+def attach_related_passages(docs: list[dict]) -> dict[int, list[dict]] | None:
+    """검색 결과 청크의 관련 구절을 이웃 테이블에서 조회 (비활성화, 시간 부족, 오류 시 None)"""
+    if not settings.related_passages_enabled or degradation.current_mode() != degradation.MODE_FULL:
+        return None
+    chunk_ids = [doc['id'] for doc in docs if doc.get('id') is not None]
+    try:
+        with trace_span("related_passages", hits=len(chunk_ids)):
+            return vector_search.related_passages(chunk_ids)
+    except Exception as e:
+        print(f"관련 구절 조회 오류: {str(e)}")
+        return None
+
+def book_number(book: str) -> int:
+    """책 이름의 정경 순서 번호 (창세기 1 ~ 요한계시록 66, bible_chunks.book_no)"""
+    return KOREAN_BOOK_NAMES.index(book) + 1
+
+# 정수 참조 컬럼이 없는 DB(supabase_reference_columns.sql 적용 전)면 이 프로세스에서는 텍스트 컬럼으로 조회
+_reference_columns_available = True
+
+def _is_missing_reference_column(error: Exception) -> bool:
+    message = str(error)
+    return any(column in message for column in ("book_no", "chapter_no", "verse_start", "verse_end"))
+
+def _disable_reference_columns(error: Exception) -> None:
+    global _reference_columns_available
+    _reference_columns_available = False
+    print(f"정수 참조 컬럼을 찾을 수 없어 텍스트 컬럼으로 조회합니다 (supabase_reference_columns.sql 참고): {str(error)}")
+
+def scope_translation(request, translation: str | None = None):
+    """다중 번역본 DB면 조회를 한 번역본 파티션으로 제한합니다 (None이면 기본 번역본)."""
+    if settings.translations_list:
+        request = request.eq('translation', translation or settings.default_translation)
+    return request
+
+def fetch_book_rows(book: str, limit: int, translation: str | None = None) -> list[dict]:
+    """책 전체 청크를 장/절 숫자 순서로 조회 ((book_no, chapter_no, verse_start) 인덱스 범위 스캔)"""
+    if _reference_columns_available:
+        try:
+            request = scope_translation(get_supabase().table('bible_chunks').select('*'), translation)
+            response = request.eq('book_no', book_number(book)).order('chapter_no').order('verse_start').limit(limit).execute()
+            return response.data or []
+        except Exception as e:
+            if not _is_missing_reference_column(e):
+                raise
+            _disable_reference_columns(e)
+    request = scope_translation(get_supabase().table('bible_chunks').select('*'), translation)
+    response = request.eq('book', book).order('chapter', desc=False).limit(limit).execute()
+    return response.data or []
+
+def fetch_chapter_rows(book: str, chapter: str, limit: int, verse: str | None = None, translation: str | None = None) -> list[dict]:
+    """한 장의 청크를 절 순서로 조회 (verse가 있으면 그 절이 들어 있는 청크부터)"""
+    if _reference_columns_available:
+        try:
+            request = scope_translation(get_supabase().table('bible_chunks').select('*'), translation)
+            request = request.eq('book_no', book_number(book)).eq('chapter_no', int(chapter))
+            if verse:
+                request = request.gte('verse_end', int(verse))
+            response = request.order('verse_start').limit(limit).execute()
+            return response.data or []
+        except Exception as e:
+            if not _is_missing_reference_column(e):
+                raise
+            _disable_reference_columns(e)
+    request = scope_translation(get_supabase().table('bible_chunks').select('*'), translation)
+    response = request.eq('book', book).eq('chapter', chapter).limit(limit).execute()
+    return response.data or []
+
+def fetch_parallel_rows(book: str, chapter: str, verse: str | None, translations: list[str], limit: int) -> dict[str, list[dict]]:
+    """
+    같은 장(verse가 있으면 그 절이 들어 있는 청크)을 여러 번역본에서 한 번의 쿼리로 조회
+    
+    Returns:
+        {번역본 코드: 절 순서의 청크 목록} (translations 순서, 결과가 없는 번역본은 제외)
+    """
+    response = None
+    if _reference_columns_available:
+        try:
+            request = get_supabase().table('bible_chunks').select('*').in_('translation', translations)
+            request = request.eq('book_no', book_number(book)).eq('chapter_no', int(chapter))
+            if verse:
+                request = request.lte('verse_start', int(verse)).gte('verse_end', int(verse))
+            response = request.order('verse_start').limit(limit * len(translations)).execute()
+        except Exception as e:
+            if not _is_missing_reference_column(e):
+                raise
+            _disable_reference_columns(e)
+    if response is None:
+        request = get_supabase().table('bible_chunks').select('*').in_('translation', translations)
+        response = request.eq('book', book).eq('chapter', chapter).limit(limit * len(translations)).execute()
+    rows_by_translation: dict[str, list[dict]] = {translation: [] for translation in translations}
+    for row in response.data or []:
+        docs = rows_by_translation.get(row.get('translation'))
+        if docs is not None and len(docs) < limit:
+            docs.append(row)
+    return {translation: docs for translation, docs in rows_by_translation.items() if docs}
+
+def lookup_chapter(book: str, chapter: str, limit: int = 5, verse: str | None = None, translation: str | None = None) -> str | None:
+    """
+    book과 chapter로 직접 조회하여 도구 출력 형식으로 반환합니다.
+    
+    Returns:
+        포맷된 결과 (결과가 없거나 조회에 실패하면 None → 벡터 검색으로 폴백)
+    """
+    try:
+        with trace_span("direct_lookup", kind="chapter"):
+            docs = fetch_chapter_rows(book, chapter, limit, verse, translation)
+    except Exception:
+        return None
+    if not docs:
+        return None
+    return label_translation(format_chapter_results(book, chapter, docs), translation)
+
+def lookup_reference(book: str, chapter: str, verse: str | None, translations: list[str], limit: int) -> str | None:
+    """
+    장/절 직접 조회 (번역본이 둘 이상이면 번역본별로 나란히)
+    
+    Returns:
+        포맷된 결과 (결과가 없거나 조회에 실패하면 None)
+    """
+    if len(translations) < 2:
+        return lookup_chapter(book, chapter, limit, verse, translations[0] if translations else None)
+    try:
+        with trace_span("direct_lookup", kind="parallel"):
+            rows_by_translation = fetch_parallel_rows(book, chapter, verse, translations, limit)
+    except Exception:
+        return None
+    if not rows_by_translation:
+        return None
+    return format_parallel_results(book, chapter, rows_by_translation)
+
+# 키워드 검색 시 단어 끝에서 떼어낼 조사
+KOREAN_PARTICLES = ("에서", "에게", "으로", "이란", "이야", "이", "가", "은", "는", "을", "를", "에", "의", "와", "과", "도", "로", "란", "야")
+
+def lexical_keyword(query: str) -> str | None:
+    """쿼리에서 키워드 검색에 쓸 가장 긴 단어 (조사 제거, 두 글자 이상)"""
+    best = None
+    for word in re.findall(r'[가-힣A-Za-z0-9]+', query):
+        for particle in KOREAN_PARTICLES:
+            if word.endswith(particle) and len(word) - len(particle) >= 2:
+                word = word[:-len(particle)]
+                break
+        if len(word) >= 2 and (best is None or len(word) > len(best)):
+            best = word
+    return best
+
+def lexical_search(query: str, limit: int, books: list[str] | None = None, translation: str | None = None) -> str:
+    """임베딩 없이 본문 키워드(ILIKE)로 검색 (지연 시간 예산이 부족할 때)"""
+    keyword = lexical_keyword(query)
+    if not keyword:
+        return "관련된 성경 내용을 찾을 수 없습니다."
+    with trace_span("lexical_search"):
+        request = scope_translation(get_supabase().table('bible_chunks').select('*'), translation)
+        request = request.ilike('content', f'%{keyword}%')
+        if books:
+            request = request.in_('book', books)
+        response = request.limit(limit).execute()
+    docs = response.data if response.data else []
+    if not docs:
+        return "관련된 성경 내용을 찾을 수 없습니다."
+    return "\n\n".join(
+        f"[{doc.get('book', '')} {doc.get('chapter', '')}장] {doc.get('content', '')}" for doc in docs
+    )
+
+def embed_query(text: str) -> list[float]:
+    """
+    쿼리 임베딩 생성
+    
+    워커 간 공유 캐시를 먼저 확인하고, 없으면 같은 텍스트의 동시 요청은 한 번만,
+    다른 텍스트는 배치로 묶어 호출합니다.
+    """
+    cache_key = f"{settings.embedding_model}:{settings.embedding_dimension}:{text}"
+    cached = embedding_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    def embed():
+        with trace_span("embedding"):
+            vector = embedding_batcher.embed(text)
+        embedding_cache.set(cache_key, vector)
+        return vector
+    return _embedding_flight.do((text, settings.embedding_dimension), embed)
+
+def _retrieve(query: str, limit: int) -> str:
+    """검색 실행 (오류는 호출자에게 그대로 전달)"""
+    # 남은 시간이 부족하면 결과 수를 줄임
+    limit = degradation.search_limit(limit)
+    
+    # 쿼리에서 번역본, 책 이름, 장, 절 파싱 (번역본 언급은 빼고 나머지를 파싱)
+    with trace_span("reference_parse"):
+        translations, query = parse_translations(query)
+        book, chapter, verse, is_full_book = parse_bible_reference(query)
+    # 번역본 비교가 아닌 검색은 첫 번째(없으면 기본) 번역본에서
+    translation = translations[0] if translations else None
+    
+    # 책만 언급하고 그 안의 주제를 묻는 경우는 전체 책 대신 책 범위 안에서 벡터 검색
+    topical = bool(book and is_full_book and not chapter and is_topical_book_query(query, book))
+    
+    # 전체 책 요청인 경우
+    if book and is_full_book and not chapter and not topical:
+        try:
+            # 해당 책의 모든 장을 가져오기 (정수 chapter_no/verse_start 순서로 정렬)
+            with trace_span("direct_lookup", kind="book"):
+                book_rows = fetch_book_rows(book, degradation.book_fetch_limit(1000), translation)
+            
+            if book_rows:
+                # 필터링된 결과가 있으면 사용
+                return label_translation(format_book_results(book, book_rows), translation)
+        except Exception as filter_error:
+            # 필터링 실패 시 벡터 검색으로 폴백
+            pass
+    
+    # 클라이언트가 떠난 스트림이면 이후 네트워크 호출 생략
+    raise_if_cancelled()
+    
+    # 책과 장이 파싱된 경우 book과 chapter로 직접 조회 (임베딩 불필요, 번역본 비교면 번역본별로 나란히)
+    if book and chapter:
+        chapter_result = lookup_reference(book, chapter, verse, translations, limit)
+        if chapter_result is not None:
+            return chapter_result
+    
+    # 전체 책 요청이지만 필터링이 실패한 경우, limit을 크게 늘려서 검색
+    if book and is_full_book and not topical:
+        limit = 100  # 전체 책이면 더 많은 결과를 가져오기
+    
+    raise_if_cancelled()
+    
+    # 책/묶음(신약, 복음서 등)/장 범위가 있으면 검색 범위를 DB 쿼리에서 좁힘
+    books, chapter_range = parse_search_filter(query)
+    
+    # 남은 시간이 거의 없으면 임베딩 없이 키워드 검색만 사용
+    if degradation.lexical_only():
+        return lexical_search(query, limit, books, translation)
+    
+    # 쿼리 개선
+    improved_query = improve_query_for_search(query, book, chapter, verse)
+    
+    # 쿼리 임베딩 생성
+    query_embedding = embed_query(improved_query)
+    
+    # 벡터 검색 (기본 방법)
+    with trace_span("vector_search", filtered=bool(books or chapter_range)):
+        docs = vector_search.match_documents(
+            query_embedding,
+            settings.search_match_threshold,
+            limit,
+            books=books,
+            chapter_range=chapter_range,
+            translation=translation
+        )
+    
+    # 결과 포맷팅
+    if not docs:
+        return "관련된 성경 내용을 찾을 수 없습니다."
+    
+    return label_translation(format_similarity_results(docs, attach_related_passages(docs)), translation)
+
 # 원본 함수 정의 (테스트용으로 직접 호출 가능)
 def _search_bible_impl(query: str, limit: int = 5) -> str:
     """Search for Bible content based on the query."""
@@ -147,107 +658,51 @@ def _search_bible_impl(query: str, limit: int = 5) -> str:
         if not settings.supabase_url or not settings.supabase_key:
             return "오류: Supabase URL 또는 키가 설정되지 않았습니다. .env 파일을 확인하세요."
         
-        # 쿼리에서 책 이름, 장, 절 파싱
-        book, chapter, verse, is_full_book = parse_bible_reference(query)
-        
-        # 전체 책 요청인 경우
-        if book and is_full_book and not chapter:
-            try:
-                # 해당 책의 모든 장을 가져오기 (chapter를 숫자로 정렬)
-                # chapter를 TEXT로 저장했으므로 숫자로 변환하여 정렬
-                filtered_response = supabase.table('bible_chunks').select('*').eq('book', book).order('chapter', desc=False).limit(1000).execute()
-                
-                if filtered_response.data and len(filtered_response.data) > 0:
-                    # 필터링된 결과가 있으면 사용
-                    docs = filtered_response.data
-                    result_parts = []
-                    for doc in docs:
-                        chapter_num = doc.get('chapter', '')
-                        citation = f"{book}"
-                        if chapter_num:
-                            citation += f" {chapter_num}장"
-                        result_parts.append(
-                            f"[{citation}] {doc.get('content', '')}"
-                        )
-                    return "\n\n".join(result_parts)
-            except Exception as filter_error:
-                # 필터링 실패 시 벡터 검색으로 폴백
-                pass
-        
-        # 쿼리 개선
-        improved_query = improve_query_for_search(query, book, chapter, verse)
-        
-        # 쿼리 임베딩 생성
-        query_embedding = embeddings.embed_query(
-            improved_query,
-            output_dimensionality=settings.embedding_dimension
-        )
-        
-        # Supabase RPC를 통한 벡터 검색
-        # 책과 장이 파싱된 경우 필터링을 시도
-        if book and chapter:
-            # 먼저 book과 chapter로 직접 필터링 시도
-            try:
-                # Supabase에서 book과 chapter로 필터링
-                filtered_response = supabase.table('bible_chunks').select('*').eq('book', book).eq('chapter', chapter).limit(limit).execute()
-                
-                if filtered_response.data and len(filtered_response.data) > 0:
-                    # 필터링된 결과가 있으면 사용
-                    docs = filtered_response.data
-                    result_parts = []
-                    for doc in docs:
-                        result_parts.append(
-                            f"[{book} {chapter}장] {doc.get('content', '')}"
-                        )
-                    return "\n\n".join(result_parts)
-            except Exception as filter_error:
-                # 필터링 실패 시 벡터 검색으로 폴백
-                pass
-        
-        # 전체 책 요청이지만 필터링이 실패한 경우, limit을 크게 늘려서 검색
-        if book and is_full_book:
-            limit = 100  # 전체 책이면 더 많은 결과를 가져오기
-        
-        # 벡터 검색 (기본 방법)
-        response = supabase.rpc(
-            'match_documents',
-            {
-                'query_embedding': query_embedding,
-                'match_threshold': 0.5,  # 0.7에서 0.5로 낮춤
-                'match_count': limit
-            }
-        ).execute()
-        
-        # 결과 포맷팅
-        docs = response.data if response.data else []
-        if not docs:
-            return "관련된 성경 내용을 찾을 수 없습니다."
-        
-        result_parts = []
-        for doc in docs:
-            book = doc.get('book', '')
-            chapter = doc.get('chapter', '')
-            verse = doc.get('verse', '')
-            content = doc.get('content', '')
-            similarity = doc.get('similarity', 0)
-            
-            citation = f"{book}"
-            if chapter:
-                citation += f" {chapter}장"
-            if verse:
-                citation += f" {verse}절"
-            
-            result_parts.append(
-                f"[{citation}] {content}\n(유사도: {similarity:.4f})"
-            )
-        
-        return "\n\n".join(result_parts)
+        # 다른 워커가 최근에 같은 검색을 했으면 그 결과 사용
+        key = search_key(query, limit)
+        cache_key = repr(key)
+        cached = search_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        def retrieve():
+            result = _retrieve(query, limit)
+            # 시간 예산 부족으로 단순화된 결과는 다른 요청에 재사용하지 않음
+            if degradation.current_mode() == degradation.MODE_FULL:
+                search_cache.set(cache_key, result)
+            return result
+
+        # 같은 검색이 진행 중이면 그 결과를 함께 사용 (리더의 스트림만 취소된 경우 다시 실행)
+        return _retrieval_flight.do(key, retrieve, retry_on=(StreamCancelledError,))
     except Exception as e:
         # 네트워크 연결 오류인 경우 더 명확한 메시지
         if "getaddrinfo failed" in str(e) or "ConnectError" in str(e):
             return "네트워크 연결 오류: Supabase 서버에 연결할 수 없습니다."
         return f"검색 중 오류가 발생했습니다: {str(e)}"
 
+def search_key(query: str, limit: int = 5) -> tuple:
+    """
+    같은 검색 결과를 내는 쿼리를 같은 키로 정규화합니다.
+    
+    책/장/절이 파싱되면 파싱 결과로, 아니면(책 안의 주제를 묻는 질문 포함) 공백과 끝 문장부호를 정리한 문자열로 비교합니다.
+    (예: "요한복음 3:16" == "요한복음 3장 16절", "팔복이 뭐야?" == "팔복이 뭐야")
+    """
+    translations, stripped = parse_translations(query)
+    book, chapter, verse, is_full_book = parse_bible_reference(stripped)
+    if book and not (is_full_book and not chapter and is_topical_book_query(stripped, book)):
+        return ("reference", book, chapter, verse, is_full_book, limit, tuple(translations))
+    normalized = " ".join(query.split()).rstrip("?!.。 ")
+    return ("text", normalized, limit)
+
+def speculative_search(query: str, limit: int = 5):
+    """
+    에이전트의 첫 LLM 호출과 병렬로 검색을 미리 시작합니다 (with 블록으로 사용).
+    
+    블록 안에서 search_bible이 동등한 쿼리로 호출되면 미리 받은 결과를 반환하고,
+    다른 쿼리로 호출되거나 블록을 벗어나면 추측 작업을 취소합니다.
+    """
+    return speculate("search_bible", search_key(query, limit), _search_bible_impl, query, limit)
+
 # LangChain Tool로 래핑
 @tool
 def search_bible(query: str, limit: int = 5) -> str:
@@ -260,7 +715,14 @@ def search_bible(query: str, limit: int = 5) -> str:
     Returns:
         A formatted string containing relevant Bible passages with book, chapter, verse, and content.
     """
-    return _search_bible_impl(query, limit)
+    # 남은 시간이 부족하면 쿼리를 바꿔 가며 다시 검색하지 않음
+    if not degradation.allow_search():
+        return "응답 시간 제한으로 추가 검색을 생략했습니다. 이미 찾은 본문을 바탕으로 답변하세요."
+    # 라우터가 미리 시작한 검색과 쿼리가 같으면 그 결과 사용
+    prefetched = take_speculation("search_bible", search_key(query, limit))
+    if prefetched is None:
+        prefetched = _search_bible_impl(query, limit)
+    return degradation.cap_context(prefetched)
 
 class ToolErrorMiddleware(AgentMiddleware):
     """Handle tool execution errors with custom messages (supports both sync and async)."""
@@ -287,11 +749,7 @@ class ToolErrorMiddleware(AgentMiddleware):
                 tool_call_id=request.tool_call["id"]
             )
 
-agent = create_agent(
-    model=llm,
-    tools=[search_bible],
-    middleware=[ToolErrorMiddleware()],
-    system_prompt="""You are a Q&A AI chatbot based on Bible content. 
+SYSTEM_PROMPT = """You are a Q&A AI chatbot based on Bible content. 
 
 When users ask questions about the Bible:
 1. ALWAYS use the search_bible tool to search for relevant Bible passages.
@@ -302,6 +760,7 @@ When users ask questions about the Bible:
    - "요한복음 3:16" (will find John 3:16)
    - "역대상 전체 요약해줘" (will find all chapters of 1 Chronicles)
    - "역대상 요약" (will find all chapters of 1 Chronicles)
+   - "요한복음 3:16 개역개정이랑 비교해줘" (will show John 3:16 side by side in each loaded translation)
 4. For full book summaries, use queries like "역대상 전체", "역대상 요약", "역대상 전부" etc.
 5. Use the EXACT Korean text from the user's question as the query parameter.
 6. If the first search doesn't find results, try variations of the query (e.g., if user asks about "팔복", also try "복", "복이", "8복" etc.)
@@ -310,11 +769,116 @@ When users ask questions about the Bible:
 9. When summarizing a full book, organize the content by chapters and provide a comprehensive overview.
 10. When a verse or character is mentioned briefly in the Bible, still provide meaningful context: summarize the surrounding passage, theological significance, historical background, and, if appropriate, practical applications for today.
 11. Present answers in Korean with clear structure: begin with a concise 요약, then organize the explanation with 소제목, bullet lists, and numbered steps where helpful.
-12. Include the key takeaways and related passages that can deepen understanding, even if they were not in the original query.
+12. Include the key takeaways and related passages that can deepen understanding, even if they were not in the original query. Search results already list related passages for each hit ("관련 구절"); use those instead of running extra searches just to find cross-references.
 13. If information is sparse, explain what is known, what is not recorded, and suggest related areas the user could explore.
 
 Important: 
 - Never say you cannot find information without trying the search_bible tool first.
 - The search function handles book names and chapter/verse parsing automatically, so you can use natural queries.
 - For full book requests, the search function will automatically retrieve all chapters of the specified book."""
-)
+
+
+TIER_FAST = "fast"
+TIER_QUALITY = "quality"
+
+def classify_tier(messages: list) -> str:
+    """
+    질문을 모델 티어로 분류합니다 (LLM 호출 없이 규칙만 사용).
+    
+    quality: 전체 책 요청, 여러 책/장 언급, 긴 질문, 긴 대화
+    fast: 그 밖의 경우 (짧은 구절 조회, 짧은 질문)
+    
+    Args:
+        messages: 이전 대화 메시지 + 현재 사용자 메시지 (마지막이 사용자 메시지)
+    """
+    query = messages[-1].content if isinstance(messages[-1].content, str) else ""
+    if len(messages) - 1 >= settings.tier_deep_conversation_messages:
+        return TIER_QUALITY
+    if len(query) > settings.tier_long_query_chars:
+        return TIER_QUALITY
+    book, chapter, _, is_full_book = parse_bible_reference(query)
+    if book and is_full_book:
+        return TIER_QUALITY
+    if count_book_mentions(query) > 1 or len(CHAPTER_MENTION_PATTERN.findall(query)) > 1:
+        return TIER_QUALITY
+    return TIER_FAST
+
+def tier_model(tier: str) -> str:
+    """티어에 해당하는 모델 이름"""
+    if tier == TIER_FAST:
+        return settings.fast_llm_model or settings.llm_model
+    return settings.quality_llm_model or settings.llm_model
+
+def route_model(messages: list) -> tuple[str, str]:
+    """
+    이번 턴에 사용할 (티어, 모델 이름)을 정합니다.
+    지연 시간 예산이 부족하면 분류와 관계없이 fast 티어를 사용합니다.
+    """
+    degraded_model = degradation.generation_model()
+    if degraded_model:
+        return TIER_FAST, degraded_model
+    if not settings.model_tiering_enabled:
+        return "default", settings.llm_model
+    tier = classify_tier(messages)
+    return tier, tier_model(tier)
+
+def get_agent(model: str | None = None):
+    """에이전트 인스턴스 (모델별로 첫 호출 시 생성, 이후 공유)"""
+    model_name = model or settings.llm_model
+    
+    def create():
+        from langchain.agents import create_agent
+        return create_agent(
+            model=get_llm(model_name),
+            tools=[search_bible],
+            middleware=[ToolErrorMiddleware()],
+            system_prompt=SYSTEM_PROMPT
+        )
+    return get_or_create(f"agent:{model_name}", create)
+
+
+def prepare_direct_answer(messages: list, model: str | None = None) -> tuple[object, list, str] | None:
+    """
+    명확한 구절 참조 질문이면 검색을 미리 수행하여 한 번의 LLM 호출로 답할 준비를 합니다.
+    
+    에이전트의 두 번째 LLM 호출과 같은 입력(시스템 프롬프트, 대화 기록,
+    search_bible 호출과 결과)을 구성하므로 답변 형식은 에이전트 경로와 같습니다.
+    
+    Args:
+        messages: 이전 대화 메시지 + 현재 사용자 메시지 (마지막이 사용자 메시지)
+        model: 생성 모델 이름 (None이면 settings.llm_model)
+    
+    Returns:
+        (model, model_messages, tool_output) 튜플 (해당하지 않거나 본문이 없으면 None)
+    """
+    query = messages[-1].content
+    if not isinstance(query, str):
+        return None
+    with trace_span("reference_parse"):
+        translations, stripped = parse_translations(query)
+        reference = parse_direct_reference(stripped)
+    if reference is None:
+        return None
+    book, chapter, verse = reference
+    # search_bible과 같은 검색 캐시 사용 (다른 워커나 캐시 예열이 조회해 둔 본문)
+    cache_key = repr(search_key(query))
+    tool_output = search_cache.get(cache_key)
+    if tool_output is None:
+        tool_output = lookup_reference(book, chapter, verse, translations, degradation.search_limit(5))
+        if tool_output is None:
+            return None
+        if degradation.current_mode() == degradation.MODE_FULL:
+            search_cache.set(cache_key, tool_output)
+    tool_output = degradation.cap_context(tool_output)
+    
+    call_id = f"direct_{uuid4().hex[:12]}"
+    model_messages = [
+        SystemMessage(content=SYSTEM_PROMPT),
+        *messages,
+        AIMessage(content="", tool_calls=[{"name": "search_bible", "args": {"query": query}, "id": call_id}]),
+        ToolMessage(content=tool_output, tool_call_id=call_id),
+    ]
+    # 에이전트와 같은 도구 스키마를 바인딩 (Gemini는 function call 기록에 도구 선언이 필요)
+    model_name = model or settings.llm_model
+    bound_model = get_or_create(f"direct_llm:{model_name}", lambda: get_llm(model_name).bind_tools([search_bible]))
+    return bound_model, model_messages, tool_output
@@ -1,13 +1,75 @@
 """FastAPI 애플리케이션 진입점"""
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import PlainTextResponse
 from app.config import settings
-from app.routers import chat
+from app.routers import chat, admin
+from app.services.telemetry import metrics, update_process_metrics
+from app.services import shared_cache
+from app.services import providers
+from app.services import cache_warmer
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    시작/종료 훅
+
+    LangChain/Gemini/Supabase 초기화는 무거우므로 앱 시작을 막지 않고
+    백그라운드 스레드에서 미리 수행합니다. /healthz는 곧바로 응답하며,
+    워밍업 전에 들어온 요청은 같은 레지스트리에서 필요한 객체를 직접 생성합니다.
+    캐시 예열(질문 기록 기반)도 같은 방식으로 백그라운드에서 실행합니다.
+    """
+    warm_up_task = None
+    cache_warm_task = None
+    if settings.warm_up_on_startup:
+        async def warm_up():
+            loop = asyncio.get_running_loop()
+            started_at = loop.time()
+            try:
+                await asyncio.to_thread(providers.warm_up)
+                print(f"워밍업 완료 ({loop.time() - started_at:.2f}s)")
+            except Exception as e:
+                print(f"워밍업 오류: {e}")
+
+        warm_up_task = asyncio.create_task(warm_up())
+    if settings.cache_warm_enabled:
+        async def warm_caches():
+            while True:
+                try:
+                    await asyncio.to_thread(cache_warmer.warm_caches)
+                except Exception as e:
+                    print(f"캐시 예열 오류: {e}")
+                if settings.cache_warm_interval_seconds <= 0:
+                    return
+                await asyncio.sleep(settings.cache_warm_interval_seconds)
+
+        cache_warm_task = asyncio.create_task(warm_caches())
+    yield
+    cache_warmer.stop()
+    for task in (warm_up_task, cache_warm_task):
+        if task is not None and not task.done():
+            task.cancel()
+
+
+class JSONGZipMiddleware(GZipMiddleware):
+    """SSE 스트림을 뺀 응답 압축 (압축 버퍼 때문에 토큰이 늦게 전달되지 않도록 스트림은 그대로 전송)"""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith("/api/chat/stream"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
 
 app = FastAPI(
     title="성경 QA 챗봇 API",
     description="성경 내용을 기반으로 한 질문-답변 API (출처: 대한성서공회, 1961 개정 '성경전서 개역한글판')",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # CORS 설정
@@ -17,10 +79,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # 과부하(503) 응답의 재시도 간격을 브라우저 클라이언트도 읽을 수 있도록
+    expose_headers=["Retry-After"],
 )
 
+# 응답 압축 (대화 목록/메시지 JSON)
+app.add_middleware(JSONGZipMiddleware, minimum_size=settings.gzip_minimum_size)
+
 # 라우터 등록
 app.include_router(chat.router)
+app.include_router(admin.router)
 
 
 @app.get("/")
@@ -38,3 +106,14 @@ async def healthz():
     """Render 헬스 체크용 엔드포인트"""
     return {"ok": True}
 
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus 스크레이프용 메트릭 엔드포인트 (단계별 지연 시간, 토큰 사용량 등)"""
+    update_process_metrics()
+    shared_cache.report_sizes()
+    return PlainTextResponse(
+        metrics.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
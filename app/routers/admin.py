@@ -0,0 +1,34 @@
+"""관리자 라우터 (프로파일 결과 조회/다운로드)"""
+import hmac
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Header, Depends
+from fastapi.responses import FileResponse
+from app.config import settings
+from app.services.profiling_service import profiling_service
+
+
+def verify_admin(x_admin_token: Optional[str] = Header(None)):
+    """X-Admin-Token 헤더로 관리자 인증"""
+    if not settings.admin_token:
+        raise HTTPException(status_code=404, detail="관리자 기능이 비활성화되어 있습니다.")
+    # 바이트로 비교 (str끼리 비교하면 ASCII가 아닌 헤더 값에서 TypeError)
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), settings.admin_token.encode()):
+        raise HTTPException(status_code=403, detail="관리자 토큰이 올바르지 않습니다.")
+
+
+router = APIRouter(prefix="/api/admin", tags=["admin"], dependencies=[Depends(verify_admin)])
+
+
+@router.get("/profiles")
+async def list_profiles():
+    """저장된 요청 프로파일 목록 (최신순)"""
+    return {"profiles": profiling_service.list_artifacts()}
+
+
+@router.get("/profiles/{name}")
+async def download_profile(name: str):
+    """요청 프로파일 다운로드 (collapsed stack 형식, speedscope / flamegraph.pl로 시각화)"""
+    path = profiling_service.get_artifact_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="프로파일을 찾을 수 없습니다.")
+    return FileResponse(path, media_type="text/plain; charset=utf-8", filename=path.name)
@@ -1,36 +1,284 @@
 """채팅 라우터"""
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Header, Request
 from fastapi.responses import StreamingResponse
+from app.config import settings
 from app.models.schemas import ChatRequest, ChatResponse
-from app.langgraph.graph import agent
 from app.services.conversation_service import conversation_service
+from app.services.telemetry import RequestTrace, start_trace, trace_span, TraceCallbackHandler
+from app.services.profiling_service import profiling_service
+from app.services.streaming import StreamDeltaTracker, chunk_text
+from app.services.stream_sessions import stream_session_registry, StreamSession, AnswerCheckpointer
+from app.services.single_flight import AsyncSingleFlight
+from app.services.shared_cache import answer_cache
+from app.services import http_cache, source_refs
+from app.services.scheduler import llm_scheduler, request_priority, LLMSlot, SchedulerOverloaded
 from langchain_core.messages import HumanMessage, AIMessage
 import re
-import json
-from typing import AsyncGenerator, List
+import time
+from contextlib import nullcontext
+from typing import AsyncGenerator, List, Optional, Tuple
 
 router = APIRouter(prefix="/api", tags=["chat"])
 
+# 새 대화의 첫 질문이 동시에 여러 개 들어오면 답변 생성을 하나로 합침
+first_turn_answers = AsyncSingleFlight("answer")
+
+# 도구 출력의 "[인용] 내용" 형식에서 출처 정보를 추출하는 패턴
+SOURCE_PATTERN = re.compile(r'\[([^\]]+)\]\s*([^\n]+)')
+# 기본 번역본이 아닌 검색 결과 앞의 번역본 표시
+TRANSLATION_LABEL_PATTERN = re.compile(r'\(번역본: ([^)]+)\)')
+
+
+async def admit(streaming: bool, has_conversation: bool) -> LLMSlot:
+    """
+    LLM 실행 슬롯 획득 (과부하면 Retry-After와 함께 503)
+    
+    Raises:
+        HTTPException: 대기열이 가득 찼거나 대기 마감 시간이 지난 경우
+    """
+    try:
+        return await llm_scheduler.acquire(request_priority(streaming, has_conversation))
+    except SchedulerOverloaded as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+
+def first_turn_key(message: str) -> str:
+    """첫 턴 질문 비교 키 (공백 정리)"""
+    return " ".join(message.split())
+
+
+async def load_agent(model: Optional[str] = None):
+    """
+    에이전트 로드 (첫 요청이면 무거운 임포트와 생성을 스레드에서 수행)
+
+    graph 모듈은 LangChain/Gemini SDK를 임포트하므로 앱 시작 시점이 아니라
+    처음 필요할 때 불러옵니다. 이벤트 루프를 막지 않도록 to_thread에서 실행합니다.
+    """
+    import asyncio
+
+    def load():
+        from app.langgraph.graph import get_agent
+        return get_agent(model)
+    return await asyncio.to_thread(load)
+
+
+async def select_model(messages: List, trace: RequestTrace) -> str:
+    """이번 턴의 모델 티어를 정하고 trace에 기록한 뒤 모델 이름 반환"""
+    import asyncio
+
+    def select():
+        from app.langgraph.graph import route_model
+        return route_model(messages)
+    tier, model = await asyncio.to_thread(select)
+    trace.set_tier(tier, model)
+    return model
+
+
+async def prepare_direct_answer(messages: List, model: Optional[str] = None):
+    """
+    사전 라우팅: 명확한 구절 참조면 본문을 바로 조회하여 단일 생성 호출을 준비합니다.
+    
+    Returns:
+        (model, model_messages, tool_output) 튜플 (에이전트 경로를 써야 하면 None)
+    """
+    import asyncio
+    if not settings.direct_reference_enabled:
+        return None
+    
+    def prepare():
+        from app.langgraph.graph import prepare_direct_answer as prepare_direct
+        return prepare_direct(messages, model)
+    return await asyncio.to_thread(prepare)
+
+
+def start_speculative_search(message: str):
+    """
+    에이전트의 첫 LLM 호출 동안 사용자 메시지로 검색을 미리 실행합니다 (with 블록으로 사용).
+    load_agent 이후에 호출하므로 graph 모듈은 이미 로드되어 있습니다.
+    """
+    if not settings.speculative_search_enabled:
+        return nullcontext()
+    from app.langgraph.graph import speculative_search
+    return speculative_search(message)
+
+
+def extract_sources(tool_content: str, sources: List[dict], max_sources: int = 3) -> List[dict]:
+    """
+    검색 도구 출력에서 성경 구절 출처를 추출하여 sources에 추가합니다.
+    
+    출처에는 표시용 필드(book, chapter, verse, content)와 함께 저장용 위치 필드
+    (translation, book_no, chapter_no, verse_start, verse_end)가 들어갑니다 (source_refs 참고).
+    
+    Args:
+        tool_content: search_bible 도구의 출력 문자열
+        sources: 추출한 출처를 누적할 리스트
+        max_sources: 한 번의 도구 출력에서 채울 최대 출처 수
+        
+    Returns:
+        출처가 추가된 sources 리스트
+    """
+    from app.langgraph.graph import TRANSLATION_ALIASES
+    
+    # 기본 번역본이 아닌 검색 결과는 "(번역본: 이름)"으로 시작
+    label = TRANSLATION_LABEL_PATTERN.match(tool_content)
+    output_translation = TRANSLATION_ALIASES.get(label.group(1)) if label else None
+    for citation, content in SOURCE_PATTERN.findall(tool_content):
+        # citation에서 책, 장, 절(또는 번역본 비교 결과의 번역본 이름) 추출
+        parts = citation.split()
+        if len(parts) >= 2:
+            book = parts[0]
+            chapter = parts[1].replace('장', '') if '장' in parts[1] else None
+            verse = None
+            translation = output_translation
+            for part in parts[2:]:
+                if part.endswith('절'):
+                    verse = part.replace('절', '')
+                elif part in TRANSLATION_ALIASES:
+                    translation = TRANSLATION_ALIASES[part]
+            
+            sources.append(source_refs.describe_source(book, chapter, verse, content, translation))
+            # 최대 3개까지만
+            if len(sources) >= max_sources:
+                break
+    return sources
+
+
+async def generate_answer(all_messages: List, message: str, trace: RequestTrace) -> Tuple[str, List[dict], str]:
+    """
+    질문에 대한 답변 생성 (직접 조회 경로 또는 에이전트 경로)
+    
+    Returns:
+        (answer, sources, route) 튜플
+    """
+    import asyncio
+    # 질문 종류에 따라 fast/quality 모델 선택 (예산이 부족하면 fast)
+    model = await select_model(all_messages, trace)
+    
+    # 명확한 구절 참조면 에이전트 루프 없이 조회 결과로 한 번만 생성
+    route = "agent"
+    final_content = None
+    tool_outputs: List[str] = []
+    direct = await prepare_direct_answer(all_messages, model)
+    if direct is not None:
+        model, model_messages, tool_output = direct
+        with trace_span("direct_answer"):
+            response = await asyncio.to_thread(
+                model.invoke,
+                model_messages,
+                {"callbacks": [TraceCallbackHandler(trace)]}
+            )
+        # 모델이 도구를 다시 호출하려 하면(텍스트 없음) 에이전트 경로로 처리
+        if chunk_text(response.content):
+            route = "direct"
+            final_content = response.content
+            tool_outputs.append(tool_output)
+    
+    if route == "agent":
+        # LangGraph 에이전트를 사용하여 질문 처리 (이전 대화 맥락 포함) - 한 번만 호출
+        with trace_span("agent"):
+            agent = await load_agent(model)
+            with start_speculative_search(message):
+                result = await asyncio.to_thread(
+                    agent.invoke,
+                    {"messages": all_messages},
+                    {"callbacks": [TraceCallbackHandler(trace)]}
+                )
+        
+        # 최종 답변 추출
+        final_content = result["messages"][-1].content
+        for msg in result["messages"]:
+            if hasattr(msg, '__class__') and msg.__class__.__name__ == "ToolMessage":
+                tool_outputs.append(str(msg.content))
+    
+    # Gemini가 구조화된 응답을 반환하는 경우 처리
+    if isinstance(final_content, list):
+        # 리스트인 경우 텍스트 부분만 추출
+        text_parts = []
+        for item in final_content:
+            if isinstance(item, dict) and 'text' in item:
+                text_parts.append(item['text'])
+            elif isinstance(item, str):
+                text_parts.append(item)
+        answer = '\n'.join(text_parts)
+    elif isinstance(final_content, dict):
+        # 딕셔너리인 경우 텍스트 부분만 추출
+        if 'text' in final_content:
+            answer = final_content['text']
+        else:
+            answer = str(final_content)
+    else:
+        answer = str(final_content)
+    
+    # 소스 정보 추출 (ToolMessage에서 검색 결과 파싱)
+    sources = []
+    for tool_output in tool_outputs:
+        # 검색 결과에서 성경 구절 정보 추출
+        extract_sources(tool_output, sources)
+    
+    return answer, sources, route
+
+
+async def generate_first_turn_answer(all_messages: List, message: str, trace: RequestTrace) -> Tuple[str, List[dict], str]:
+    """새 대화의 첫 답변 생성 (시간 예산 안에서 온전히 생성된 답변은 공유 캐시에 저장)"""
+    import asyncio
+    answer, sources, route = await generate_answer(all_messages, message, trace)
+    if answer_cache.enabled and trace.mode == "full":
+        await asyncio.to_thread(
+            answer_cache.set,
+            first_turn_key(message),
+            {"answer": answer, "sources": sources}
+        )
+    return answer, sources, route
+
+
+async def generate_admitted_first_turn_answer(all_messages: List, message: str, trace: RequestTrace) -> Tuple[str, List[dict], str]:
+    """
+    슬롯을 받아 새 대화의 첫 답변 생성
+    
+    first_turn_answers의 팩토리로 쓰므로 실제로 생성하는 리더만 슬롯을 받고,
+    결과를 기다리는 팔로워는 슬롯을 쓰지 않습니다.
+    """
+    slot = await admit(streaming=False, has_conversation=False)
+    try:
+        return await generate_first_turn_answer(all_messages, message, trace)
+    finally:
+        slot.release()
+
 
 @router.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, x_profile: Optional[str] = Header(None)):
     """채팅 엔드포인트"""
     import asyncio
+    trace = start_trace("chat")
+    trace.set_budget(settings.request_budget_seconds)
+    # 관리자 헤더 또는 샘플링으로 선택된 요청만 프로파일링 (슬롯을 받기 전에 결정)
+    profile_enabled = profiling_service.should_profile(x_profile)
+    # 새 대화의 첫 질문은 워커 간 공유 답변 캐시를 먼저 확인
+    cached = None
+    if not request.conversation_id and answer_cache.enabled:
+        cached = await asyncio.to_thread(answer_cache.get, first_turn_key(request.message))
+    # 새 대화의 첫 질문은 single-flight 리더만 생성 직전에 슬롯을 받음 (캐시 적중, 팔로워는 슬롯 불필요)
+    slot = None
+    if request.conversation_id:
+        slot = await admit(streaming=False, has_conversation=True)
+    profiler = None
     try:
-        # 대화 ID 생성 또는 조회 (없는 경우)
-        if not request.conversation_id:
-            conversation_id = await asyncio.to_thread(conversation_service.create_conversation)
-        else:
-            conversation_id = request.conversation_id
+        profiler = profiling_service.start("chat") if profile_enabled else None
+        conversation_id = request.conversation_id
         
         # 이전 대화 메시지 가져오기 (멀티턴 대화 지원) - 먼저 로드
         previous_messages: List = []
         if conversation_id:
             try:
-                history = await asyncio.to_thread(
-                    conversation_service.get_conversation_messages, 
-                    conversation_id
-                )
+                with trace_span("history_load"):
+                    history = await asyncio.to_thread(
+                        conversation_service.get_conversation_messages, 
+                        conversation_id
+                    )
                 # 최근 20개 메시지만 사용 (컨텍스트 폭주 방지)
                 for msg in history[-20:]:
                     if msg.get("role") == "user":
@@ -44,82 +292,49 @@ async def chat(request: ChatRequest):
         current_user_message = HumanMessage(content=request.message)
         all_messages = previous_messages + [current_user_message]
         
-        # LangGraph 에이전트를 사용하여 질문 처리 (이전 대화 맥락 포함) - 한 번만 호출
-        result = await asyncio.to_thread(
-            agent.invoke,
-            {"messages": all_messages}
-        )
-        
-        # 최종 답변 추출
-        final_content = result["messages"][-1].content
-        
-        # Gemini가 구조화된 응답을 반환하는 경우 처리
-        if isinstance(final_content, list):
-            # 리스트인 경우 텍스트 부분만 추출
-            text_parts = []
-            for item in final_content:
-                if isinstance(item, dict) and 'text' in item:
-                    text_parts.append(item['text'])
-                elif isinstance(item, str):
-                    text_parts.append(item)
-            answer = '\n'.join(text_parts)
-        elif isinstance(final_content, dict):
-            # 딕셔너리인 경우 텍스트 부분만 추출
-            if 'text' in final_content:
-                answer = final_content['text']
-            else:
-                answer = str(final_content)
+        if request.conversation_id:
+            answer, sources, route = await generate_answer(all_messages, request.message, trace)
+        elif cached is not None:
+            answer, sources, route = cached["answer"], cached["sources"], "cached"
         else:
-            answer = str(final_content)
+            # 새 대화의 같은 질문이 동시에 들어오면 한 번만 생성하여 결과 공유
+            answer, sources, route = await first_turn_answers.do(
+                first_turn_key(request.message),
+                lambda: generate_admitted_first_turn_answer(all_messages, request.message, trace)
+            )
+            sources = list(sources)
         
-        # 소스 정보 추출 (ToolMessage에서 검색 결과 파싱)
-        sources = []
-        for msg in result["messages"]:
-            if hasattr(msg, '__class__') and msg.__class__.__name__ == "ToolMessage":
-                tool_content = str(msg.content)
-                # 검색 결과에서 성경 구절 정보 추출
-                pattern = r'\[([^\]]+)\]\s*([^\n]+)'
-                matches = re.findall(pattern, tool_content)
-                for citation, content_preview in matches:
-                    # citation에서 책, 장, 절 추출
-                    parts = citation.split()
-                    if len(parts) >= 2:
-                        book = parts[0]
-                        chapter = parts[1].replace('장', '') if '장' in parts[1] else None
-                        verse = None
-                        if len(parts) >= 3:
-                            verse = parts[2].replace('절', '') if '절' in parts[2] else None
-                        
-                        sources.append({
-                            "book": book,
-                            "chapter": chapter or "",
-                            "verse": verse or "",
-                            "content": content_preview[:200] + "..." if len(content_preview) > 200 else content_preview
-                        })
-                        # 최대 3개까지만
-                        if len(sources) >= 3:
-                            break
+        # 새 대화는 답변을 받은 뒤 생성 (과부하로 거절되면 빈 대화를 남기지 않음)
+        if not conversation_id:
+            with trace_span("create_conversation"):
+                conversation_id = await asyncio.to_thread(conversation_service.create_conversation)
         
         # 사용자 메시지 저장
         try:
-            await asyncio.to_thread(
-                conversation_service.append_message,
-                conversation_id=conversation_id,
-                role="user",
-                content=request.message
-            )
+            with trace_span("persist_user"):
+                await asyncio.to_thread(
+                    conversation_service.append_message,
+                    conversation_id=conversation_id,
+                    role="user",
+                    content=request.message
+                )
         except Exception as e:
             print(f"사용자 메시지 저장 오류: {e}")
         
-        # AI 응답 저장
+        # AI 응답 저장 (단계별 지연 시간, 토큰 수, 처리 경로를 metadata에 기록)
+        trace.set_route(route)
+        trace.finish()
         try:
-            await asyncio.to_thread(
-                conversation_service.append_message,
-                conversation_id=conversation_id,
-                role="assistant",
-                content=answer,
-                sources=sources if sources else None
-            )
+            # 저장 시간은 저장할 metadata에 넣을 수 없으므로 /metrics(stage="persist_assistant")에만 기록
+            with trace_span("persist_assistant"):
+                await asyncio.to_thread(
+                    conversation_service.append_message,
+                    conversation_id=conversation_id,
+                    role="assistant",
+                    content=answer,
+                    sources=sources if sources else None,
+                    metadata=trace.to_metadata()
+                )
         except Exception as e:
             print(f"AI 메시지 저장 오류: {e}")
         
@@ -128,199 +343,341 @@ async def chat(request: ChatRequest):
             conversation_id=conversation_id,
             sources=sources if sources else None
         )
+    except HTTPException:
+        # 과부하(503) 등은 그대로 전달
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"처리 중 오류가 발생했습니다: {str(e)}"
         )
+    finally:
+        if slot is not None:
+            slot.release()
+        if profiler is not None:
+            await asyncio.to_thread(profiler.stop)
 
 
 @router.post("/chat/stream")
-async def chat_stream(request: ChatRequest):
-    """스트리밍 채팅 엔드포인트"""
-    async def generate() -> AsyncGenerator[str, None]:
-        """스트리밍 응답 생성"""
-        import asyncio
-        try:
-            # 대화 ID 생성 또는 조회 (없는 경우)
-            if not request.conversation_id:
+async def chat_stream(
+    request: ChatRequest,
+    x_profile: Optional[str] = Header(None),
+    last_event_id: Optional[str] = Header(None)
+):
+    """
+    스트리밍 채팅 엔드포인트
+    
+    Last-Event-ID 헤더가 진행 중(또는 최근 완료)인 스트림을 가리키면
+    새로 생성하지 않고 해당 위치부터 이어서 전송합니다.
+    """
+    resumed = stream_session_registry.resolve(last_event_id)
+    if resumed:
+        session, cursor = resumed
+        return _sse_response(stream_session_registry.subscribe(session, cursor))
+    
+    # 새 대화의 같은 질문이 이미 생성 중이면 그 토큰 스트림을 함께 받음
+    flight_key = None
+    if not request.conversation_id and settings.single_flight_enabled:
+        flight_key = first_turn_key(request.message)
+        leader = stream_session_registry.find_flight(flight_key)
+        if leader is not None:
+            return _follow_flight(leader, request)
+    
+    # 동시 실행 제한 (과부하면 스트림을 시작하기 전에 503)
+    arrived_at = time.perf_counter()
+    profile_enabled = profiling_service.should_profile(x_profile)
+    slot = await admit(streaming=True, has_conversation=bool(request.conversation_id))
+    # 대기열에 있는 동안 같은 질문의 리더가 생겼으면 슬롯을 돌려주고 따라감
+    # (확인부터 세션 등록까지 await가 없으므로 다른 요청이 끼어들지 않음)
+    if flight_key is not None:
+        leader = stream_session_registry.find_flight(flight_key)
+        if leader is not None:
+            slot.release()
+            return _follow_flight(leader, request)
+    session = stream_session_registry.start(
+        lambda session: _produce_chat_stream(session, request, profile_enabled, slot, arrived_at),
+        flight_key=flight_key
+    )
+    return _sse_response(stream_session_registry.subscribe(session))
+
+
+def _follow_flight(leader: StreamSession, request: ChatRequest) -> StreamingResponse:
+    """같은 첫 질문을 생성 중인 리더 세션의 스트림을 함께 받는 응답"""
+    session = stream_session_registry.start(
+        lambda session: _follow_chat_stream(session, leader, request)
+    )
+    return _sse_response(stream_session_registry.subscribe(session))
+
+
+@router.get("/chat/stream/{stream_id}")
+async def resume_chat_stream(stream_id: str, last_event_id: Optional[str] = Header(None)):
+    """끊긴 스트림 이어받기 (EventSource 재연결 또는 Last-Event-ID 헤더 사용)"""
+    resumed = stream_session_registry.resolve(last_event_id or f"{stream_id}:0")
+    if not resumed or resumed[0].id != stream_id:
+        raise HTTPException(status_code=404, detail="이어받을 스트림을 찾을 수 없습니다.")
+    session, cursor = resumed
+    return _sse_response(stream_session_registry.subscribe(session, cursor))
+
+
+def _sse_response(frames: AsyncGenerator[str, None]) -> StreamingResponse:
+    """SSE 스트리밍 응답 생성"""
+    return StreamingResponse(
+        frames,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no"  # Nginx 버퍼링 비활성화
+        }
+    )
+
+
+async def _produce_chat_stream(
+    session: StreamSession,
+    request: ChatRequest,
+    profile_enabled: bool,
+    slot: Optional[LLMSlot] = None,
+    arrived_at: Optional[float] = None
+) -> None:
+    """
+    에이전트를 실행하여 스트리밍 세션에 이벤트를 기록 (HTTP 연결과 독립적으로 실행, 끝나면 slot 반납)
+    
+    지연 시간 예산은 요청 도착 시점(arrived_at)부터 계산하여 대기열 대기 시간도 포함합니다.
+    """
+    import asyncio
+    trace = start_trace("chat_stream")
+    trace.set_budget(settings.request_budget_seconds, since=arrived_at)
+    profiler = profiling_service.start("chat_stream") if profile_enabled else None
+    checkpointer = None
+    tracker = StreamDeltaTracker()
+    sources = []
+    try:
+        # 대화 ID 생성 또는 조회 (없는 경우)
+        if not request.conversation_id:
+            with trace_span("create_conversation"):
                 conversation_id = await asyncio.to_thread(conversation_service.create_conversation)
-            else:
-                conversation_id = request.conversation_id
-            
-            # 이전 대화 메시지 가져오기 (멀티턴 대화 지원) - 먼저 로드
-            previous_messages: List = []
-            if conversation_id:
-                try:
+        else:
+            conversation_id = request.conversation_id
+        
+        # 이전 대화 메시지 가져오기 (멀티턴 대화 지원) - 먼저 로드
+        previous_messages: List = []
+        if conversation_id:
+            try:
+                with trace_span("history_load"):
                     history = await asyncio.to_thread(
                         conversation_service.get_conversation_messages,
                         conversation_id
                     )
-                    # 최근 20개 메시지만 사용 (컨텍스트 폭주 방지)
-                    for msg in history[-20:]:
-                        if msg.get("role") == "user":
-                            previous_messages.append(HumanMessage(content=msg.get("content", "")))
-                        elif msg.get("role") == "assistant":
-                            previous_messages.append(AIMessage(content=msg.get("content", "")))
-                except Exception as e:
-                    print(f"대화 기록 조회 오류: {e}")
-            
-            # 새 사용자 메시지 추가 (히스토리에 포함되지 않도록)
-            current_user_message = HumanMessage(content=request.message)
-            all_messages = previous_messages + [current_user_message]
-            
-            # 초기 메타데이터 전송
-            yield f"data: {json.dumps({'type': 'start', 'conversation_id': conversation_id}, ensure_ascii=False)}\n\n"
-            
-            accumulated_text = ""
-            sources = []
-            
-            # 사용자 메시지 저장 (비동기로 실행, 스트리밍과 병렬)
-            async def save_user_message():
-                try:
+                # 최근 20개 메시지만 사용 (컨텍스트 폭주 방지)
+                for msg in history[-20:]:
+                    if msg.get("role") == "user":
+                        previous_messages.append(HumanMessage(content=msg.get("content", "")))
+                    elif msg.get("role") == "assistant":
+                        previous_messages.append(AIMessage(content=msg.get("content", "")))
+            except Exception as e:
+                print(f"대화 기록 조회 오류: {e}")
+        
+        # 새 사용자 메시지 추가 (히스토리에 포함되지 않도록)
+        current_user_message = HumanMessage(content=request.message)
+        all_messages = previous_messages + [current_user_message]
+        
+        # 초기 메타데이터 전송 (stream_id는 Last-Event-ID 재연결에 사용)
+        session.publish({'type': 'start', 'conversation_id': conversation_id, 'stream_id': session.id})
+        
+        # 사용자 메시지 저장 (비동기로 실행, 스트리밍과 병렬)
+        async def save_user_message():
+            try:
+                with trace_span("persist_user"):
                     await asyncio.to_thread(
                         conversation_service.append_message,
                         conversation_id=conversation_id,
                         role="user",
                         content=request.message
                     )
-                except Exception as e:
-                    print(f"사용자 메시지 저장 오류: {e}")
-            
-            # 백그라운드에서 사용자 메시지 저장 시작
-            save_task = asyncio.create_task(save_user_message())
-            
+            except Exception as e:
+                print(f"사용자 메시지 저장 오류: {e}")
+        
+        # 백그라운드에서 사용자 메시지 저장 시작
+        save_task = asyncio.create_task(save_user_message())
+        # 부분 답변은 주기적으로 저장 (사용자 메시지 저장 이후)
+        checkpointer = AnswerCheckpointer(conversation_service, conversation_id, session.id, save_task)
+        
+        def publish_text(new_text: str) -> None:
+            if new_text:
+                trace.mark_first_token()
+                session.publish({'type': 'token', 'content': new_text})
+                if checkpointer.due():
+                    checkpointer.checkpoint(tracker.text)
+        
+        # 질문 종류에 따라 fast/quality 모델 선택 (예산이 부족하면 fast)
+        model = await select_model(all_messages, trace)
+        
+        # 명확한 구절 참조면 에이전트 루프 없이 조회 결과로 한 번만 생성 (같은 SSE 이벤트 형식)
+        route = "agent"
+        direct = await prepare_direct_answer(all_messages, model)
+        if direct is not None:
+            model, model_messages, tool_output = direct
+            async for chunk in model.astream(model_messages, {"callbacks": [TraceCallbackHandler(trace)]}):
+                publish_text(tracker.add_chunk(chunk.id or "direct", chunk_text(chunk.content)))
+            # 모델이 도구를 다시 호출하려 하면(텍스트 없음) 에이전트 경로로 처리
+            if tracker:
+                route = "direct"
+                extract_sources(tool_output, sources)
+        
+        if route == "agent":
             # LangChain Agent의 스트리밍 사용 - astream_events로 토큰과 소스를 한 번에 처리
             # 참고: https://docs.langchain.com/oss/python/langchain/streaming
-            
-            async for event in agent.astream_events(
-                {"messages": all_messages},
-                version="v1"
-            ):
-                event_type = event.get("event")
-                event_name = event.get("name", "")
-                
-                # Gemini/ChatModel 스트리밍 이벤트 처리
-                if event_type in ["on_llm_stream", "on_chat_model_stream", "on_llm_new_token"]:
-                    data = event.get("data", {})
-                    chunk = data.get("chunk") or data.get("data", {}).get("chunk")
+            agent = await load_agent(model)
+            with start_speculative_search(request.message):
+                async for event in agent.astream_events(
+                    {"messages": all_messages},
+                    {"callbacks": [TraceCallbackHandler(trace)]},
+                    version="v1"
+                ):
+                    event_type = event.get("event")
+                    event_name = event.get("name", "")
+                    new_text = ""
                     
-                    if chunk:
-                        # content_blocks에서 텍스트 토큰 추출
-                        if hasattr(chunk, 'content_blocks') and chunk.content_blocks:
-                            for block in chunk.content_blocks:
-                                if isinstance(block, dict) and block.get('type') == 'text':
-                                    text_content = block.get('text', '')
-                                    if text_content:
-                                        yield f"data: {json.dumps({'type': 'token', 'content': text_content}, ensure_ascii=False)}\n\n"
-                                        accumulated_text += text_content
-                        
-                        # content 속성 확인
-                        elif hasattr(chunk, 'content'):
-                            content = chunk.content
-                            if isinstance(content, str) and content:
-                                if content != accumulated_text:
-                                    if len(content) > len(accumulated_text) and content.startswith(accumulated_text):
-                                        new_text = content[len(accumulated_text):]
-                                        if new_text:
-                                            accumulated_text = content
-                                            yield f"data: {json.dumps({'type': 'token', 'content': new_text}, ensure_ascii=False)}\n\n"
-                                    else:
-                                        accumulated_text = content
-                                        yield f"data: {json.dumps({'type': 'token', 'content': content}, ensure_ascii=False)}\n\n"
-                            elif isinstance(content, list):
-                                for item in content:
-                                    if isinstance(item, dict) and 'text' in item:
-                                        text = item['text']
-                                        if text and text != accumulated_text:
-                                            new_text = text[len(accumulated_text):] if text.startswith(accumulated_text) else text
-                                            if new_text:
-                                                accumulated_text = text
-                                                yield f"data: {json.dumps({'type': 'token', 'content': new_text}, ensure_ascii=False)}\n\n"
-                                    elif isinstance(item, str):
-                                        if item and item != accumulated_text:
-                                            new_text = item[len(accumulated_text):] if item.startswith(accumulated_text) else item
-                                            if new_text:
-                                                accumulated_text = item
-                                                yield f"data: {json.dumps({'type': 'token', 'content': new_text}, ensure_ascii=False)}\n\n"
-                
-                # Tool 실행 완료 시 소스 정보 추출
-                elif event_type == "on_tool_end":
-                    tool_output = event.get("data", {}).get("output", "")
-                    if tool_output:
-                        tool_content = str(tool_output)
-                        pattern = r'\[([^\]]+)\]\s*([^\n]+)'
-                        matches = re.findall(pattern, tool_content)
-                        for citation, content_preview in matches:
-                            parts = citation.split()
-                            if len(parts) >= 2:
-                                book = parts[0]
-                                chapter = parts[1].replace('장', '') if '장' in parts[1] else None
-                                verse = None
-                                if len(parts) >= 3:
-                                    verse = parts[2].replace('절', '') if '절' in parts[2] else None
-                                
-                                sources.append({
-                                    "book": book,
-                                    "chapter": chapter or "",
-                                    "verse": verse or "",
-                                    "content": content_preview[:200] + "..." if len(content_preview) > 200 else content_preview
-                                })
-                                if len(sources) >= 3:
-                                    break
-                
-                # AIMessage 완성 시 최종 텍스트 추출 (스트리밍이 실패한 경우 대비)
-                elif event_type == "on_chain_end" and event_name == "RunnableAgent":
-                    output = event.get("data", {}).get("output", {})
-                    if "messages" in output:
-                        for msg in output["messages"]:
-                            if hasattr(msg, '__class__') and msg.__class__.__name__ == "AIMessage":
-                                content = msg.content
-                                if isinstance(content, str) and content and content != accumulated_text:
-                                    new_text = content[len(accumulated_text):] if content.startswith(accumulated_text) else content
-                                    if new_text:
-                                        yield f"data: {json.dumps({'type': 'token', 'content': new_text}, ensure_ascii=False)}\n\n"
-                                        accumulated_text = content
-            
-            # 사용자 메시지 저장 완료 대기
-            await save_task
-            
-            # 최종 메타데이터 전송
-            yield f"data: {json.dumps({'type': 'done', 'sources': sources if sources else None}, ensure_ascii=False)}\n\n"
-            
-            # AI 응답 저장 (스트리밍 완료 후)
-            if accumulated_text:
-                try:
+                    # Gemini/ChatModel 스트리밍 이벤트 처리 (청크는 증분이므로 그대로 누적)
+                    if event_type in ["on_llm_stream", "on_chat_model_stream", "on_llm_new_token"]:
+                        data = event.get("data", {})
+                        chunk = data.get("chunk") or data.get("data", {}).get("chunk")
+                    
+                        if chunk is not None and hasattr(chunk, 'content'):
+                            message_id = getattr(chunk, 'id', None) or event.get("run_id", "")
+                            new_text = tracker.add_chunk(message_id, chunk_text(chunk.content))
+                    
+                    # Tool 실행 완료 시 소스 정보 추출
+                    elif event_type == "on_tool_end":
+                        tool_output = event.get("data", {}).get("output", "")
+                        if tool_output:
+                            extract_sources(str(getattr(tool_output, 'content', tool_output)), sources)
+                    
+                    # AIMessage 완성 시 최종 텍스트 추출 (스트리밍이 실패한 경우 대비)
+                    elif event_type == "on_chain_end" and event_name == "RunnableAgent":
+                        output = event.get("data", {}).get("output", {})
+                        if "messages" in output:
+                            for msg in output["messages"]:
+                                if hasattr(msg, '__class__') and msg.__class__.__name__ == "AIMessage":
+                                    new_text += tracker.complete(msg.id or "", chunk_text(msg.content))
+                    
+                    publish_text(new_text)
+        
+        # 사용자 메시지 저장 완료 대기
+        await save_task
+        
+        # 최종 메타데이터 전송
+        session.publish({'type': 'done', 'sources': sources if sources else None})
+        
+        # AI 응답 저장 (스트리밍 완료 후, 단계별 지연 시간, 토큰 수, 처리 경로를 metadata에 기록)
+        trace.set_route(route)
+        trace.finish()
+        # 저장 시간은 저장할 metadata에 넣을 수 없으므로 /metrics(stage="persist_assistant")에만 기록
+        with trace_span("persist_assistant"):
+            await checkpointer.finalize(tracker.text, sources if sources else None, trace.to_metadata())
+    
+    except asyncio.CancelledError:
+        # 클라이언트가 떠나 생성이 취소된 경우: 지금까지의 부분 답변 저장
+        trace.finish()
+        if checkpointer is not None:
+            await checkpointer.finalize(tracker.text, sources if sources else None, trace.to_metadata(), status="cancelled")
+        raise
+    except Exception as e:
+        error_msg = f"처리 중 오류가 발생했습니다: {str(e)}"
+        session.publish({'type': 'error', 'content': error_msg})
+    finally:
+        if slot is not None:
+            slot.release()
+        if profiler is not None:
+            await asyncio.to_thread(profiler.stop)
+
+
+async def _follow_chat_stream(session: StreamSession, leader: StreamSession, request: ChatRequest) -> None:
+    """
+    같은 첫 질문을 생성 중인 세션(leader)의 토큰을 받아 이 세션에 기록합니다.
+    
+    대화 생성, start 이벤트, 메시지 저장은 이 요청의 대화 기준으로 따로 수행하고
+    답변 토큰과 출처만 leader에서 가져옵니다.
+    """
+    import asyncio
+    trace = start_trace("chat_stream")
+    trace.record_cache("single_flight_answer", True)
+    checkpointer = None
+    tracker = StreamDeltaTracker()
+    sources = None
+    try:
+        with trace_span("create_conversation"):
+            conversation_id = await asyncio.to_thread(conversation_service.create_conversation)
+        session.publish({'type': 'start', 'conversation_id': conversation_id, 'stream_id': session.id})
+        
+        async def save_user_message():
+            try:
+                with trace_span("persist_user"):
                     await asyncio.to_thread(
                         conversation_service.append_message,
                         conversation_id=conversation_id,
-                        role="assistant",
-                        content=accumulated_text,
-                        sources=sources if sources else None
+                        role="user",
+                        content=request.message
                     )
-                except Exception as e:
-                    print(f"AI 메시지 저장 오류: {e}")
-            
-        except Exception as e:
-            error_msg = f"처리 중 오류가 발생했습니다: {str(e)}"
-            yield f"data: {json.dumps({'type': 'error', 'content': error_msg}, ensure_ascii=False)}\n\n"
+            except Exception as e:
+                print(f"사용자 메시지 저장 오류: {e}")
+        
+        save_task = asyncio.create_task(save_user_message())
+        checkpointer = AnswerCheckpointer(conversation_service, conversation_id, session.id, save_task)
+        
+        done = False
+        async for payload in stream_session_registry.follow(leader):
+            event_type = payload.get("type")
+            if event_type == "token":
+                new_text = tracker.add_chunk(leader.id, payload.get("content", ""))
+                if new_text:
+                    trace.mark_first_token()
+                    session.publish({'type': 'token', 'content': new_text})
+                    if checkpointer.due():
+                        checkpointer.checkpoint(tracker.text)
+            elif event_type == "done":
+                sources = payload.get("sources")
+                done = True
+            elif event_type == "error":
+                session.publish(payload)
+                return
+        
+        await save_task
+        if not done:
+            session.publish({'type': 'error', 'content': "처리 중 오류가 발생했습니다: 답변 생성이 중단되었습니다."})
+            return
+        session.publish({'type': 'done', 'sources': sources})
+        
+        trace.set_route("coalesced")
+        trace.finish()
+        # 저장 시간은 /metrics(stage="persist_assistant")에만 기록
+        with trace_span("persist_assistant"):
+            await checkpointer.finalize(tracker.text, sources, {**trace.to_metadata(), "coalesced_from": leader.id})
     
-    return StreamingResponse(
-        generate(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no"  # Nginx 버퍼링 비활성화
-        }
-    )
+    except asyncio.CancelledError:
+        trace.finish()
+        if checkpointer is not None:
+            await checkpointer.finalize(tracker.text, sources, {**trace.to_metadata(), "coalesced_from": leader.id}, status="cancelled")
+        raise
+    except Exception as e:
+        session.publish({'type': 'error', 'content': f"처리 중 오류가 발생했습니다: {str(e)}"})
 
 
 @router.get("/conversations")
-async def get_conversations(limit: int = 50):
-    """대화 목록 조회 (각 대화의 첫 번째 사용자 메시지 포함)"""
+async def get_conversations(request: Request, limit: int = 50):
+    """
+    대화 목록 조회 (각 대화의 첫 번째 사용자 메시지 포함)
+    
+    목록 버전(가장 최근 updated_at, 대화 수)이 요청의 ETag와 같으면 목록을 조회하지 않고 304로 응답합니다.
+    """
     import asyncio
     try:
+        version = await asyncio.to_thread(conversation_service.get_conversations_version)
+        etag = http_cache.make_etag("conversations", version, limit)
+        headers = http_cache.cache_headers(etag)
+        if http_cache.is_not_modified(request, etag):
+            return http_cache.not_modified_response(headers)
+        
         conversations = await asyncio.to_thread(
             conversation_service.get_user_conversations,
             user_id=None,  # 향후 인증 추가 시 수정
@@ -341,7 +698,7 @@ async def get_conversations(limit: int = 50):
                     content = first_msg.get("content", "")
                     conv["first_message"] = content[:50] + ("..." if len(content) > 50 else "")
         
-        return {"conversations": conversations}
+        return http_cache.json_response({"conversations": conversations}, headers)
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -350,15 +707,69 @@ async def get_conversations(limit: int = 50):
 
 
 @router.get("/conversations/{conversation_id}/messages")
-async def get_conversation_messages(conversation_id: str):
-    """특정 대화의 메시지 조회"""
+async def get_conversation_messages(conversation_id: str, request: Request):
+    """
+    특정 대화의 메시지 조회
+    
+    ETag는 대화의 updated_at과 마지막 메시지 id로 만들며, 바뀌지 않았으면 메시지를 조회하지 않고 304로 응답합니다.
+    """
     import asyncio
     try:
+        version = await asyncio.to_thread(conversation_service.get_conversation_version, conversation_id)
+        headers = {}
+        if version is not None:
+            etag = http_cache.make_etag("messages", conversation_id, version)
+            last_modified = http_cache.parse_timestamp(version.get("updated_at"))
+            headers = http_cache.cache_headers(etag, last_modified)
+            if http_cache.is_not_modified(request, etag, last_modified):
+                return http_cache.not_modified_response(headers)
+        
         messages = await asyncio.to_thread(
             conversation_service.get_conversation_messages,
             conversation_id
         )
-        return {"messages": messages}
+        # 위치만 저장된 출처에 구절 본문 채우기
+        messages = await asyncio.to_thread(source_refs.hydrate_messages, messages)
+        if version is not None and not source_refs.is_hydrated(messages):
+            # 본문 조회에 실패한 응답은 다음 요청에서 304로 굳지 않도록 다른 ETag로
+            headers = http_cache.cache_headers(http_cache.make_etag("messages", conversation_id, version, "unhydrated"))
+        return http_cache.json_response({"messages": messages}, headers)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"메시지 조회 중 오류가 발생했습니다: {str(e)}"
+        )
+
+
+@router.get("/conversations/{conversation_id}/messages/{message_id}")
+async def get_conversation_message(conversation_id: str, message_id: str, request: Request):
+    """
+    메시지 하나 조회
+    
+    완료된 메시지는 바뀌지 않으므로 immutable로 캐시하게 하고, 스트리밍 중인 메시지만 매번 다시 검증합니다.
+    출처 본문 조회에 실패한 응답은 immutable로 캐시하지 않고 다른 ETag로 다시 검증하게 합니다.
+    """
+    import asyncio
+    try:
+        message = await asyncio.to_thread(conversation_service.get_message, conversation_id, message_id)
+        if message is None:
+            raise HTTPException(status_code=404, detail="메시지를 찾을 수 없습니다.")
+        
+        streaming = (message.get("metadata") or {}).get("status") == "streaming"
+        etag = http_cache.make_etag("message", message_id, message.get("content") if streaming else None)
+        headers = http_cache.cache_headers(
+            etag,
+            http_cache.parse_timestamp(message.get("created_at")) if not streaming else None,
+            http_cache.CACHE_REVALIDATE if streaming else http_cache.CACHE_IMMUTABLE
+        )
+        if http_cache.is_not_modified(request, etag):
+            return http_cache.not_modified_response(headers)
+        await asyncio.to_thread(source_refs.hydrate_messages, [message])
+        if not source_refs.is_hydrated([message]):
+            headers = http_cache.cache_headers(http_cache.make_etag("message", message_id, None, "unhydrated"))
+        return http_cache.json_response({"message": message}, headers)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
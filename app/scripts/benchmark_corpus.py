@@ -0,0 +1,136 @@
+"""벤치마크용 한국어 질의 코퍼스 및 대용량 도구 출력 생성기
+
+실제 서비스에서 자주 들어오는 형태의 질문과, 전체 책 조회 수준의
+대용량 검색 결과를 재현합니다. 네트워크나 DB 없이 결정적으로 생성됩니다.
+"""
+import random
+from typing import List, Dict
+
+
+# 실제 사용자 질문 형태를 반영한 질의 (직접 참조 / 전체 책 / 주제 질문 혼합)
+KOREAN_QUERIES: List[str] = [
+    "창세기 1장 1절",
+    "요한복음 3:16",
+    "요한복음 3장 16절 말씀 설명해줘",
+    "마태복음 5장 3절",
+    "마태복음 5장 팔복에 대해 알려줘",
+    "역대상 1장 요약해줘",
+    "역대상 전체 요약해줘",
+    "역대상 요약",
+    "시편 23편 의미가 뭐야?",
+    "시편 23장 1절",
+    "로마서 8:28",
+    "고린도전서 13장 사랑장 설명",
+    "빌립보서 4:13 말씀의 배경",
+    "이사야 53장 고난받는 종",
+    "요한계시록 전체를 요약해줘",
+    "데살로니가전서 5장 16절부터 18절까지",
+    "예레미야애가 3장 22절",
+    "사무엘상 17장 다윗과 골리앗 이야기",
+    "아브라함은 몇 살에 이삭을 얻었나요?",
+    "모세가 출애굽 할 때 나이는?",
+    "예수님의 산상수훈 핵심 내용 정리해줘",
+    "사랑에 관한 성경 구절 추천해줘",
+    "용서에 대해 성경은 뭐라고 말하나요?",
+    "바울의 회심 사건은 어디에 나오나요?",
+    "노아의 방주 크기는 얼마였나요?",
+    "룻기의 주요 인물과 줄거리",
+    "욥기에서 고난의 의미는?",
+    "잠언 3장 5절 6절 말씀",
+    "에베소서 6장 전신갑주",
+    "히브리서 11장 믿음의 조상들",
+]
+
+# 개역한글판 본문 일부 (공공 영역, 대용량 출력 합성용)
+SAMPLE_VERSES: List[str] = [
+    "태초에 하나님이 천지를 창조하시니라",
+    "땅이 혼돈하고 공허하며 흑암이 깊음 위에 있고 하나님의 신은 수면에 운행하시니라",
+    "하나님이 가라사대 빛이 있으라 하시매 빛이 있었고",
+    "빛이 하나님의 보시기에 좋았더라 하나님이 빛과 어두움을 나누사",
+    "하나님이 세상을 이처럼 사랑하사 독생자를 주셨으니 이는 저를 믿는 자마다 멸망치 않고 영생을 얻게 하려 하심이니라",
+    "심령이 가난한 자는 복이 있나니 천국이 저희 것임이요",
+    "애통하는 자는 복이 있나니 저희가 위로를 받을 것임이요",
+    "여호와는 나의 목자시니 내가 부족함이 없으리로다",
+    "그가 나를 푸른 초장에 누이시며 쉴만한 물가으로 인도하시는도다",
+    "우리가 알거니와 하나님을 사랑하는 자 곧 그 뜻대로 부르심을 입은 자들에게는 모든 것이 합력하여 선을 이루느니라",
+]
+
+
+def build_chapter_content(chapter: int, verses_per_chapter: int, rng: random.Random) -> str:
+    """ingest_bible.py와 같은 "절번호:본문" 형식의 장 본문을 생성합니다."""
+    verse_texts = [
+        f"{verse}:{rng.choice(SAMPLE_VERSES)}"
+        for verse in range(1, verses_per_chapter + 1)
+    ]
+    return " ".join(verse_texts)
+
+
+def build_book_docs(
+    book: str = "시편",
+    chapters: int = 150,
+    verses_per_chapter: int = 17,
+    chunk_size: int = 500,
+    seed: int = 42
+) -> List[Dict]:
+    """
+    전체 책 조회(bible_chunks 최대 1000행) 수준의 DB 행 목록을 생성합니다.
+
+    Returns:
+        bible_chunks 행과 같은 형태의 딕셔너리 리스트
+    """
+    rng = random.Random(seed)
+    docs = []
+    for chapter in range(1, chapters + 1):
+        content = build_chapter_content(chapter, verses_per_chapter, rng)
+        for start in range(0, len(content), chunk_size):
+            docs.append({
+                "book": book,
+                "chapter": str(chapter),
+                "verse": "",
+                "content": content[start:start + chunk_size],
+                "similarity": rng.uniform(0.5, 0.95),
+            })
+    return docs[:1000]
+
+
+def build_similarity_docs(count: int = 100, seed: int = 7) -> List[Dict]:
+    """벡터 검색(match_documents) 결과 형태의 행 목록을 생성합니다."""
+    from app.langgraph.graph import KOREAN_BOOK_NAMES
+
+    rng = random.Random(seed)
+    docs = []
+    for _ in range(count):
+        chapter = rng.randint(1, 50)
+        docs.append({
+            "book": rng.choice(KOREAN_BOOK_NAMES),
+            "chapter": str(chapter),
+            "verse": str(rng.randint(1, 30)),
+            "content": build_chapter_content(chapter, 8, rng)[:500],
+            "similarity": rng.uniform(0.5, 0.95),
+        })
+    return docs
+
+
+def build_answer_text(target_chars: int = 6000, seed: int = 3) -> str:
+    """구조화된 한국어 장문 답변(요약, 소제목, 목록)을 생성합니다."""
+    rng = random.Random(seed)
+    parts = ["## 요약\n"]
+    section = 1
+    while sum(len(p) for p in parts) < target_chars:
+        parts.append(f"\n### {section}. 소제목\n")
+        for item in range(1, 4):
+            parts.append(f"- {item}) {rng.choice(SAMPLE_VERSES)} (시편 {section}:{item})\n")
+        section += 1
+    return "".join(parts)[:target_chars]
+
+
+def split_into_tokens(text: str, seed: int = 11) -> List[str]:
+    """Gemini 스트리밍과 비슷하게 2~12자 크기의 토큰 조각으로 나눕니다."""
+    rng = random.Random(seed)
+    tokens = []
+    i = 0
+    while i < len(text):
+        size = rng.randint(2, 12)
+        tokens.append(text[i:i + size])
+        i += size
+    return tokens
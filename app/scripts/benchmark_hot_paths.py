@@ -0,0 +1,243 @@
+"""요청마다 실행되는 순수 파이썬 핫패스 마이크로벤치마크
+
+대상:
+- parse_bible_reference / improve_query_for_search (질의 파싱)
+- _search_bible_impl의 결과 포맷팅 루프 (전체 책 / 장 / 벡터 검색)
+- chat 라우터의 정규식 출처 추출과 스트리밍 델타 계산 / SSE 프레임 병합
+
+사용법:
+    python -m app.scripts.benchmark_hot_paths
+    python -m app.scripts.benchmark_hot_paths --save-baseline
+    python -m app.scripts.benchmark_hot_paths --compare
+
+네트워크나 DB를 사용하지 않으므로 필수 환경변수가 없으면 더미 값으로 채웁니다.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+# 설정 로딩에 필요한 값 (벤치마크는 외부 서비스에 연결하지 않음)
+for _key in ("SUPABASE_URL", "SUPABASE_KEY", "GOOGLE_API_KEY"):
+    os.environ.setdefault(_key, "http://localhost" if _key == "SUPABASE_URL" else "benchmark")
+
+from langchain_core.messages import AIMessageChunk  # noqa: E402
+
+from app.langgraph.graph import (  # noqa: E402
+    parse_bible_reference,
+    improve_query_for_search,
+    format_book_results,
+    format_chapter_results,
+    format_similarity_results,
+)
+from app.routers.chat import extract_sources  # noqa: E402
+from app.services.streaming import (  # noqa: E402
+    StreamDeltaTracker,
+    SSEFrameCoalescer,
+    chunk_text,
+    sse_frame,
+)
+from app.scripts.benchmark_corpus import (  # noqa: E402
+    KOREAN_QUERIES,
+    build_book_docs,
+    build_similarity_docs,
+    build_answer_text,
+    split_into_tokens,
+)
+
+DEFAULT_BASELINE = Path(".benchmarks/hot_paths_baseline.json")
+
+# 기준선 대비 이 비율 이상 느려지면 회귀로 표시
+REGRESSION_THRESHOLD = 0.10
+
+
+def _parse_queries():
+    for query in KOREAN_QUERIES:
+        book, chapter, verse, _ = parse_bible_reference(query)
+        improve_query_for_search(query, book, chapter, verse)
+
+
+def build_cases() -> Dict[str, Callable[[], object]]:
+    """벤치마크 케이스 목록을 생성합니다 (입력 데이터는 미리 만들어 둠)."""
+    book_docs = build_book_docs()
+    chapter_docs = book_docs[:5]
+    similarity_docs = build_similarity_docs(100)
+    full_book_output = format_book_results("시편", book_docs)
+    similarity_output = format_similarity_results(similarity_docs)
+
+    answer = build_answer_text()
+    tokens = split_into_tokens(answer)
+    message_id = "lc_run--benchmark"
+    delta_chunks = [AIMessageChunk(content=token, id=message_id) for token in tokens]
+
+    def stream_deltas():
+        # 청크별 오프셋 추적 + 프레임 병합 (라우터의 스트리밍 루프와 동일한 경로)
+        tracker = StreamDeltaTracker()
+        coalescer = SSEFrameCoalescer(max_delay=3600)
+        frames = []
+        for chunk in delta_chunks:
+            frame = coalescer.push(tracker.add_chunk(chunk.id, chunk_text(chunk.content)))
+            if frame:
+                frames.append(frame)
+        frames.append(coalescer.flush())
+        return tracker.text
+
+    def final_message():
+        # 스트리밍 청크 이후 완성 메시지가 다시 도착하는 경우 (추가 전송 없음)
+        tracker = StreamDeltaTracker()
+        for chunk in delta_chunks:
+            tracker.add_chunk(chunk.id, chunk.content)
+        return tracker.complete(message_id, answer)
+
+    def per_token_frames():
+        # 병합 없이 토큰마다 프레임을 만드는 경우 (비교용)
+        return [sse_frame({"type": "token", "content": token}) for token in tokens]
+
+    return {
+        "parse_reference[30 queries]": _parse_queries,
+        "format_book_results[1000 chunks]": lambda: format_book_results("시편", book_docs),
+        "format_chapter_results[5 chunks]": lambda: format_chapter_results("시편", "23", chapter_docs),
+        "format_similarity_results[100 docs]": lambda: format_similarity_results(similarity_docs),
+        "extract_sources[full book output]": lambda: extract_sources(full_book_output, []),
+        "extract_sources[similarity output]": lambda: extract_sources(similarity_output, []),
+        f"token_deltas[delta x{len(delta_chunks)}]": stream_deltas,
+        "token_deltas[final message]": final_message,
+        f"sse_frames[per token x{len(tokens)}]": per_token_frames,
+    }
+
+
+def _calibrate(func: Callable[[], object], min_time: float) -> int:
+    """한 라운드가 min_time 이상 걸리도록 반복 횟수를 정합니다."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - start >= min_time:
+            return number
+        number *= 2
+
+
+def measure(func: Callable[[], object], rounds: int, min_time: float) -> Dict[str, float]:
+    """
+    실행 시간과 메모리 할당량을 측정합니다.
+
+    시간은 GC를 끈 상태에서 여러 라운드를 돌려 중앙값을 사용하고,
+    메모리는 tracemalloc으로 1회 실행의 피크와 할당 블록 수를 기록합니다.
+    """
+    func()  # 워밍업
+    number = _calibrate(func, min_time)
+
+    samples: List[float] = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            start = time.perf_counter_ns()
+            for _ in range(number):
+                func()
+            samples.append((time.perf_counter_ns() - start) / number)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    func()
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    alloc_blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+
+    samples.sort()
+    return {
+        "median_us": statistics.median(samples) / 1000,
+        "min_us": samples[0] / 1000,
+        "p90_us": samples[int(len(samples) * 0.9) - 1] / 1000 if len(samples) >= 10 else samples[-1] / 1000,
+        "stdev_pct": (statistics.stdev(samples) / statistics.mean(samples) * 100) if len(samples) > 1 else 0.0,
+        "peak_kib": peak / 1024,
+        "alloc_blocks": alloc_blocks,
+        "loops": number,
+    }
+
+
+def run(rounds: int, min_time: float, only: str | None) -> Dict[str, Dict[str, float]]:
+    """모든 케이스를 측정하여 결과를 반환합니다."""
+    results = {}
+    for name, func in build_cases().items():
+        if only and only not in name:
+            continue
+        results[name] = measure(func, rounds, min_time)
+        stats = results[name]
+        print(
+            f"{name:<42} {stats['median_us']:>11.1f} us  "
+            f"(min {stats['min_us']:.1f}, ±{stats['stdev_pct']:.1f}%)  "
+            f"peak {stats['peak_kib']:>8.1f} KiB  blocks {stats['alloc_blocks']}"
+        )
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline_path: Path) -> bool:
+    """저장된 기준선과 비교하여 회귀가 있으면 False를 반환합니다."""
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    base_results = baseline.get("results", {})
+    ok = True
+    print(f"\n기준선 비교: {baseline_path} ({baseline.get('created_at', '?')})")
+    for name, stats in results.items():
+        base = base_results.get(name)
+        if not base:
+            print(f"{name:<42} (기준선 없음)")
+            continue
+        change = stats["median_us"] / base["median_us"] - 1
+        mem_change = (stats["peak_kib"] / base["peak_kib"] - 1) if base["peak_kib"] else 0.0
+        marker = ""
+        if change > REGRESSION_THRESHOLD:
+            marker = "  <-- 회귀"
+            ok = False
+        elif change < -REGRESSION_THRESHOLD:
+            marker = "  개선"
+        print(f"{name:<42} 시간 {change:+7.1%}  메모리 {mem_change:+7.1%}{marker}")
+    return ok
+
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description="핫패스 마이크로벤치마크")
+    parser.add_argument("--rounds", type=int, default=15, help="측정 라운드 수")
+    parser.add_argument("--min-time", type=float, default=0.05, help="라운드당 최소 측정 시간(초)")
+    parser.add_argument("--only", help="이름에 이 문자열이 포함된 케이스만 실행")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="기준선 JSON 경로")
+    parser.add_argument("--save-baseline", action="store_true", help="결과를 기준선으로 저장")
+    parser.add_argument("--compare", action="store_true", help="저장된 기준선과 비교")
+    args = parser.parse_args()
+
+    results = run(args.rounds, args.min_time, args.only)
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps({
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "results": results,
+        }, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\n기준선 저장: {args.baseline}")
+
+    if args.compare:
+        if not args.baseline.exists():
+            print(f"오류: 기준선 파일이 없습니다: {args.baseline}")
+            sys.exit(2)
+        if not compare(results, args.baseline):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""벡터 인덱스 설정별 재현율(recall@k)과 지연 시간 측정
+
+각 질의에 대해 정확 검색(match_documents_filtered를 필터 없이 호출하면 인덱스를 쓰지 않고
+전체 행의 거리를 계산함)의 상위 k개를 기준으로, 다음 검색이 기준 결과를 얼마나 찾는지와
+호출 시간을 잽니다.
+
+- 단일 단계: match_documents를 ef_search(HNSW) 또는 probes(IVFFlat) 값을 바꿔 가며 호출
+- coarse-to-fine: match_documents_coarse를 1단계 후보 수를 바꿔 가며 호출
+- 장 라우팅: match_documents_routed를 1단계에서 고를 장 수를 바꿔 가며 호출
+
+인덱스 종류(HNSW / IVFFlat)나 빌드 옵션(m, ef_construction, lists)을 비교하려면
+supabase_setup.sql의 인덱스 부분으로 인덱스를 다시 만든 뒤 스크립트를 다시 실행하세요.
+DB에 없는 인덱스의 검색 옵션은 결과에 영향을 주지 않습니다.
+
+사용법:
+    python -m app.scripts.benchmark_vector_search
+    python -m app.scripts.benchmark_vector_search --k 10 --ef-search 20,40,80,160 --probes 1,5,10
+    python -m app.scripts.benchmark_vector_search --candidates 25,50,100,200
+    python -m app.scripts.benchmark_vector_search --chapters 2,4,8,16
+    python -m app.scripts.benchmark_vector_search --output .benchmarks/vector_search.json
+
+실제 Supabase와 Gemini 임베딩 API를 사용하므로 .env 설정이 필요합니다.
+"""
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from app.config import settings
+from app.services.providers import get_query_embeddings, get_supabase
+from app.services.vector_search import truncate_embedding
+from app.scripts.benchmark_corpus import KOREAN_QUERIES
+
+
+def _parse_values(text: str) -> List[int]:
+    return [int(value) for value in text.split(",") if value.strip()]
+
+
+def embed_queries(queries: List[str]) -> List[List[float]]:
+    """질의 임베딩 (한 번의 배치 호출)"""
+    return get_query_embeddings().embed_documents(
+        queries,
+        task_type="RETRIEVAL_QUERY",
+        output_dimensionality=settings.embedding_dimension
+    )
+
+
+def exact_search(embedding: List[float], k: int) -> Tuple[Set[int], float]:
+    """인덱스를 쓰지 않는 정확 검색 (기준 결과, 소요 시간)"""
+    started_at = time.perf_counter()
+    response = get_supabase().rpc(
+        'match_documents_filtered',
+        {'query_embedding': embedding, 'match_threshold': -1.0, 'match_count': k}
+    ).execute()
+    elapsed = time.perf_counter() - started_at
+    return {row['id'] for row in response.data or []}, elapsed
+
+
+def index_search(embedding: List[float], k: int, ef_search: Optional[int], probes: Optional[int]) -> Tuple[Set[int], float]:
+    """단일 단계 인덱스 검색 (결과, 소요 시간)"""
+    params = {'query_embedding': embedding, 'match_threshold': -1.0, 'match_count': k}
+    if ef_search:
+        params['ef_search'] = ef_search
+    if probes:
+        params['probes'] = probes
+    started_at = time.perf_counter()
+    response = get_supabase().rpc('match_documents', params).execute()
+    elapsed = time.perf_counter() - started_at
+    return {row['id'] for row in response.data or []}, elapsed
+
+
+def coarse_search(embedding: List[float], k: int, candidates: int) -> Tuple[Set[int], float]:
+    """coarse-to-fine 검색 (결과, 소요 시간)"""
+    params = {
+        'query_embedding': embedding,
+        'coarse_embedding': truncate_embedding(embedding, settings.coarse_embedding_dimension),
+        'match_threshold': -1.0,
+        'match_count': k,
+        'candidate_count': candidates
+    }
+    started_at = time.perf_counter()
+    response = get_supabase().rpc('match_documents_coarse', params).execute()
+    elapsed = time.perf_counter() - started_at
+    return {row['id'] for row in response.data or []}, elapsed
+
+
+def routed_search(embedding: List[float], k: int, chapters: int) -> Tuple[Set[int], float]:
+    """장 라우팅 검색 (결과, 소요 시간)"""
+    params = {
+        'query_embedding': embedding,
+        'match_threshold': -1.0,
+        'match_count': k,
+        'chapter_count': chapters
+    }
+    started_at = time.perf_counter()
+    response = get_supabase().rpc('match_documents_routed', params).execute()
+    elapsed = time.perf_counter() - started_at
+    return {row['id'] for row in response.data or []}, elapsed
+
+
+def summarize(name: str, recalls: List[float], latencies: List[float]) -> Dict:
+    """설정 하나의 결과 요약"""
+    ordered = sorted(latencies)
+    return {
+        "config": name,
+        "recall": statistics.mean(recalls) if recalls else None,
+        "p50_ms": statistics.median(ordered) * 1000,
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+    }
+
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description="벡터 인덱스 재현율/지연 시간 측정")
+    parser.add_argument("--k", type=int, default=5, help="recall@k의 k (검색 결과 수)")
+    parser.add_argument("--queries", type=int, default=len(KOREAN_QUERIES), help="사용할 질의 수")
+    parser.add_argument("--ef-search", default="20,40,80,160", help="HNSW ef_search 후보 (쉼표 구분)")
+    parser.add_argument("--probes", default="1,5,10,20", help="IVFFlat probes 후보 (쉼표 구분)")
+    parser.add_argument("--candidates", default="50,100,200", help="coarse-to-fine 1단계 후보 수 (쉼표 구분)")
+    parser.add_argument("--skip-coarse", action="store_true", help="coarse-to-fine 측정 생략 (match_documents_coarse가 없는 DB)")
+    parser.add_argument("--chapters", default="4,8,16", help="장 라우팅 1단계에서 고를 장 수 (쉼표 구분)")
+    parser.add_argument("--skip-routed", action="store_true", help="장 라우팅 측정 생략 (match_documents_routed가 없는 DB)")
+    parser.add_argument("--repeat", type=int, default=1, help="질의별 반복 횟수 (지연 시간 측정용)")
+    parser.add_argument("--output", help="결과를 저장할 JSON 경로")
+    args = parser.parse_args()
+
+    queries = KOREAN_QUERIES[:args.queries]
+    print(f"질의 {len(queries)}개 임베딩 중...")
+    embeddings = embed_queries(queries)
+
+    # 기준 결과 (정확 검색)
+    truth: List[Set[int]] = []
+    exact_latencies: List[float] = []
+    for embedding in embeddings:
+        for _ in range(args.repeat):
+            ids, elapsed = exact_search(embedding, args.k)
+            exact_latencies.append(elapsed)
+        truth.append(ids)
+    results = [summarize("exact (인덱스 미사용)", [], exact_latencies)]
+
+    configs: List[Tuple[str, Callable[[List[float]], Tuple[Set[int], float]]]] = [
+        ("DB 기본값", lambda embedding: index_search(embedding, args.k, None, None))
+    ]
+    configs += [
+        (f"ef_search={value}", lambda embedding, value=value: index_search(embedding, args.k, value, None))
+        for value in _parse_values(args.ef_search)
+    ]
+    configs += [
+        (f"probes={value}", lambda embedding, value=value: index_search(embedding, args.k, None, value))
+        for value in _parse_values(args.probes)
+    ]
+    if not args.skip_coarse:
+        configs += [
+            (f"coarse{settings.coarse_embedding_dimension} candidates={value}", lambda embedding, value=value: coarse_search(embedding, args.k, value))
+            for value in _parse_values(args.candidates)
+        ]
+    if not args.skip_routed:
+        configs += [
+            (f"routed chapters={value}", lambda embedding, value=value: routed_search(embedding, args.k, value))
+            for value in _parse_values(args.chapters)
+        ]
+    for name, search in configs:
+        recalls: List[float] = []
+        latencies: List[float] = []
+        for embedding, expected in zip(embeddings, truth):
+            for _ in range(args.repeat):
+                ids, elapsed = search(embedding)
+                latencies.append(elapsed)
+            if expected:
+                recalls.append(len(ids & expected) / len(expected))
+        results.append(summarize(name, recalls, latencies))
+
+    print(f"\n{'설정':<24} {f'recall@{args.k}':>10} {'p50(ms)':>10} {'p95(ms)':>10}")
+    for row in results:
+        recall = f"{row['recall']:.3f}" if row["recall"] is not None else "1.000"
+        print(f"{row['config']:<24} {recall:>10} {row['p50_ms']:>10.1f} {row['p95_ms']:>10.1f}")
+
+    if args.output:
+        path = Path(args.output)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"k": args.k, "queries": len(queries), "results": results}, ensure_ascii=False, indent=2))
+        print(f"\n저장: {path}")
+
+
+if __name__ == "__main__":
+    main()
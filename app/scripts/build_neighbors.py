@@ -0,0 +1,69 @@
+"""관련 구절 이웃 테이블(bible_chunk_neighbors) 계산
+
+청크마다 다른 장에서 의미가 가장 가까운 청크 몇 개를 이미 저장된 임베딩으로 찾아 저장합니다.
+검색 결과에 관련 구절을 붙일 때 이 테이블만 조회하므로, 에이전트가 교차 참조를 찾으려고
+추가 검색(쿼리 임베딩 + 벡터 검색)을 하지 않아도 됩니다.
+
+계산은 DB의 build_chunk_neighbors 함수가 하며(HNSW 인덱스 사용), 이 스크립트는 요청 시간
+제한에 걸리지 않도록 id 범위를 나눠 호출합니다. 임베딩 API는 호출하지 않습니다.
+청크를 다시 적재했거나 임베딩 모델/차원을 바꾼 뒤에는 다시 실행하세요.
+
+사용법:
+    python -m app.scripts.build_neighbors
+    python -m app.scripts.build_neighbors --neighbors 5 --batch-size 200
+    python -m app.scripts.build_neighbors --start-id 15000  # 중단된 곳부터 이어서
+
+supabase_chunk_neighbors.sql(또는 supabase_setup.sql)을 먼저 실행해야 합니다.
+"""
+import argparse
+import time
+from typing import Optional
+
+from app.services.providers import get_supabase
+
+
+def _edge_id(descending: bool) -> Optional[int]:
+    """bible_chunks의 가장 작은(또는 큰) id"""
+    response = get_supabase().table("bible_chunks").select("id").order("id", desc=descending).limit(1).execute()
+    return response.data[0]["id"] if response.data else None
+
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description="관련 구절 이웃 테이블 계산")
+    parser.add_argument("--neighbors", type=int, default=5, help="청크마다 저장할 이웃 수")
+    parser.add_argument("--batch-size", type=int, default=200, help="DB 함수 호출 1회에 처리할 id 범위")
+    parser.add_argument("--start-id", type=int, help="이 id부터 계산 (기본: 가장 작은 id)")
+    args = parser.parse_args()
+
+    first_id = args.start_id if args.start_id is not None else _edge_id(descending=False)
+    last_id = _edge_id(descending=True)
+    if first_id is None or last_id is None:
+        print("bible_chunks가 비어 있습니다. 먼저 ingest_bible을 실행하세요.")
+        return
+
+    print(f"청크 id {first_id}~{last_id}의 이웃 {args.neighbors}개씩 계산합니다...")
+    started_at = time.perf_counter()
+    stored = 0
+    for from_id in range(first_id, last_id + 1, args.batch_size):
+        to_id = min(from_id + args.batch_size - 1, last_id)
+        try:
+            response = get_supabase().rpc("build_chunk_neighbors", {
+                "from_id": from_id,
+                "to_id": to_id,
+                "neighbor_count": args.neighbors
+            }).execute()
+        except Exception as e:
+            print(f"이웃 계산 오류 (id {from_id}~{to_id}): {str(e)}")
+            print(f"--start-id {from_id}로 이어서 실행할 수 있습니다.")
+            return
+        stored += response.data or 0
+        done = to_id - first_id + 1
+        total = last_id - first_id + 1
+        print(f"진행률: id {to_id}까지 ({done * 100 // total}%), 저장 {stored}행")
+
+    print(f"\n완료: {stored}행, {time.perf_counter() - started_at:.1f}초")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""이전 형식으로 저장된 메시지 출처를 위치만 남기는 형식으로 변환
+
+예전 어시스턴트 메시지의 sources에는 구절 본문 미리보기(최대 200자)가 함께 들어 있습니다.
+책 이름을 알 수 있는 출처는 (번역본, 책 번호, 장, 절 범위)만 남기고, 본문은 조회 API가
+bible_chunks에서 다시 채웁니다 (app/services/source_refs.py 참고). 절 범위는 저장된 미리보기의
+"절:내용" 표시에서 읽습니다.
+
+사용법:
+    python -m app.scripts.compact_message_sources --dry-run
+    python -m app.scripts.compact_message_sources --batch-size 500
+"""
+import argparse
+import json
+
+from app.services.providers import get_supabase
+from app.services.source_refs import compact_sources, describe_source
+
+
+def convert(sources: list) -> list:
+    """이전 형식 출처 목록 → 압축 형식 (변환할 수 없는 출처는 그대로)"""
+    converted = []
+    for source in sources:
+        if isinstance(source, dict) and "content" in source and "book_no" not in source:
+            source = describe_source(
+                source.get("book", ""),
+                source.get("chapter") or None,
+                source.get("verse") or None,
+                source.get("content") or ""
+            )
+        converted.append(source)
+    return compact_sources(converted)
+
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description="메시지 출처 압축 변환")
+    parser.add_argument("--batch-size", type=int, default=500, help="한 번에 읽을 메시지 수")
+    parser.add_argument("--dry-run", action="store_true", help="변환 결과 크기만 계산하고 저장하지 않음")
+    args = parser.parse_args()
+
+    offset = 0
+    scanned = updated = before_bytes = after_bytes = 0
+    while True:
+        response = get_supabase().table("messages").select("id, sources").eq(
+            "role", "assistant"
+        ).order("created_at").range(offset, offset + args.batch_size - 1).execute()
+        rows = response.data or []
+        if not rows:
+            break
+        for row in rows:
+            sources = row.get("sources")
+            if not isinstance(sources, list) or not sources:
+                continue
+            compacted = convert(sources)
+            if compacted == sources:
+                continue
+            before_bytes += len(json.dumps(sources, ensure_ascii=False).encode("utf-8"))
+            after_bytes += len(json.dumps(compacted, ensure_ascii=False).encode("utf-8"))
+            updated += 1
+            if not args.dry_run:
+                get_supabase().table("messages").update({"sources": compacted}).eq("id", row["id"]).execute()
+        scanned += len(rows)
+        offset += args.batch_size
+        print(f"진행: 메시지 {scanned}개 확인, {updated}개 변환")
+
+    action = "변환 대상" if args.dry_run else "변환"
+    print(f"\n{action}: {updated}개, 출처 크기 {before_bytes / 1024:.0f}KB → {after_bytes / 1024:.0f}KB")
+
+
+if __name__ == "__main__":
+    main()
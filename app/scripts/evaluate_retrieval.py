@@ -0,0 +1,277 @@
+"""검색 품질 대비 지연 시간/컨텍스트 비용 평가
+
+기준 질문 세트(retrieval_gold_set)로 검색 설정(검색 방식 x 최소 유사도 x 결과 수)마다
+다음을 측정하고, 품질을 유지하면서 컨텍스트가 가장 작은 설정을 찾습니다.
+
+- recall@k: 질문별 정답 참조 중 결과에 들어 있는 비율의 평균
+- MRR: 첫 정답 결과 순위의 역수 평균 (정답이 없으면 0)
+- 지연 시간: 검색 RPC 호출 p50/p95 (임베딩은 모든 설정이 같으므로 제외)
+- 컨텍스트 비용: search_bible 도구 출력 형식으로 바꾼 결과의 글자 수와 프롬프트 토큰 수
+
+검색 결과는 거리순이고 최소 유사도는 정렬 뒤에 적용하므로, 검색 방식마다 가장 큰 결과 수와
+최소 유사도 -1로 한 번만 호출한 뒤 설정별 결과는 그 앞부분을 잘라 계산합니다.
+지연 시간은 검색 방식 단위로 보고합니다.
+
+청크 크기는 적재 시 정해지므로, 비교하려면 CHUNK_SIZE를 바꿔 다른 DB에 적재한 뒤
+--label을 붙여 각각 측정하고 --compare로 결과 파일을 합쳐 보세요.
+
+사용법:
+    python -m app.scripts.evaluate_retrieval
+    python -m app.scripts.evaluate_retrieval --modes plain,routed --thresholds 0.4,0.5,0.6 --limits 3,5
+    python -m app.scripts.evaluate_retrieval --label chunk500 --output .benchmarks/retrieval_chunk500.json
+    python -m app.scripts.evaluate_retrieval --compare .benchmarks/retrieval_chunk500.json .benchmarks/retrieval_chunk300.json --report .benchmarks/retrieval_report.md
+
+실제 Supabase와 Gemini API(임베딩, 토큰 수 계산)를 사용하므로 .env 설정이 필요합니다.
+"""
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.langgraph.graph import format_similarity_results
+from app.services import vector_search
+from app.services.providers import get_llm, get_supabase
+from app.services.source_refs import VERSE_MARKER_PATTERN
+from app.scripts.benchmark_vector_search import embed_queries
+from app.scripts.retrieval_gold_set import GOLD_SET, GOLD_SET_VERSION, Reference
+
+DEFAULT_OUTPUT = Path(".benchmarks/retrieval_eval.json")
+
+
+def _parse_values(text: str, cast: Callable = int) -> List:
+    return [cast(value) for value in text.split(",") if value.strip()]
+
+
+def exact_rows(embedding: List[float], count: int) -> Optional[List[Dict]]:
+    """인덱스를 쓰지 않는 정확 검색 (필터 없는 match_documents_filtered)"""
+    response = get_supabase().rpc(
+        'match_documents_filtered',
+        {'query_embedding': embedding, 'match_threshold': -1.0, 'match_count': count}
+    ).execute()
+    return response.data or []
+
+
+def plain_rows(embedding: List[float], count: int) -> Optional[List[Dict]]:
+    """단일 단계 인덱스 검색 (settings의 ef_search/probes 사용)"""
+    params = {'query_embedding': embedding, 'match_threshold': -1.0, 'match_count': count}
+    if settings.vector_ef_search:
+        params['ef_search'] = settings.vector_ef_search
+    if settings.vector_probes:
+        params['probes'] = settings.vector_probes
+    response = get_supabase().rpc('match_documents', params).execute()
+    return response.data or []
+
+
+SEARCH_MODES: Dict[str, Callable[[List[float], int], Optional[List[Dict]]]] = {
+    "exact": exact_rows,
+    "plain": plain_rows,
+    "coarse": lambda embedding, count: vector_search.match_documents_coarse(embedding, -1.0, count),
+    "routed": lambda embedding, count: vector_search.match_documents_routed(embedding, -1.0, count),
+}
+
+
+def is_relevant(row: Dict, reference: Reference) -> bool:
+    """검색 결과 청크가 정답 참조를 담고 있는지 (절이 None이면 장만 비교)"""
+    book, chapter, verse = reference
+    if row.get('book') != book or str(row.get('chapter')) != str(chapter):
+        return False
+    if verse is None:
+        return True
+    return str(verse) in VERSE_MARKER_PATTERN.findall(row.get('content', ''))
+
+
+def score(rows: List[Dict], references: List[Reference]) -> Tuple[float, float]:
+    """질문 하나의 (recall, reciprocal rank)"""
+    found = [reference for reference in references if any(is_relevant(row, reference) for row in rows)]
+    first_rank = next(
+        (rank for rank, row in enumerate(rows, 1) if any(is_relevant(row, reference) for reference in references)),
+        None
+    )
+    return len(found) / len(references), (1 / first_rank if first_rank else 0.0)
+
+
+class TokenCounter:
+    """프롬프트 토큰 수 (같은 텍스트는 한 번만 API로 계산, 실패하면 None)"""
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self._counts: Dict[str, Optional[int]] = {}
+
+    def count(self, text: str) -> Optional[int]:
+        if not self.enabled:
+            return None
+        if text not in self._counts:
+            try:
+                self._counts[text] = get_llm(settings.llm_model).get_num_tokens(text)
+            except Exception as e:
+                print(f"토큰 수 계산 오류, 이후 글자 수만 기록합니다: {str(e)}")
+                self.enabled = False
+                return None
+        return self._counts[text]
+
+
+def _percentile(values: List[float], ratio: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+def evaluate(
+    modes: List[str],
+    thresholds: List[float],
+    limits: List[int],
+    repeat: int,
+    count_tokens: bool
+) -> List[Dict]:
+    """설정별 평가 결과 목록"""
+    questions = [question for question, _ in GOLD_SET]
+    print(f"기준 질문 {len(questions)}개 임베딩 중...")
+    embeddings = embed_queries(questions)
+    counter = TokenCounter(count_tokens)
+    max_limit = max(limits)
+    results: List[Dict] = []
+
+    for mode in modes:
+        search = SEARCH_MODES[mode]
+        rows_per_question: List[List[Dict]] = []
+        latencies: List[float] = []
+        for embedding in embeddings:
+            rows = None
+            for _ in range(repeat):
+                started_at = time.perf_counter()
+                rows = search(embedding, max_limit)
+                latencies.append(time.perf_counter() - started_at)
+            if rows is None:
+                break
+            rows_per_question.append(rows)
+        if len(rows_per_question) < len(embeddings):
+            print(f"{mode}: 검색 함수가 DB에 없어 건너뜁니다.")
+            continue
+        print(f"{mode}: 검색 완료 (p50 {statistics.median(latencies) * 1000:.1f}ms)")
+
+        for threshold in thresholds:
+            for limit in limits:
+                recalls: List[float] = []
+                reciprocal_ranks: List[float] = []
+                chars: List[int] = []
+                tokens: List[int] = []
+                misses: List[str] = []
+                for (question, references), rows in zip(GOLD_SET, rows_per_question):
+                    kept = [row for row in rows[:limit] if row.get('similarity', 0) > threshold]
+                    recall, reciprocal_rank = score(kept, references)
+                    recalls.append(recall)
+                    reciprocal_ranks.append(reciprocal_rank)
+                    if recall == 0:
+                        misses.append(question)
+                    context = format_similarity_results(kept) if kept else ""
+                    chars.append(len(context))
+                    token_count = counter.count(context) if context else 0
+                    if token_count is not None:
+                        tokens.append(token_count)
+                results.append({
+                    "config": f"{mode} threshold={threshold} limit={limit}",
+                    "mode": mode,
+                    "threshold": threshold,
+                    "limit": limit,
+                    "recall": statistics.mean(recalls),
+                    "mrr": statistics.mean(reciprocal_ranks),
+                    "p50_ms": statistics.median(latencies) * 1000,
+                    "p95_ms": _percentile(latencies, 0.95) * 1000,
+                    "context_chars": statistics.mean(chars),
+                    "context_tokens": statistics.mean(tokens) if len(tokens) == len(chars) else None,
+                    "misses": misses,
+                })
+    return results
+
+
+def recommend(results: List[Dict], tolerance: float) -> Optional[Dict]:
+    """최고 recall에서 tolerance 이내인 설정 중 컨텍스트가 가장 작은 설정"""
+    if not results:
+        return None
+    best_recall = max(row["recall"] for row in results)
+    candidates = [row for row in results if row["recall"] >= best_recall - tolerance]
+    return min(candidates, key=lambda row: (row["context_tokens"] or row["context_chars"], row["p50_ms"]))
+
+
+def render_report(runs: List[Dict], tolerance: float) -> str:
+    """평가 결과 파일들을 하나의 마크다운 비교표로 변환"""
+    lines = ["# 검색 품질 평가", ""]
+    versions = {run["gold_set_version"] for run in runs}
+    if len(versions) > 1:
+        lines += [f"> 경고: 기준 질문 세트 버전이 다릅니다 ({', '.join(sorted(versions))}). 결과를 직접 비교하지 마세요.", ""]
+    lines += [
+        "| 라벨 | 설정 | recall@k | MRR | p50(ms) | p95(ms) | 컨텍스트(자) | 컨텍스트(토큰) |",
+        "|---|---|---:|---:|---:|---:|---:|---:|",
+    ]
+    for run in runs:
+        for row in run["results"]:
+            tokens = f"{row['context_tokens']:.0f}" if row["context_tokens"] is not None else "-"
+            lines.append(
+                f"| {run['label']} | {row['config']} | {row['recall']:.3f} | {row['mrr']:.3f} | "
+                f"{row['p50_ms']:.1f} | {row['p95_ms']:.1f} | {row['context_chars']:.0f} | {tokens} |"
+            )
+    best = recommend([dict(row, label=run["label"]) for run in runs for row in run["results"]], tolerance)
+    if best is not None:
+        lines += [
+            "",
+            f"최고 recall에서 {tolerance:.2f} 이내이면서 컨텍스트가 가장 작은 설정: "
+            f"**{best['label']} / {best['config']}** (recall {best['recall']:.3f}, MRR {best['mrr']:.3f})",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description="검색 품질 대비 지연 시간/컨텍스트 비용 평가")
+    parser.add_argument("--modes", default="exact,plain,coarse,routed", help=f"검색 방식 (쉼표 구분: {', '.join(SEARCH_MODES)})")
+    parser.add_argument("--thresholds", default="0.3,0.5,0.7", help="최소 유사도 후보 (쉼표 구분)")
+    parser.add_argument("--limits", default="3,5,10", help="결과 수 후보 (쉼표 구분)")
+    parser.add_argument("--repeat", type=int, default=1, help="질문별 검색 반복 횟수 (지연 시간 측정용)")
+    parser.add_argument("--label", default="current", help="이 실행의 이름 (예: 적재한 청크 크기)")
+    parser.add_argument("--no-token-count", action="store_true", help="토큰 수 계산(Gemini API) 생략, 글자 수만 기록")
+    parser.add_argument("--tolerance", type=float, default=0.02, help="추천 시 허용하는 최고 recall 대비 감소폭")
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT), help="결과를 저장할 JSON 경로")
+    parser.add_argument("--compare", nargs="+", help="저장된 결과 JSON들을 비교 (검색을 실행하지 않음)")
+    parser.add_argument("--report", help="비교표를 저장할 마크다운 경로 (없으면 화면에만 출력)")
+    args = parser.parse_args()
+
+    if args.compare:
+        runs = [json.loads(Path(path).read_text()) for path in args.compare]
+    else:
+        modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+        unknown = [mode for mode in modes if mode not in SEARCH_MODES]
+        if unknown:
+            parser.error(f"알 수 없는 검색 방식: {', '.join(unknown)}")
+        results = evaluate(
+            modes,
+            _parse_values(args.thresholds, float),
+            _parse_values(args.limits),
+            args.repeat,
+            not args.no_token_count
+        )
+        run = {
+            "label": args.label,
+            "gold_set_version": GOLD_SET_VERSION,
+            "questions": len(GOLD_SET),
+            "embedding_dimension": settings.embedding_dimension,
+            "results": results,
+        }
+        path = Path(args.output)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(run, ensure_ascii=False, indent=2))
+        print(f"\n저장: {path}")
+        runs = [run]
+
+    report = render_report(runs, args.tolerance)
+    print("\n" + report)
+    if args.report:
+        path = Path(args.report)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(report)
+        print(f"저장: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,16 @@
 """성경 XML 파일을 Supabase 벡터 DB에 적재하는 스크립트"""
+import math
 import os
 import xml.etree.ElementTree as ET
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 from dotenv import load_dotenv
 from supabase import create_client, Client
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from app.services.source_refs import VERSE_MARKER_PATTERN
+
 # 환경변수 로드
 load_dotenv()
 
@@ -15,9 +18,14 @@ load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 SUPABASE_TABLE_NAME = os.getenv("SUPABASE_TABLE_NAME", "bible_chunks")
+CENTROID_TABLE_NAME = os.getenv("CENTROID_TABLE_NAME", "bible_chapter_centroids")
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "models/gemini-embedding-001")
 EMBEDDING_DIMENSION = int(os.getenv("EMBEDDING_DIMENSION", "1536"))  # output_dimensionality 파라미터 사용
+COARSE_EMBEDDING_DIMENSION = int(os.getenv("COARSE_EMBEDDING_DIMENSION", "256"))  # coarse-to-fine 1단계 차원
+# 적재할 번역본 코드와 XML 파일 (번역본마다 bible_chunks의 파티션 하나, 예: TRANSLATION=nkrv BIBLE_XML_PATH=bible/...)
+TRANSLATION = os.getenv("TRANSLATION", "krv")
+BIBLE_XML_PATH = os.getenv("BIBLE_XML_PATH", "bible/SF_2022-09-19_KOR_KORRV_(Korean Revised Version 1952 1961).xml")
 
 # Google API 키 환경변수 설정 (langchain-google-genai가 자동으로 사용)
 if GOOGLE_API_KEY:
@@ -31,9 +39,10 @@ embeddings = GoogleGenerativeAIEmbeddings(
 )
 
 # 텍스트 분할기 설정
+# (청크 크기별 검색 품질 비교: 다른 DB에 적재한 뒤 evaluate_retrieval --label로 측정)
 text_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=500,
-    chunk_overlap=50,
+    chunk_size=int(os.getenv("CHUNK_SIZE", "500")),
+    chunk_overlap=int(os.getenv("CHUNK_OVERLAP", "50")),
     length_function=len
 )
 
@@ -98,6 +107,7 @@ def parse_xml_bible(xml_path: Path) -> List[Dict]:
                     
                     documents.append({
                         "book": book_name,
+                        "book_no": book_number,
                         "chapter": chapter_number,
                         "verse": "",  # 전체 장이므로 절 번호는 비움
                         "content": content
@@ -130,27 +140,104 @@ def get_embedding(text: str) -> List[float]:
         return []
 
 
+def verse_range(chunk: str, previous_verse: Optional[int] = None) -> Tuple[Optional[int], Optional[int]]:
+    """
+    청크에 들어 있는 첫 절과 마지막 절 번호
+    
+    청크가 절 중간에서 시작하면(분할 경계) 앞 청크의 마지막 절(previous_verse)부터로 봅니다.
+    """
+    verses = [int(number) for number in VERSE_MARKER_PATTERN.findall(chunk)]
+    starts_mid_verse = not VERSE_MARKER_PATTERN.match(chunk.lstrip())
+    if starts_mid_verse and previous_verse is not None:
+        verses.append(previous_verse)
+    if not verses:
+        return (None, None)
+    return (min(verses), max(verses))
+
+
+def coarse_embedding(embedding: List[float]) -> List[float]:
+    """임베딩 앞 COARSE_EMBEDDING_DIMENSION차원을 단위 길이로 재정규화 (embedding_coarse 컬럼)"""
+    prefix = embedding[:COARSE_EMBEDDING_DIMENSION]
+    norm = math.sqrt(sum(value * value for value in prefix)) or 1.0
+    return [value / norm for value in prefix]
+
+
 def chunk_documents(documents: List[Dict]) -> List[Dict]:
-    """문서를 더 작은 청크로 분할"""
+    """문서를 더 작은 청크로 분할 (정수 참조 컬럼 book_no/chapter_no/verse_start/verse_end 포함)"""
     chunked_docs = []
     
     for doc in documents:
         # 텍스트 분할
         chunks = text_splitter.split_text(doc["content"])
+        chapter_no = int(doc["chapter"]) if str(doc["chapter"]).isdigit() else None
+        previous_verse = None
         
         for chunk in chunks:
+            verse_start, verse_end = verse_range(chunk, previous_verse)
+            previous_verse = verse_end
             chunked_docs.append({
                 "book": doc["book"],
                 "chapter": doc["chapter"],
                 "verse": doc["verse"],
-                "content": chunk
+                "content": chunk,
+                "book_no": doc["book_no"],
+                "chapter_no": chapter_no,
+                "verse_start": verse_start,
+                "verse_end": verse_end
             })
     
     return chunked_docs
 
 
-def upload_to_supabase(documents: List[Dict], batch_size: int = 100):
-    """Supabase에 문서 업로드"""
+def add_to_centroid(centroids: Dict[Tuple[int, int], Dict], doc: Dict, embedding: List[float]):
+    """청크 임베딩(단위 길이로 정규화)을 장별 합계에 더함"""
+    if doc["chapter_no"] is None:
+        return
+    key = (doc["book_no"], doc["chapter_no"])
+    entry = centroids.get(key)
+    if entry is None:
+        entry = {"book": doc["book"], "chapter": doc["chapter"], "sum": [0.0] * len(embedding), "count": 0}
+        centroids[key] = entry
+    norm = math.sqrt(sum(value * value for value in embedding)) or 1.0
+    entry["sum"] = [total + value / norm for total, value in zip(entry["sum"], embedding)]
+    entry["count"] += 1
+
+
+def upload_chapter_centroids(centroids: Dict[Tuple[int, int], Dict], batch_size: int = 100):
+    """장별 중심 임베딩(청크 임베딩 평균, 단위 길이)을 bible_chapter_centroids에 저장"""
+    rows = []
+    for (book_no, chapter_no), entry in sorted(centroids.items()):
+        norm = math.sqrt(sum(value * value for value in entry["sum"])) or 1.0
+        rows.append({
+            "translation": TRANSLATION,
+            "book_no": book_no,
+            "chapter_no": chapter_no,
+            "book": entry["book"],
+            "chapter": entry["chapter"],
+            "embedding": [value / norm for value in entry["sum"]],
+            "chunk_count": entry["count"]
+        })
+    
+    print(f"\n장 중심 임베딩 {len(rows)}개를 저장합니다...")
+    for i in range(0, len(rows), batch_size):
+        try:
+            supabase.table(CENTROID_TABLE_NAME).upsert(rows[i:i + batch_size]).execute()
+        except Exception as e:
+            print(f"장 중심 임베딩 저장 오류: {e}")
+    print("장 중심 임베딩 저장 완료")
+
+
+def ensure_translation_partition():
+    """번역본 파티션 생성 (이미 있으면 그대로, supabase_setup.sql의 ensure_translation_partition)"""
+    try:
+        supabase.rpc("ensure_translation_partition", {"translation_code": TRANSLATION}).execute()
+    except Exception as e:
+        print(f"번역본 파티션 생성 오류 ({TRANSLATION}): {e}")
+        print("supabase_translations.sql(또는 supabase_setup.sql)을 먼저 실행했는지 확인하세요.")
+
+
+def upload_to_supabase(documents: List[Dict], batch_size: int = 100, centroids: Optional[Dict[Tuple[int, int], Dict]] = None):
+    """Supabase에 문서 업로드 (centroids가 있으면 업로드한 임베딩을 장별로 누적)"""
     total = len(documents)
     uploaded = 0
     
@@ -166,11 +253,17 @@ def upload_to_supabase(documents: List[Dict], batch_size: int = 100):
             
             if embedding:
                 batch_data.append({
+                    "translation": TRANSLATION,
                     "book": doc["book"],
                     "chapter": doc["chapter"],
                     "verse": doc["verse"],
                     "content": doc["content"],
-                    "embedding": embedding
+                    "book_no": doc["book_no"],
+                    "chapter_no": doc["chapter_no"],
+                    "verse_start": doc["verse_start"],
+                    "verse_end": doc["verse_end"],
+                    "embedding": embedding,
+                    "embedding_coarse": coarse_embedding(embedding)
                 })
         
         # Supabase에 배치 삽입
@@ -178,6 +271,9 @@ def upload_to_supabase(documents: List[Dict], batch_size: int = 100):
             try:
                 supabase.table(SUPABASE_TABLE_NAME).insert(batch_data).execute()
                 uploaded += len(batch_data)
+                if centroids is not None:
+                    for row in batch_data:
+                        add_to_centroid(centroids, row, row["embedding"])
                 print(f"진행률: {uploaded}/{total} ({uploaded*100//total if total > 0 else 0}%)")
             except Exception as e:
                 print(f"업로드 오류: {e}")
@@ -195,13 +291,13 @@ def main():
     print("=" * 60)
     
     # XML 파일 찾기
-    xml_file = Path("bible/SF_2022-09-19_KOR_KORRV_(Korean Revised Version 1952 1961).xml")
+    xml_file = Path(BIBLE_XML_PATH)
     
     if not xml_file.exists():
         print(f"오류: XML 파일을 찾을 수 없습니다: {xml_file}")
         return
     
-    print(f"\nXML 파일 처리 중: {xml_file.name}")
+    print(f"\nXML 파일 처리 중: {xml_file.name} (번역본: {TRANSLATION})")
     
     # XML 파싱
     all_documents = parse_xml_bible(xml_file)
@@ -219,7 +315,14 @@ def main():
     
     # Supabase에 업로드
     print("\nSupabase에 업로드 중...")
-    upload_to_supabase(chunked_docs)
+    ensure_translation_partition()
+    centroids: Dict[Tuple[int, int], Dict] = {}
+    upload_to_supabase(chunked_docs, centroids=centroids)
+    
+    # 장 중심 임베딩 저장 (검색 1단계 장 선택용)
+    upload_chapter_centroids(centroids)
+    
+    print("\n관련 구절 이웃 테이블은 python -m app.scripts.build_neighbors로 다시 계산하세요.")
     
     print("\n" + "=" * 60)
     print("완료!")
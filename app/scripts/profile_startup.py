@@ -0,0 +1,110 @@
+"""앱 시작 시간 측정 스크립트
+
+- `python -X importtime -c "import app.main"`을 별도 프로세스로 실행하여
+  누적 임포트 시간이 큰 모듈 상위 N개를 출력합니다.
+- --serve를 주면 uvicorn을 띄워 /healthz가 처음 200을 반환할 때까지의 시간을 잽니다.
+- --budget-ms를 넘으면 종료 코드 1을 반환하므로 CI에서 회귀 검사로 쓸 수 있습니다.
+
+사용법:
+    python -m app.scripts.profile_startup
+    python -m app.scripts.profile_startup --top 30 --budget-ms 1500
+    python -m app.scripts.profile_startup --serve --port 8765
+
+임포트 단계에서는 외부 서비스에 연결하지 않으므로 필수 환경변수가 없으면 더미 값으로 채웁니다.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Dict, List, Tuple
+
+
+def _child_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    for key in ("SUPABASE_URL", "SUPABASE_KEY", "GOOGLE_API_KEY"):
+        env.setdefault(key, "http://localhost" if key == "SUPABASE_URL" else "startup-profile")
+    return env
+
+
+def measure_imports(module: str) -> Tuple[int, List[Tuple[int, int, str]]]:
+    """
+    module 임포트 시간을 측정합니다.
+
+    Returns:
+        (전체 누적 시간 us, [(누적 us, 자체 us, 모듈명), ...])
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=_child_env()
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"임포트 실패:\n{result.stderr[-2000:]}")
+
+    rows = []
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        row = (int(cumulative_us), int(self_us), name.rstrip())
+        rows.append(row)
+        if row[2].strip() == module:
+            total = row[0]
+    return total, rows
+
+
+def measure_healthz(port: int, timeout: float) -> float:
+    """uvicorn 프로세스 시작부터 /healthz 첫 200 응답까지 걸린 시간(초)"""
+    started_at = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=_child_env()
+    )
+    try:
+        while time.perf_counter() - started_at < timeout:
+            if process.poll() is not None:
+                raise RuntimeError("uvicorn 프로세스가 종료되었습니다.")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/healthz", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started_at
+            except OSError:
+                time.sleep(0.02)
+        raise RuntimeError(f"{timeout}s 안에 /healthz가 응답하지 않았습니다.")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description="앱 시작 시간 측정")
+    parser.add_argument("--module", default="app.main", help="측정할 모듈")
+    parser.add_argument("--top", type=int, default=20, help="출력할 상위 모듈 수")
+    parser.add_argument("--budget-ms", type=float, help="임포트 시간 예산 (초과 시 종료 코드 1)")
+    parser.add_argument("--serve", action="store_true", help="uvicorn을 띄워 /healthz 응답 시간도 측정")
+    parser.add_argument("--port", type=int, default=8765, help="--serve에서 사용할 포트")
+    parser.add_argument("--timeout", type=float, default=30.0, help="/healthz 대기 시간(초)")
+    args = parser.parse_args()
+
+    total_us, rows = measure_imports(args.module)
+    print(f"{args.module} 임포트: {total_us / 1000:.1f} ms\n")
+    print(f"{'누적(ms)':>10} {'자체(ms)':>10}  모듈")
+    for cumulative_us, self_us, name in sorted(rows, reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>10.1f} {self_us / 1000:>10.1f}  {name}")
+
+    if args.serve:
+        elapsed = measure_healthz(args.port, args.timeout)
+        print(f"\n/healthz 첫 응답까지: {elapsed * 1000:.0f} ms")
+
+    if args.budget_ms is not None and total_us / 1000 > args.budget_ms:
+        print(f"\n예산 초과: {total_us / 1000:.1f} ms > {args.budget_ms:.0f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
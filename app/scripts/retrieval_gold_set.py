@@ -0,0 +1,57 @@
+"""검색 품질 평가용 기준(gold) 질문 세트
+
+책/장/절을 직접 말하지 않는 주제 질문(벡터 검색을 타는 질문)과, 답이 들어 있는
+본문 위치(개역한글판 기준)를 짝지었습니다. 참조 목록 중 하나라도 찾으면 그 참조를 찾은
+것으로 보며, 절이 None이면 해당 장의 청크면 정답으로 봅니다.
+
+질문이나 정답을 바꾸면 GOLD_SET_VERSION을 올려서, 서로 다른 버전의 평가 결과를
+비교하지 않도록 합니다 (evaluate_retrieval --compare가 버전이 다르면 경고).
+"""
+from typing import List, Optional, Tuple
+
+
+GOLD_SET_VERSION = "2026-10-v1"
+
+# (책, 장, 절 또는 None)
+Reference = Tuple[str, int, Optional[int]]
+
+GOLD_SET: List[Tuple[str, List[Reference]]] = [
+    ("하나님이 세상을 이처럼 사랑하사 독생자를 주셨다는 말씀", [("요한복음", 3, 16)]),
+    ("사랑은 오래 참고 온유하며 시기하지 않는다는 구절", [("고린도전서", 13, 4)]),
+    ("여호와가 나의 목자라서 부족함이 없다는 시", [("시편", 23, 1)]),
+    ("모든 것이 합력하여 선을 이룬다는 말씀", [("로마서", 8, 28)]),
+    ("내게 능력 주시는 자 안에서 모든 것을 할 수 있다", [("빌립보서", 4, 13)]),
+    ("항상 기뻐하고 쉬지 말고 기도하고 범사에 감사하라", [("데살로니가전서", 5, 16), ("데살로니가전서", 5, 17), ("데살로니가전서", 5, 18)]),
+    ("마음을 다하여 여호와를 의뢰하고 네 명철을 의지하지 말라", [("잠언", 3, 5)]),
+    ("심령이 가난한 자가 복이 있다는 가르침", [("마태복음", 5, 3)]),
+    ("태초에 말씀이 계셨고 말씀이 하나님이셨다", [("요한복음", 1, 1)]),
+    ("믿음은 바라는 것들의 실상이요 보지 못하는 것들의 증거", [("히브리서", 11, 1)]),
+    ("다윗이 물매와 돌로 블레셋 거인을 쓰러뜨린 이야기", [("사무엘상", 17, None)]),
+    ("노아의 방주 크기는 얼마였나요?", [("창세기", 6, 15)]),
+    ("바울이 다메섹으로 가는 길에 빛을 보고 회심한 사건", [("사도행전", 9, None), ("사도행전", 22, None), ("사도행전", 26, None)]),
+    ("집을 나간 둘째 아들이 돌아오자 아버지가 잔치를 연 비유", [("누가복음", 15, None)]),
+    ("강도 만난 사람을 도와준 사마리아 사람 비유", [("누가복음", 10, None)]),
+    ("마귀의 궤계를 능히 대적하기 위해 하나님의 전신갑주를 입으라", [("에베소서", 6, 11)]),
+    ("그가 찔림은 우리의 허물을 인함이요 상함은 우리의 죄악을 인함이라", [("이사야", 53, 5)]),
+    ("주의 인자와 긍휼이 무궁하여 아침마다 새롭다", [("예레미야애가", 3, 22), ("예레미야애가", 3, 23)]),
+    ("아브라함이 모리아 산에서 아들을 번제로 드리려 한 사건", [("창세기", 22, None)]),
+    ("십계명 내용이 뭐야?", [("출애굽기", 20, None), ("신명기", 5, None)]),
+    ("성령의 열매는 사랑과 희락과 화평", [("갈라디아서", 5, 22)]),
+    ("떡 다섯 개와 물고기 두 마리로 오천 명을 먹이신 기적", [("마태복음", 14, None), ("마가복음", 6, None), ("누가복음", 9, None), ("요한복음", 6, None)]),
+    ("예수님이 가르쳐 주신 기도 하늘에 계신 우리 아버지", [("마태복음", 6, 9), ("누가복음", 11, 2)]),
+    ("죽은 지 나흘 된 나사로를 살리신 사건", [("요한복음", 11, None)]),
+    ("어머니가 가는 곳에 나도 가겠다며 시어머니를 따라간 며느리", [("룻기", 1, 16)]),
+    ("하루아침에 재산과 자녀를 모두 잃고도 하나님을 원망하지 않은 사람", [("욥기", 1, None)]),
+    ("마른 뼈들이 살아나는 골짜기 환상", [("에스겔", 37, None)]),
+    ("바다가 갈라져 이스라엘 백성이 마른 땅으로 건넌 사건", [("출애굽기", 14, None)]),
+    ("새 하늘과 새 땅 다시 바다도 있지 않더라", [("요한계시록", 21, 1)]),
+    ("위에 있는 권세들에게 굴복하라", [("로마서", 13, 1)]),
+    ("너희는 세상의 소금이요 세상의 빛이라", [("마태복음", 5, 13), ("마태복음", 5, 14)]),
+    ("여호와를 경외하는 것이 지혜와 지식의 근본", [("잠언", 1, 7), ("잠언", 9, 10)]),
+    ("큰 물고기 뱃속에서 사흘 밤낮을 지낸 선지자", [("요나", 1, 17), ("요나", 2, None)]),
+    ("범사에 기한이 있고 천하에 모든 목적이 이룰 때가 있나니", [("전도서", 3, 1)]),
+    ("하나님은 사랑이시라", [("요한일서", 4, 8), ("요한일서", 4, 16)]),
+    ("행함이 없는 믿음은 죽은 것이라", [("야고보서", 2, 17), ("야고보서", 2, 26)]),
+    ("사자 굴에 던져졌지만 해를 입지 않은 사람", [("다니엘", 6, None)]),
+    ("강하고 담대하라 두려워하지 말라 네가 어디로 가든지 함께 하리라", [("여호수아", 1, 9)]),
+]
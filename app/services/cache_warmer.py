@@ -0,0 +1,141 @@
+"""질문 기록 기반 캐시 예열
+
+배포나 콜드 스타트 직후에는 임베딩/검색/직접 조회 캐시가 모두 비어 있어 첫 사용자들이
+전체 지연 시간을 치릅니다. messages 테이블의 최근 사용자 질문에서 자주 나온 구절 참조를
+골라 미리 검색해 두면 배포 직후부터 캐시가 적중합니다.
+
+- 질문은 search_key로 묶어 셉니다 ("요한복음 3:16"과 "요한복음 3장 16절"은 같은 질문).
+- 책/장/절로 파싱되는 질문만 예열합니다. 에이전트는 질문을 다시 써서 search_bible을 호출하므로
+  주제 질문의 원문으로 채운 검색 캐시는 거의 적중하지 않지만, 참조 질문은 다시 써도 같은 키가 됩니다.
+- 질문마다 _search_bible_impl을 한 번 호출하면 검색 결과(search_cache)가 채워지고,
+  직접 조회 경로와 에이전트의 search_bible도 같은 검색 캐시를 사용합니다.
+- 시간 예산(cache_warm_time_budget_seconds)과 저장할 결과 크기 예산(cache_warm_max_bytes)을
+  넘으면 멈추며, 이미 캐시에 있는 질문은 건너뜁니다.
+- 앱 시작을 막지 않도록 lifespan에서 백그라운드 스레드로 실행하고, 여러 워커가 동시에 뜨면
+  공유 캐시의 임대(lease) 항목을 원자적으로 먼저 쓴 워커 하나만 예열합니다.
+"""
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from app.config import settings
+from app.services.providers import get_supabase
+from app.services.shared_cache import SharedCache, search_cache
+from app.services.telemetry import metrics
+
+
+CACHE_WARM_QUERIES = metrics.counter(
+    "bible_qa_cache_warm_queries_total",
+    "캐시 예열 질문 처리 결과 (warmed: 새로 채움, cached: 이미 있음, error: 검색 실패)",
+    labelnames=("result",)
+)
+
+# 한 번 예열하는 동안 검색 오류가 이만큼 이어지면 중단 (DB/임베딩 API 장애)
+_MAX_CONSECUTIVE_ERRORS = 3
+
+# 워커 사이의 예열 임대 (만료 전에는 다른 워커가 예열하지 않음)
+_lease = SharedCache("cache_warm", settings.cache_warm_time_budget_seconds, 1)
+
+_stop_event = threading.Event()
+
+
+def stop() -> None:
+    """진행 중인 예열을 다음 질문 전에 멈춤 (앱 종료 시 호출)"""
+    _stop_event.set()
+
+
+def fetch_recent_questions(limit: int) -> List[str]:
+    """최근 사용자 질문 (최신순)"""
+    response = get_supabase().table("messages").select("content").eq(
+        "role", "user"
+    ).order("created_at", desc=True).limit(limit).execute()
+    return [
+        row["content"] for row in response.data or []
+        if isinstance(row.get("content"), str) and 0 < len(row["content"]) <= settings.cache_warm_max_query_chars
+    ]
+
+
+def frequent_questions(questions: List[str], min_count: int, max_queries: int) -> List[Tuple[str, int]]:
+    """
+    search_key가 같은 구절 참조 질문끼리 묶어 자주 나온 순서로 정렬 (참조가 아닌 질문은 제외)
+
+    Returns:
+        [(대표 질문, 횟수), ...] (대표 질문은 묶음 안에서 가장 많이 쓰인 표현)
+    """
+    from app.langgraph.graph import search_key
+
+    counts: Counter = Counter()
+    phrasings: Dict[tuple, Counter] = {}
+    for question in questions:
+        key = search_key(question)
+        if key[0] != "reference":
+            continue
+        counts[key] += 1
+        phrasings.setdefault(key, Counter())[question.strip()] += 1
+    return [
+        (phrasings[key].most_common(1)[0][0], count)
+        for key, count in counts.most_common(max_queries)
+        if count >= min_count
+    ]
+
+
+def warm_caches() -> Dict[str, int]:
+    """
+    자주 나온 질문으로 캐시를 채웁니다 (오류는 출력만 하고 요청에 영향 없음).
+
+    Returns:
+        결과별 질문 수 {"warmed", "cached", "error"}
+    """
+    from app.langgraph.graph import _search_bible_impl, search_key
+
+    summary = {"warmed": 0, "cached": 0, "error": 0}
+    if not settings.shared_cache_enabled or not search_cache.enabled:
+        return summary
+    if not _lease.add("lease", True):
+        print("다른 워커가 캐시를 예열하고 있어 건너뜁니다.")
+        return summary
+
+    started_at = time.monotonic()
+    try:
+        questions = fetch_recent_questions(settings.cache_warm_history_limit)
+    except Exception as e:
+        print(f"캐시 예열용 질문 조회 오류: {str(e)}")
+        return summary
+    candidates = frequent_questions(questions, settings.cache_warm_min_count, settings.cache_warm_max_queries)
+
+    stored_bytes = 0
+    consecutive_errors = 0
+    for question, _ in candidates:
+        if _stop_event.is_set():
+            break
+        if time.monotonic() - started_at > settings.cache_warm_time_budget_seconds:
+            print("캐시 예열 시간 예산을 모두 사용했습니다.")
+            break
+        if stored_bytes > settings.cache_warm_max_bytes:
+            print("캐시 예열 크기 예산을 모두 사용했습니다.")
+            break
+
+        if search_cache.get(repr(search_key(question))) is not None:
+            result = "cached"
+        else:
+            output = _search_bible_impl(question)
+            if output.startswith(("검색 중 오류", "오류:", "네트워크 연결 오류")):
+                result = "error"
+            else:
+                result = "warmed"
+                stored_bytes += len(output.encode("utf-8"))
+        summary[result] += 1
+        CACHE_WARM_QUERIES.inc(result=result)
+
+        consecutive_errors = consecutive_errors + 1 if result == "error" else 0
+        if consecutive_errors >= _MAX_CONSECUTIVE_ERRORS:
+            print("검색 오류가 이어져 캐시 예열을 중단합니다.")
+            break
+
+    print(
+        f"캐시 예열: 질문 {len(questions)}개 중 {len(candidates)}개 선택, "
+        f"새로 채움 {summary['warmed']}, 이미 있음 {summary['cached']}, 오류 {summary['error']} "
+        f"({stored_bytes / 1024:.0f}KB, {time.monotonic() - started_at:.1f}s)"
+    )
+    return summary
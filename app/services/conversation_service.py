@@ -2,19 +2,22 @@
 from typing import Optional, List, Dict, Any
 from uuid import UUID, uuid4
 from datetime import datetime
-from supabase import create_client, Client
-from app.config import settings
+from app.services.providers import get_supabase
+from app.services.shared_cache import conversation_versions
+from app.services.source_refs import compact_sources
+
+
+# conversation_versions에서 대화 목록 버전을 저장하는 키
+LIST_VERSION_KEY = "__list__"
 
 
 class ConversationService:
     """대화 기록 관리 서비스"""
     
-    def __init__(self):
-        """초기화"""
-        self.supabase: Client = create_client(
-            settings.supabase_url,
-            settings.supabase_key
-        )
+    @property
+    def supabase(self):
+        """공유 Supabase 클라이언트 (첫 사용 시 생성)"""
+        return get_supabase()
     
     def create_conversation(
         self,
@@ -84,7 +87,8 @@ class ConversationService:
         }
         
         if sources:
-            data["sources"] = sources
+            # 구절 본문은 저장하지 않고 위치만 (조회 시 source_refs.hydrate_messages로 채움)
+            data["sources"] = compact_sources(sources)
         
         if metadata:
             data["metadata"] = metadata
@@ -94,10 +98,12 @@ class ConversationService:
             self.supabase.table("messages").insert(data).execute()
             
             # 대화의 updated_at 업데이트
+            updated_at = datetime.utcnow().isoformat()
             self.supabase.table("conversations").update({
-                "updated_at": datetime.utcnow().isoformat()
+                "updated_at": updated_at
             }).eq("id", conversation_id).execute()
             
+            self._record_write(conversation_id, {"updated_at": updated_at, "last_message_id": message_id})
             return message_id
         except Exception as e:
             print(f"메시지 추가 오류: {e}")
@@ -108,7 +114,8 @@ class ConversationService:
         message_id: str,
         content: Optional[str] = None,
         sources: Optional[List[Dict[str, str]]] = None,
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        conversation_id: Optional[str] = None
     ) -> bool:
         """
         메시지 업데이트 (스트리밍 중 내용 누적용)
@@ -118,6 +125,7 @@ class ConversationService:
             content: 업데이트할 내용
             sources: 출처 정보
             metadata: 추가 메타데이터
+            conversation_id: 메시지가 속한 대화 ID (주면 대화의 updated_at도 갱신해 ETag가 바뀜)
             
         Returns:
             성공 여부
@@ -128,7 +136,7 @@ class ConversationService:
             data["content"] = content
         
         if sources is not None:
-            data["sources"] = sources
+            data["sources"] = compact_sources(sources)
         
         if metadata is not None:
             data["metadata"] = metadata
@@ -138,6 +146,11 @@ class ConversationService:
         
         try:
             self.supabase.table("messages").update(data).eq("id", message_id).execute()
+            if conversation_id:
+                self.supabase.table("conversations").update({
+                    "updated_at": datetime.utcnow().isoformat()
+                }).eq("id", conversation_id).execute()
+                self._record_write(conversation_id)
             return True
         except Exception as e:
             print(f"메시지 업데이트 오류: {e}")
@@ -218,6 +231,7 @@ class ConversationService:
         try:
             # CASCADE로 인해 messages도 자동 삭제됨
             self.supabase.table("conversations").delete().eq("id", conversation_id).execute()
+            self._record_write(conversation_id)
             return True
         except Exception as e:
             print(f"대화 삭제 오류: {e}")
@@ -257,11 +271,92 @@ class ConversationService:
                     data["metadata"] = metadata
             
             self.supabase.table("conversations").update(data).eq("id", conversation_id).execute()
+            self._record_write(conversation_id)
             return True
         except Exception as e:
             print(f"대화 업데이트 오류: {e}")
             return False
 
+    def get_message(self, conversation_id: str, message_id: str) -> Optional[Dict[str, Any]]:
+        """
+        메시지 하나 조회
+        
+        Returns:
+            메시지 (없으면 None)
+        """
+        try:
+            result = self.supabase.table("messages").select("*").eq(
+                "id", message_id
+            ).eq("conversation_id", conversation_id).limit(1).execute()
+            return result.data[0] if result.data else None
+        except Exception as e:
+            print(f"메시지 조회 오류: {e}")
+            return None
+    
+    def get_conversation_version(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """
+        대화의 버전 (메시지 조회 ETag용)
+        
+        쓰기 때마다 갱신되는 공유 캐시를 먼저 보고, 없으면 대화의 updated_at과
+        마지막 메시지 id만 조회합니다 (메시지 본문은 읽지 않음).
+        
+        Returns:
+            {"updated_at", "last_message_id"} (대화가 없으면 None)
+        """
+        cached = conversation_versions.get(conversation_id)
+        if cached is not None:
+            return cached
+        conversation = self.supabase.table("conversations").select("updated_at").eq(
+            "id", conversation_id
+        ).limit(1).execute()
+        if not conversation.data:
+            return None
+        last_message = self.supabase.table("messages").select("id").eq(
+            "conversation_id", conversation_id
+        ).order("created_at", desc=True).limit(1).execute()
+        version = {
+            "updated_at": conversation.data[0].get("updated_at"),
+            "last_message_id": last_message.data[0]["id"] if last_message.data else None
+        }
+        conversation_versions.set(conversation_id, version)
+        return version
+    
+    def get_conversations_version(self) -> Dict[str, Any]:
+        """
+        대화 목록의 버전 (목록 조회 ETag용)
+        
+        공유 캐시에 없으면 가장 최근 updated_at과 대화 수만 조회합니다
+        (삭제는 대화 수로, 생성/수정은 updated_at으로 드러남).
+        
+        Returns:
+            {"updated_at", "count"} 또는 마지막 쓰기에서 기록한 {"updated_at", "token"}
+        """
+        cached = conversation_versions.get(LIST_VERSION_KEY)
+        if cached is not None:
+            return cached
+        result = self.supabase.table("conversations").select("updated_at", count="exact").order(
+            "updated_at", desc=True
+        ).limit(1).execute()
+        version = {
+            "updated_at": result.data[0].get("updated_at") if result.data else None,
+            "count": result.count
+        }
+        conversation_versions.set(LIST_VERSION_KEY, version)
+        return version
+    
+    def _record_write(self, conversation_id: str, version: Optional[Dict[str, Any]] = None) -> None:
+        """
+        쓰기 후 버전 캐시 갱신
+        
+        새 버전을 아는 경우(메시지 추가)에는 저장하고, 모르면 비워서 다음 조회가 DB에서 읽게 합니다.
+        대화 목록 버전은 쓰기마다 새 토큰으로 바꿉니다.
+        """
+        conversation_versions.set(conversation_id, version)
+        conversation_versions.set(LIST_VERSION_KEY, {
+            "updated_at": datetime.utcnow().isoformat(),
+            "token": uuid4().hex
+        })
+
 
 # 싱글톤 인스턴스
 conversation_service = ConversationService()
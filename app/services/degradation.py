@@ -0,0 +1,112 @@
+"""지연 시간 예산에 따른 단계적 품질 저하
+
+요청마다 예산(request_budget_seconds)을 두고, 남은 시간에 따라 처리 모드를 정합니다.
+
+- full: 평소와 같음
+- reduced (남은 시간 < degrade_reduced_below_seconds):
+  검색 결과 수와 전체 책 조회 범위를 줄이고, 추가 검색(쿼리 변형)을 생략하며 컨텍스트 길이를 제한
+- minimal (남은 시간 < degrade_minimal_below_seconds):
+  임베딩/벡터 검색 대신 직접 조회와 키워드 검색만 사용하고, 더 빠른 모델로 생성
+
+각 단계는 파이프라인의 해당 지점에서 남은 시간을 다시 확인하여 적용하며,
+적용한 단계와 최종 모드는 메시지 metadata(mode, degradations)에 기록됩니다.
+"""
+from typing import Optional
+
+from app.config import settings
+from app.services.telemetry import MODE_SEVERITY, current_trace
+
+
+MODE_FULL = "full"
+MODE_REDUCED = "reduced"
+MODE_MINIMAL = "minimal"
+
+# reduced 이상에서 사용하는 값
+REDUCED_SEARCH_LIMIT = 3
+REDUCED_BOOK_LIMIT = 200
+
+
+def current_mode() -> str:
+    """현재 요청의 남은 예산으로 처리 모드 결정 (요청 컨텍스트 밖이면 full)"""
+    trace = current_trace()
+    remaining = trace.remaining() if trace is not None else None
+    if remaining is None:
+        return MODE_FULL
+    if remaining < settings.degrade_minimal_below_seconds:
+        return MODE_MINIMAL
+    if remaining < settings.degrade_reduced_below_seconds:
+        return MODE_REDUCED
+    return MODE_FULL
+
+
+def _apply(mode: str, step: str) -> None:
+    trace = current_trace()
+    if trace is not None:
+        trace.degrade(mode, step, MODE_SEVERITY[mode])
+
+
+def search_limit(limit: int) -> int:
+    """검색 결과 수 (reduced 이상이면 줄임)"""
+    mode = current_mode()
+    if mode != MODE_FULL and limit > REDUCED_SEARCH_LIMIT:
+        _apply(mode, "lower_limit")
+        return REDUCED_SEARCH_LIMIT
+    return limit
+
+
+def book_fetch_limit(limit: int) -> int:
+    """전체 책 조회 청크 수 (reduced 이상이면 앞부분만)"""
+    mode = current_mode()
+    if mode != MODE_FULL and limit > REDUCED_BOOK_LIMIT:
+        _apply(mode, "book_limit")
+        return REDUCED_BOOK_LIMIT
+    return limit
+
+
+def lexical_only() -> bool:
+    """임베딩/벡터 검색을 건너뛰고 키워드 검색만 할지 (minimal)"""
+    if current_mode() == MODE_MINIMAL:
+        _apply(MODE_MINIMAL, "lexical_only")
+        return True
+    return False
+
+
+def allow_search() -> bool:
+    """
+    도구 호출을 실제로 실행할지 여부
+
+    첫 검색은 항상 실행하고, reduced 이상에서는 쿼리를 바꿔 가며 다시 검색하는 것을 생략합니다.
+    """
+    trace = current_trace()
+    if trace is None:
+        return True
+    trace.search_calls += 1
+    mode = current_mode()
+    if trace.search_calls > 1 and mode != MODE_FULL:
+        _apply(mode, "skip_variations")
+        return False
+    return True
+
+
+def cap_context(text: str) -> str:
+    """도구 출력(LLM 컨텍스트) 길이 제한 (reduced 이상)"""
+    mode = current_mode()
+    if mode == MODE_FULL:
+        return text
+    limit = settings.degraded_context_chars
+    if mode == MODE_MINIMAL:
+        limit //= 2
+    if len(text) <= limit:
+        return text
+    _apply(mode, "context_cap")
+    # 구절 단위로 자르기 (마지막 구절이 중간에 잘리지 않도록)
+    cut = text.rfind("\n\n", 0, limit)
+    return text[:cut if cut > 0 else limit]
+
+
+def generation_model() -> Optional[str]:
+    """생성에 사용할 모델 (minimal이면 빠른 모델, 아니면 None = 기본 모델)"""
+    if current_mode() == MODE_MINIMAL and settings.fast_llm_model and settings.fast_llm_model != settings.llm_model:
+        _apply(MODE_MINIMAL, "fast_model")
+        return settings.fast_llm_model
+    return None
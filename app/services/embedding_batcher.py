@@ -0,0 +1,146 @@
+"""쿼리 임베딩 마이크로 배치
+
+동시에 들어온 쿼리 임베딩 요청을 몇 ms 동안(또는 배치 크기가 찰 때까지) 모아
+임베딩 API를 한 번만 호출하고, 각 호출자에게 자기 벡터를 돌려줍니다.
+요청마다 HTTP 왕복과 요청 수 한도(quota)를 쓰지 않으므로 피크 시 처리량이 늘어납니다.
+
+- 배치는 워커 프로세스 단위로 모읍니다.
+- 배치 호출은 별도 스레드 풀에서 실행하므로, 한 배치가 API를 기다리는 동안
+  다음 배치를 계속 모을 수 있습니다.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.services.providers import get_query_embeddings
+from app.services.telemetry import metrics
+
+
+EMBEDDING_BATCH_SIZE = metrics.histogram(
+    "bible_qa_embedding_batch_size",
+    "임베딩 API 호출 1회에 담긴 쿼리 수",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 100)
+)
+EMBEDDING_BATCH_WAIT = metrics.histogram(
+    "bible_qa_embedding_batch_wait_seconds",
+    "요청이 배치에 담겨 API 호출이 시작될 때까지 기다린 시간",
+    buckets=(0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+)
+EMBEDDING_BATCH_ERRORS = metrics.counter(
+    "bible_qa_embedding_batch_errors_total",
+    "실패한 임베딩 배치 호출 수"
+)
+
+
+class _Pending:
+    """배치를 기다리는 임베딩 요청 하나"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.enqueued_at = time.monotonic()
+        self.done = threading.Event()
+        self.vector: Optional[List[float]] = None
+        self.error: Optional[BaseException] = None
+
+
+class EmbeddingBatcher:
+    """동시 쿼리 임베딩 요청을 모아 한 번에 호출 (스레드 안전)"""
+
+    def __init__(self):
+        """초기화"""
+        self.max_size = max(1, min(settings.embedding_batch_max_size, 100))  # Gemini 배치 상한 100
+        self.max_wait = settings.embedding_batch_max_wait_ms / 1000
+        self._pending: List[_Pending] = []
+        self._condition = threading.Condition()
+        self._collector: Optional[threading.Thread] = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.embedding_batch_concurrency,
+            thread_name_prefix="embedding-batch"
+        )
+
+    def embed(self, text: str) -> List[float]:
+        """
+        쿼리 하나의 임베딩을 반환합니다 (다른 요청과 같은 배치로 호출될 수 있음).
+
+        Raises:
+            배치 호출이 실패하면 그 예외를 그대로 전달
+        """
+        if not settings.embedding_batching_enabled:
+            return self._embed_one(text)
+
+        pending = _Pending(text)
+        with self._condition:
+            self._ensure_collector()
+            self._pending.append(pending)
+            self._condition.notify()
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.vector
+
+    def _ensure_collector(self) -> None:
+        if self._collector is None or not self._collector.is_alive():
+            self._collector = threading.Thread(
+                target=self._collect_loop,
+                name="embedding-batch-collector",
+                daemon=True
+            )
+            self._collector.start()
+
+    def _collect_loop(self) -> None:
+        """첫 요청이 들어온 뒤 max_wait 동안(또는 max_size가 찰 때까지) 모아 배치로 넘김"""
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                deadline = self._pending[0].enqueued_at + self.max_wait
+                while len(self._pending) < self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch = self._pending[:self.max_size]
+                del self._pending[:self.max_size]
+            self._executor.submit(self._run_batch, batch)
+
+    def _run_batch(self, batch: List[_Pending]) -> None:
+        """배치 하나를 임베딩 API 한 번으로 처리"""
+        started_at = time.monotonic()
+        for pending in batch:
+            EMBEDDING_BATCH_WAIT.observe(started_at - pending.enqueued_at)
+
+        # 같은 배치 안의 중복 텍스트는 한 번만 요청
+        texts = list(dict.fromkeys(pending.text for pending in batch))
+        EMBEDDING_BATCH_SIZE.observe(len(texts))
+        try:
+            if len(texts) == 1:
+                vectors = [self._embed_one(texts[0])]
+            else:
+                vectors = get_query_embeddings().embed_documents(
+                    texts,
+                    task_type="RETRIEVAL_QUERY",
+                    output_dimensionality=settings.embedding_dimension
+                )
+            by_text: Dict[str, List[float]] = dict(zip(texts, vectors))
+            for pending in batch:
+                pending.vector = by_text[pending.text]
+        except Exception as e:
+            EMBEDDING_BATCH_ERRORS.inc()
+            print(f"임베딩 배치 오류 ({len(texts)}개): {str(e)}")
+            for pending in batch:
+                pending.error = e
+        finally:
+            for pending in batch:
+                pending.done.set()
+
+    def _embed_one(self, text: str) -> List[float]:
+        return get_query_embeddings().embed_query(
+            text,
+            output_dimensionality=settings.embedding_dimension
+        )
+
+
+# 싱글톤 인스턴스
+embedding_batcher = EmbeddingBatcher()
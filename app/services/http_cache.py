@@ -0,0 +1,91 @@
+"""HTTP 조건부 요청(ETag / Last-Modified) 처리
+
+대화 목록과 메시지 조회는 프론트엔드가 화면을 옮길 때마다 다시 요청하지만 대부분 바뀐 것이
+없습니다. 응답에 버전(대화의 updated_at, 마지막 메시지 id 등)에서 만든 ETag를 붙이고,
+요청의 If-None-Match(없으면 If-Modified-Since)가 현재 버전과 같으면 본문 조회와 직렬화 없이
+304로 응답합니다.
+
+ETag는 약한 검증자(W/)를 씁니다. 같은 내용이라도 gzip 압축 여부에 따라 바이트가 달라지기 때문입니다.
+"""
+import hashlib
+import re
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+
+
+# Python 3.10의 fromisoformat은 소수점 이하 3/6자리만 읽으므로 DB 값(1~6자리)을 6자리로 맞춤
+_FRACTION_PATTERN = re.compile(r"\.(\d{1,6})\d*")
+
+# 다시 검증해야 하는 응답 (대화 목록, 대화의 메시지 목록, 스트리밍 중인 메시지)
+CACHE_REVALIDATE = "private, no-cache"
+# 더 이상 바뀌지 않는 응답 (완료된 개별 메시지)
+CACHE_IMMUTABLE = "private, max-age=31536000, immutable"
+
+
+def make_etag(*parts: Any) -> str:
+    """버전 정보로 약한 ETag 생성"""
+    digest = hashlib.sha1(orjson.dumps(parts, option=orjson.OPT_SORT_KEYS)).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """DB 타임스탬프 문자열(ISO 8601) → UTC datetime (형식이 다르면 None)"""
+    if not value:
+        return None
+    try:
+        normalized = _FRACTION_PATTERN.sub(lambda match: "." + match.group(1).ljust(6, "0"), value.replace("Z", "+00:00"), count=1)
+        parsed = datetime.fromisoformat(normalized)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match 값과 비교 (약한 비교: W/ 접두사 무시)"""
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """요청의 검증자가 현재 버전과 같은지 (If-None-Match가 있으면 If-Modified-Since는 무시)"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # HTTP 날짜는 초 단위
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def cache_headers(etag: str, last_modified: Optional[datetime] = None, cache_control: str = CACHE_REVALIDATE) -> Dict[str, str]:
+    """응답에 붙일 검증자/캐시 헤더"""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    return headers
+
+
+def not_modified_response(headers: Dict[str, str]) -> Response:
+    """304 응답 (본문 없음)"""
+    return Response(status_code=304, headers=headers)
+
+
+def json_response(payload: Any, headers: Dict[str, str]) -> Response:
+    """orjson으로 직렬화한 JSON 응답"""
+    return Response(content=orjson.dumps(payload), media_type="application/json", headers=headers)
@@ -0,0 +1,183 @@
+"""요청 단위 프로파일링 서비스
+
+관리자 헤더(X-Profile) 또는 전역 샘플링 비율로 선택된 요청만 프로파일링하고,
+결과를 로컬 디스크의 고정 크기 링 버퍼에 저장합니다.
+
+프로파일러는 별도 스레드에서 sys._current_frames()로 모든 스레드의 스택을
+주기적으로 샘플링합니다. 에이전트 루프(이벤트 루프)와 to_thread / 도구 실행
+스레드를 함께 볼 수 있으며, 결과는 collapsed stack(.folded) 형식이라
+speedscope나 flamegraph.pl로 바로 플레임 그래프를 그릴 수 있습니다.
+비활성화 상태에서는 샘플러 스레드가 만들어지지 않으므로 오버헤드가 없습니다.
+
+프로파일은 요청 단위가 아니라 그 요청이 실행되는 동안의 프로세스 전체 프로파일입니다.
+이벤트 루프와 스레드 풀은 요청끼리 공유하므로 스레드로 요청을 구분할 수 없고, 동시에 처리된
+다른 요청과 추측 검색/임베딩 배치 스레드의 스택도 함께 들어갑니다. 한 요청만 보려면 부하가 없을 때
+X-Profile로 측정하세요. (다른 프로파일러의 샘플러 스레드만 제외합니다.)
+"""
+import hmac
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, List, Dict, Any
+from uuid import uuid4
+
+from app.config import settings
+
+
+# 다운로드 허용 파일명 (경로 조작 방지)
+ARTIFACT_NAME_PATTERN = re.compile(r'^[0-9]{8}T[0-9]{6}_[a-z_]+_[0-9a-f]{8}\.folded$')
+
+# 대기 중인 스레드(스레드 풀 유휴 워커, 이벤트 루프 select 등)는 샘플에서 제외
+IDLE_LEAF_FUNCTIONS = {"wait", "select", "poll", "get", "_wait_for_tstate_lock", "_worker"}
+
+# 샘플러 스레드 이름 접두사 (동시에 실행 중인 다른 프로파일러는 샘플에서 제외)
+SAMPLER_THREAD_PREFIX = "profiler-"
+
+# 스택 최대 깊이
+MAX_STACK_DEPTH = 128
+
+
+class RequestProfiler:
+    """한 요청이 실행되는 동안 프로세스의 모든 스레드 스택을 샘플링하는 프로파일러 (start/stop 쌍으로 사용)"""
+
+    def __init__(self, service: "ProfilingService", endpoint: str, interval: float):
+        self.service = service
+        self.endpoint = endpoint
+        self.interval = interval
+        self.name = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}_{endpoint}_{uuid4().hex[:8]}"
+        self.samples: Counter = Counter()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_at = 0.0
+
+    def start(self) -> None:
+        """샘플링 시작"""
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name=f"{SAMPLER_THREAD_PREFIX}{self.name}", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        thread_names = {}
+        while not self._stop_event.wait(self.interval):
+            frames = sys._current_frames()
+            if any(thread_id not in thread_names for thread_id in frames):
+                thread_names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in frames.items():
+                if thread_names.get(thread_id, "").startswith(SAMPLER_THREAD_PREFIX):
+                    continue
+                if frame.f_code.co_name in IDLE_LEAF_FUNCTIONS:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(thread_names.get(thread_id, str(thread_id)))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self) -> Optional[str]:
+        """
+        샘플링 종료 후 결과 저장 (저장된 파일명 반환)
+
+        샘플러 스레드 join과 파일 쓰기로 블로킹되므로 이벤트 루프에서는 asyncio.to_thread로 호출합니다.
+        """
+        if self._thread is None:
+            return None
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        try:
+            path = self.service.artifact_dir / f"{self.name}.folded"
+            lines = [f"{stack} {count}" for stack, count in self.samples.most_common()]
+            path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+            print(
+                f"프로파일 저장: {path.name} "
+                f"({time.perf_counter() - self._started_at:.2f}s, 샘플 {sum(self.samples.values())}개)"
+            )
+            self.service.enforce_limit()
+            return path.name
+        except Exception as e:
+            print(f"프로파일 저장 오류: {e}")
+            return None
+
+
+class ProfilingService:
+    """프로파일링 대상 선택 및 결과 보관 관리"""
+
+    def __init__(self):
+        """초기화"""
+        self.artifact_dir = Path(settings.profile_dir)
+        self.max_artifacts = settings.profile_max_artifacts
+        self.sample_rate = settings.profile_sample_rate
+        self.interval = settings.profile_interval_ms / 1000
+        self._lock = threading.Lock()
+
+    def should_profile(self, profile_header: Optional[str]) -> bool:
+        """
+        이 요청을 프로파일링할지 결정합니다.
+
+        Args:
+            profile_header: X-Profile 헤더 값 (관리자 토큰과 일치해야 함)
+
+        Returns:
+            프로파일링 여부
+        """
+        if profile_header and settings.admin_token:
+            # 바이트로 비교 (str끼리 비교하면 ASCII가 아닌 헤더 값에서 TypeError)
+            if hmac.compare_digest(profile_header.encode(), settings.admin_token.encode()):
+                return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self, endpoint: str) -> RequestProfiler:
+        """새 프로파일러를 만들어 시작"""
+        self.artifact_dir.mkdir(parents=True, exist_ok=True)
+        profiler = RequestProfiler(self, endpoint, self.interval)
+        profiler.start()
+        return profiler
+
+    def _artifacts(self) -> List[Path]:
+        if not self.artifact_dir.exists():
+            return []
+        return sorted(
+            (p for p in self.artifact_dir.iterdir() if ARTIFACT_NAME_PATTERN.match(p.name)),
+            key=lambda p: p.name,
+            reverse=True
+        )
+
+    def enforce_limit(self) -> None:
+        """보관 개수를 넘는 오래된 프로파일 삭제 (링 버퍼)"""
+        with self._lock:
+            for path in self._artifacts()[self.max_artifacts:]:
+                try:
+                    path.unlink()
+                except OSError as e:
+                    print(f"프로파일 삭제 오류: {e}")
+
+    def list_artifacts(self) -> List[Dict[str, Any]]:
+        """저장된 프로파일 목록 (최신순)"""
+        artifacts = []
+        for path in self._artifacts():
+            stat = path.stat()
+            artifacts.append({
+                "name": path.name,
+                "format": "folded",
+                "size": stat.st_size,
+                "created_at": datetime.utcfromtimestamp(stat.st_mtime).isoformat(),
+            })
+        return artifacts
+
+    def get_artifact_path(self, name: str) -> Optional[Path]:
+        """다운로드할 프로파일 경로 (이름이 유효하지 않거나 없으면 None)"""
+        if not ARTIFACT_NAME_PATTERN.match(name):
+            return None
+        path = self.artifact_dir / name
+        return path if path.is_file() else None
+
+
+# 싱글톤 인스턴스
+profiling_service = ProfilingService()
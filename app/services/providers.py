@@ -0,0 +1,87 @@
+"""외부 서비스 클라이언트 레지스트리
+
+Supabase 클라이언트, Gemini 임베딩/LLM은 처음 사용할 때 한 번만 생성하여
+모든 서비스가 공유합니다. 무거운 SDK 임포트도 이 시점까지 미루므로
+앱 임포트와 /healthz 응답이 빨라집니다 (Render 콜드 스타트 대응).
+"""
+import os
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from app.config import settings
+
+
+_instances: Dict[str, Any] = {}
+_lock = threading.RLock()
+
+
+def _get_or_create(key: str, factory: Callable[[], Any]) -> Any:
+    """key에 해당하는 인스턴스를 반환 (없으면 factory로 생성, 스레드 안전)"""
+    instance = _instances.get(key)
+    if instance is not None:
+        return instance
+    with _lock:
+        instance = _instances.get(key)
+        if instance is None:
+            instance = factory()
+            _instances[key] = instance
+        return instance
+
+
+def _ensure_google_api_key() -> None:
+    # Google API 키 환경변수 설정 (langchain-google-genai가 자동으로 사용)
+    if settings.google_api_key:
+        os.environ["GOOGLE_API_KEY"] = settings.google_api_key
+
+
+def get_supabase():
+    """공유 Supabase 클라이언트"""
+    def create():
+        from supabase import create_client
+        return create_client(settings.supabase_url, settings.supabase_key)
+    return _get_or_create("supabase", create)
+
+
+def get_query_embeddings():
+    """공유 쿼리용 임베딩 모델 (Gemini, RETRIEVAL_QUERY)"""
+    def create():
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+        _ensure_google_api_key()
+        return GoogleGenerativeAIEmbeddings(
+            model=settings.embedding_model,
+            task_type="RETRIEVAL_QUERY"
+        )
+    return _get_or_create("query_embeddings", create)
+
+
+def get_llm(model: Optional[str] = None):
+    """공유 LLM (Gemini). model을 지정하지 않으면 settings.llm_model 사용"""
+    model_name = model or settings.llm_model
+
+    def create():
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        _ensure_google_api_key()
+        return ChatGoogleGenerativeAI(
+            model=model_name,
+            temperature=0.7,
+            google_api_key=settings.google_api_key
+        )
+    return _get_or_create(f"llm:{model_name}", create)
+
+
+def get_or_create(key: str, factory: Callable[[], Any]) -> Any:
+    """다른 모듈의 지연 생성 객체(에이전트 등)도 같은 레지스트리에서 관리"""
+    return _get_or_create(key, factory)
+
+
+def is_initialized(key: str) -> bool:
+    """해당 객체가 이미 생성되었는지 여부"""
+    return key in _instances
+
+
+def warm_up() -> None:
+    """클라이언트와 에이전트를 미리 생성 (lifespan에서 백그라운드로 호출)"""
+    from app.langgraph.graph import get_agent
+    get_supabase()
+    get_query_embeddings()
+    get_agent()
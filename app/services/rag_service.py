@@ -1,42 +1,35 @@
 """RAG 서비스 로직"""
-from typing import List, Dict, Optional
-from supabase import create_client, Client
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
+from typing import List, Dict, Optional, Tuple
 from app.config import settings
+from app.services.providers import get_supabase, get_query_embeddings, get_llm
+from app.services import vector_search
 import json
 
 
 class RAGService:
-    """RAG 서비스 클래스"""
+    """RAG 서비스 클래스 (클라이언트는 공유 레지스트리에서 첫 사용 시 생성)"""
     
     def __init__(self):
         """초기화"""
-        self.supabase: Client = create_client(
-            settings.supabase_url,
-            settings.supabase_key
-        )
         self.embedding_model = settings.embedding_model
         self.llm_model = settings.llm_model
-        
-        # Google API 키 환경변수 설정 (langchain-google-genai가 자동으로 사용)
-        import os
-        os.environ["GOOGLE_API_KEY"] = settings.google_api_key
-        
-        # Google Generative AI 임베딩 모델 초기화 (쿼리용)
-        self.query_embeddings = GoogleGenerativeAIEmbeddings(
-            model=self.embedding_model,
-            task_type="RETRIEVAL_QUERY"
-        )
-        
-        # Google Generative AI LLM 초기화
-        self.llm = ChatGoogleGenerativeAI(
-            model=self.llm_model,
-            temperature=0.7,
-            google_api_key=settings.google_api_key
-        )
-        
         self.settings = settings  # settings 참조 저장
     
+    @property
+    def supabase(self):
+        """공유 Supabase 클라이언트"""
+        return get_supabase()
+    
+    @property
+    def query_embeddings(self):
+        """공유 쿼리용 임베딩 모델"""
+        return get_query_embeddings()
+    
+    @property
+    def llm(self):
+        """공유 LLM (Gemini)"""
+        return get_llm(self.llm_model)
+    
     def get_embedding(self, text: str) -> List[float]:
         """텍스트를 임베딩으로 변환 (쿼리용)"""
         try:
@@ -51,22 +44,32 @@ class RAGService:
     def search_similar_documents(
         self,
         query: str,
-        limit: int = 5
+        limit: int = 5,
+        books: Optional[List[str]] = None,
+        chapter_range: Optional[Tuple[int, int]] = None,
+        translation: Optional[str] = None
     ) -> List[Dict]:
-        """유사한 문서 검색"""
-        query_embedding = self.get_embedding(query)
+        """
+        유사한 문서 검색
         
-        # Supabase 벡터 검색
-        response = self.supabase.rpc(
-            'match_documents',
-            {
-                'query_embedding': query_embedding,
-                'match_threshold': 0.7,
-                'match_count': limit
-            }
-        ).execute()
+        Args:
+            query: 검색 쿼리
+            limit: 최대 결과 수
+            books: 검색할 책 이름 목록 (None이면 전체)
+            chapter_range: 검색할 장 범위 (시작, 끝) (None이면 전체)
+            translation: 검색할 번역본 코드 (None이면 기본 번역본)
+        """
+        query_embedding = self.get_embedding(query)
         
-        return response.data if response.data else []
+        # Supabase 벡터 검색 (범위가 있으면 DB에서 먼저 좁힘)
+        return vector_search.match_documents(
+            query_embedding,
+            self.settings.rag_match_threshold,
+            limit,
+            books=books,
+            chapter_range=chapter_range,
+            translation=translation
+        )
     
     def generate_answer(
         self,
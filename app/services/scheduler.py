@@ -0,0 +1,170 @@
+"""LLM 실행 동시성 제어 (admission control)
+
+에이전트/LLM 실행 전에 슬롯을 받아야 합니다.
+
+- 동시에 실행할 수 있는 수(llm_max_concurrency)를 넘으면 대기열에서 기다립니다.
+- 대기열은 우선순위(스트리밍 > 일반, 진행 중인 대화 > 새 대화) 순으로 처리합니다.
+- 대기열이 가득 찼거나 마감 시간 안에 슬롯을 받지 못하면 곧바로 거절하고
+  Retry-After로 다시 시도할 시간을 알려 줍니다 (모두가 함께 느려지는 것보다 일부를 빨리 거절).
+"""
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from typing import List, Optional, Tuple
+
+from app.config import settings
+from app.services.telemetry import metrics, trace_span
+
+
+LLM_INFLIGHT = metrics.gauge(
+    "bible_qa_llm_inflight",
+    "실행 중인 LLM 작업 수"
+)
+LLM_QUEUE_DEPTH = metrics.gauge(
+    "bible_qa_llm_queue_depth",
+    "LLM 슬롯을 기다리는 요청 수"
+)
+LLM_QUEUE_WAIT = metrics.histogram(
+    "bible_qa_llm_queue_wait_seconds",
+    "LLM 슬롯 대기 시간",
+    labelnames=("priority",)
+)
+LLM_REJECTED = metrics.counter(
+    "bible_qa_llm_rejected_total",
+    "과부하로 거절된 요청 수",
+    labelnames=("reason",)
+)
+
+# 우선순위 (숫자가 작을수록 먼저 처리)
+PRIORITY_STREAM_CONVERSATION = 0
+PRIORITY_STREAM = 1
+PRIORITY_CONVERSATION = 2
+PRIORITY_DEFAULT = 3
+
+
+def request_priority(streaming: bool, has_conversation: bool) -> int:
+    """요청 종류에 따른 우선순위"""
+    if streaming:
+        return PRIORITY_STREAM_CONVERSATION if has_conversation else PRIORITY_STREAM
+    return PRIORITY_CONVERSATION if has_conversation else PRIORITY_DEFAULT
+
+
+class SchedulerOverloaded(Exception):
+    """과부하로 요청을 받을 수 없음"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"서버가 혼잡합니다. {retry_after}초 후 다시 시도해 주세요.")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class LLMSlot:
+    """획득한 실행 슬롯 (release는 여러 번 호출해도 한 번만 반영)"""
+
+    def __init__(self, scheduler: "LLMScheduler"):
+        self.scheduler = scheduler
+        self.acquired_at = time.monotonic()
+        self.released = False
+
+    def release(self) -> None:
+        """슬롯 반납"""
+        if not self.released:
+            self.released = True
+            self.scheduler._release(time.monotonic() - self.acquired_at)
+
+
+class LLMScheduler:
+    """우선순위 대기열이 있는 LLM 동시성 제한기 (워커 프로세스 단위)"""
+
+    def __init__(self):
+        """초기화"""
+        self.max_concurrency = settings.llm_max_concurrency
+        self.max_queue = settings.llm_queue_size
+        self.queue_timeout = settings.llm_queue_timeout_seconds
+        self.inflight = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        # 슬롯 점유 시간 이동 평균 (Retry-After 추정용)
+        self._avg_hold = 5.0
+
+    @property
+    def queue_depth(self) -> int:
+        """대기 중인 요청 수"""
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    def retry_after(self) -> int:
+        """대기열이 비워질 때까지 걸릴 예상 시간 (초, 최소 1)"""
+        rounds = (self.queue_depth + 1) / max(1, self.max_concurrency)
+        return max(1, math.ceil(rounds * self._avg_hold))
+
+    async def acquire(self, priority: int = PRIORITY_DEFAULT, timeout: Optional[float] = None) -> LLMSlot:
+        """
+        실행 슬롯을 받습니다.
+
+        Args:
+            priority: 우선순위 (request_priority 참고)
+            timeout: 대기 마감 시간(초), None이면 llm_queue_timeout_seconds
+
+        Raises:
+            SchedulerOverloaded: 대기열이 가득 찼거나 마감 시간 안에 슬롯을 받지 못한 경우
+        """
+        if self.inflight < self.max_concurrency and self.queue_depth == 0:
+            self._waiters.clear()
+            self._set_inflight(self.inflight + 1)
+            LLM_QUEUE_WAIT.observe(0.0, priority=str(priority))
+            return LLMSlot(self)
+
+        if self.queue_depth >= self.max_queue:
+            LLM_REJECTED.inc(reason="queue_full")
+            raise SchedulerOverloaded("queue_full", self.retry_after())
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        LLM_QUEUE_DEPTH.set(self.queue_depth)
+        started_at = time.monotonic()
+        try:
+            with trace_span("queue_wait", priority=priority):
+                await asyncio.wait_for(asyncio.shield(future), self.queue_timeout if timeout is None else timeout)
+        except asyncio.TimeoutError:
+            if not self._abandon(future):
+                return LLMSlot(self)
+            LLM_REJECTED.inc(reason="deadline")
+            raise SchedulerOverloaded("deadline", self.retry_after())
+        except asyncio.CancelledError:
+            # 기다리던 클라이언트가 떠난 경우 (이미 슬롯을 받았으면 반납)
+            if not self._abandon(future):
+                self._release(0.0)
+            raise
+        finally:
+            LLM_QUEUE_WAIT.observe(time.monotonic() - started_at, priority=str(priority))
+            LLM_QUEUE_DEPTH.set(self.queue_depth)
+        return LLMSlot(self)
+
+    def _abandon(self, future: asyncio.Future) -> bool:
+        """대기 취소 (이미 슬롯이 넘어온 경우 False)"""
+        if future.done():
+            return False
+        future.cancel()
+        return True
+
+    def _release(self, held: float) -> None:
+        if held > 0:
+            self._avg_hold = self._avg_hold * 0.9 + held * 0.1
+        # 슬롯을 그대로 다음 대기자에게 넘김 (inflight 수는 유지)
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                LLM_QUEUE_DEPTH.set(self.queue_depth)
+                return
+        self._set_inflight(self.inflight - 1)
+
+    def _set_inflight(self, value: int) -> None:
+        self.inflight = value
+        LLM_INFLIGHT.set(value)
+
+
+# 싱글톤 인스턴스
+llm_scheduler = LLMScheduler()
@@ -0,0 +1,239 @@
+"""워커 간 공유 캐시
+
+`uvicorn --workers N`으로 띄우면 워커마다 메모리 캐시를 따로 가지므로 메모리는 N배가 되고,
+한 워커에서 적중한 결과를 다른 워커는 쓰지 못합니다. 이 모듈은 같은 호스트의 워커들이
+함께 여는 로컬 SQLite 파일(WAL 모드)에 캐시를 두어, 캐시 데이터는 OS 페이지 캐시에
+한 번만 올라가고 모든 워커가 같은 항목을 읽습니다.
+
+- 값은 만료 시간(TTL)과 함께 저장하며, 만료된 항목은 읽을 때 무시하고 쓸 때 주기적으로 정리합니다.
+- 캐시별 최대 항목 수를 넘으면 가장 오래 전에 쓴 항목부터 지웁니다.
+- 캐시 오류(파일 잠금 등)는 요청을 실패시키지 않고 캐시 미스로 처리합니다.
+"""
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Any, Callable, List, Optional
+
+import orjson
+
+from app.config import settings
+from app.services.telemetry import metrics, record_cache
+
+
+SHARED_CACHE_ENTRIES = metrics.gauge(
+    "bible_qa_shared_cache_entries",
+    "워커 간 공유 캐시 항목 수",
+    labelnames=("cache",)
+)
+SHARED_CACHE_FILE_BYTES = metrics.gauge(
+    "bible_qa_shared_cache_file_bytes",
+    "워커 간 공유 캐시 파일 크기"
+)
+
+# 쓰기 몇 번마다 만료/초과 항목을 정리할지
+_PRUNE_EVERY = 100
+
+_local = threading.local()
+_schema_lock = threading.Lock()
+_schema_ready = False
+_caches: List["SharedCache"] = []
+
+
+def _connection() -> sqlite3.Connection:
+    """스레드별 SQLite 연결 (처음 열 때 테이블 생성)"""
+    global _schema_ready
+    connection = getattr(_local, "connection", None)
+    if connection is None:
+        directory = os.path.dirname(settings.shared_cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(settings.shared_cache_path, timeout=1.0, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        with _schema_lock:
+            if not _schema_ready:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS cache_entries ("
+                    " cache TEXT NOT NULL,"
+                    " key TEXT NOT NULL,"
+                    " value BLOB NOT NULL,"
+                    " expires_at REAL NOT NULL,"
+                    " written_at REAL NOT NULL,"
+                    " PRIMARY KEY (cache, key))"
+                )
+                _schema_ready = True
+        _local.connection = connection
+    return connection
+
+
+def encode_json(value: Any) -> bytes:
+    """JSON 직렬화 (기본값)"""
+    return orjson.dumps(value)
+
+
+def encode_vector(value: List[float]) -> bytes:
+    """임베딩 벡터는 float32 바이트로 저장 (JSON 대비 약 1/5 크기)"""
+    return array("f", value).tobytes()
+
+
+def decode_vector(data: bytes) -> List[float]:
+    """encode_vector의 역변환"""
+    vector = array("f")
+    vector.frombytes(data)
+    return vector.tolist()
+
+
+class SharedCache:
+    """이름 공간 하나의 워커 간 공유 캐시"""
+
+    def __init__(
+        self,
+        name: str,
+        ttl_seconds: float,
+        max_entries: int,
+        encode: Callable[[Any], bytes] = encode_json,
+        decode: Callable[[bytes], Any] = orjson.loads
+    ):
+        """
+        Args:
+            name: 캐시 이름 (메트릭의 cache 라벨은 shared_{name})
+            ttl_seconds: 항목 유지 시간 (0 이하이면 캐시 비활성화)
+            max_entries: 최대 항목 수
+            encode/decode: 값 직렬화 함수
+        """
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.encode = encode
+        self.decode = decode
+        self._writes = 0
+        _caches.append(self)
+
+    @property
+    def enabled(self) -> bool:
+        return settings.shared_cache_enabled and self.ttl_seconds > 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """캐시된 값 (없거나 만료되었거나 오류면 None)"""
+        if not self.enabled:
+            return None
+        try:
+            row = _connection().execute(
+                "SELECT value FROM cache_entries WHERE cache = ? AND key = ? AND expires_at > ?",
+                (self.name, key, time.time())
+            ).fetchone()
+        except (OSError, sqlite3.Error) as e:
+            print(f"공유 캐시 조회 오류 ({self.name}): {str(e)}")
+            row = None
+        record_cache(f"shared_{self.name}", row is not None)
+        return self.decode(row[0]) if row is not None else None
+
+    def set(self, key: str, value: Any) -> None:
+        """값 저장 (오류는 무시)"""
+        if not self.enabled:
+            return
+        now = time.time()
+        try:
+            connection = _connection()
+            connection.execute(
+                "INSERT OR REPLACE INTO cache_entries (cache, key, value, expires_at, written_at) VALUES (?, ?, ?, ?, ?)",
+                (self.name, key, self.encode(value), now + self.ttl_seconds, now)
+            )
+            self._writes += 1
+            if self._writes % _PRUNE_EVERY == 0:
+                self._prune(connection, now)
+        except (OSError, sqlite3.Error) as e:
+            print(f"공유 캐시 저장 오류 ({self.name}): {str(e)}")
+
+    def add(self, key: str, value: Any) -> bool:
+        """
+        없거나 만료된 경우에만 값 저장 (워커 간 원자적 선점용)
+
+        Returns:
+            이번 호출이 값을 저장했으면 True (이미 유효한 값이 있거나 오류면 False)
+        """
+        if not self.enabled:
+            return False
+        now = time.time()
+        try:
+            cursor = _connection().execute(
+                "INSERT INTO cache_entries (cache, key, value, expires_at, written_at) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (cache, key) DO UPDATE SET"
+                " value = excluded.value, expires_at = excluded.expires_at, written_at = excluded.written_at"
+                " WHERE cache_entries.expires_at <= ?",
+                (self.name, key, self.encode(value), now + self.ttl_seconds, now, now)
+            )
+            return cursor.rowcount == 1
+        except (OSError, sqlite3.Error) as e:
+            print(f"공유 캐시 저장 오류 ({self.name}): {str(e)}")
+            return False
+
+    def _prune(self, connection: sqlite3.Connection, now: float) -> None:
+        """만료 항목과 최대 항목 수를 넘는 오래된 항목 삭제"""
+        connection.execute(
+            "DELETE FROM cache_entries WHERE cache = ? AND expires_at <= ?",
+            (self.name, now)
+        )
+        connection.execute(
+            "DELETE FROM cache_entries WHERE cache = ? AND key NOT IN ("
+            " SELECT key FROM cache_entries WHERE cache = ? ORDER BY written_at DESC LIMIT ?)",
+            (self.name, self.name, self.max_entries)
+        )
+
+    def count(self) -> int:
+        """현재 항목 수 (만료 포함)"""
+        row = _connection().execute(
+            "SELECT COUNT(*) FROM cache_entries WHERE cache = ?", (self.name,)
+        ).fetchone()
+        return row[0]
+
+
+def report_sizes() -> None:
+    """공유 캐시 항목 수와 파일 크기를 메트릭에 반영 (/metrics 렌더링 직전에 호출)"""
+    if not settings.shared_cache_enabled:
+        return
+    try:
+        for cache in _caches:
+            SHARED_CACHE_ENTRIES.set(cache.count(), cache=cache.name)
+        size = sum(
+            os.path.getsize(path)
+            for path in (settings.shared_cache_path, settings.shared_cache_path + "-wal")
+            if os.path.exists(path)
+        )
+        SHARED_CACHE_FILE_BYTES.set(size)
+    except (OSError, sqlite3.Error) as e:
+        print(f"공유 캐시 통계 오류: {str(e)}")
+
+
+# 캐시 인스턴스
+embedding_cache = SharedCache(
+    "embedding",
+    settings.embedding_cache_ttl_seconds,
+    settings.shared_cache_max_entries,
+    encode=encode_vector,
+    decode=decode_vector
+)
+search_cache = SharedCache(
+    "search",
+    settings.search_cache_ttl_seconds,
+    settings.shared_cache_max_entries
+)
+answer_cache = SharedCache(
+    "answer",
+    settings.answer_cache_ttl_seconds,
+    settings.shared_cache_max_entries
+)
+# 대화별 버전(updated_at, 마지막 메시지 id)과 대화 목록 버전 (ETag 확인 시 DB 조회 생략, 쓰기 때마다 갱신)
+conversation_versions = SharedCache(
+    "conversation_version",
+    settings.conversation_version_ttl_seconds,
+    settings.shared_cache_max_entries
+)
+# 메시지 출처에 채우는 구절 본문 (출처 위치 → 미리보기)
+source_text_cache = SharedCache(
+    "source_text",
+    settings.source_text_cache_ttl_seconds,
+    settings.shared_cache_max_entries
+)
@@ -0,0 +1,101 @@
+"""동시 요청 합치기 (single-flight)
+
+같은 키로 동시에 들어온 호출은 먼저 온 호출(리더)만 실제로 실행하고,
+나머지(팔로워)는 그 결과를 기다려 함께 사용합니다. 완료되면 키를 바로 지우므로
+결과를 보관하는 캐시가 아니라 진행 중인 작업만 공유합니다.
+
+- SingleFlight: 스레드에서 실행되는 동기 함수용 (임베딩, 검색)
+- AsyncSingleFlight: 이벤트 루프의 코루틴용 (첫 턴 답변 생성)
+"""
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, Type
+
+from app.config import settings
+from app.services.telemetry import record_cache
+
+
+class _Call:
+    """진행 중인 호출 하나"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """같은 키의 동시 호출을 한 번의 실행으로 합침 (스레드 안전)"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable[[], Any], retry_on: Tuple[Type[BaseException], ...] = ()) -> Any:
+        """
+        key에 대한 진행 중인 호출이 있으면 그 결과를 기다리고, 없으면 func를 실행합니다.
+
+        Args:
+            key: 동일 요청 판별 키
+            func: 실제 작업
+            retry_on: 리더가 이 예외로 실패하면 팔로워가 직접 다시 시도
+                      (예: 리더의 스트림만 취소된 경우)
+        """
+        if not settings.single_flight_enabled:
+            return func()
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                is_leader = call is None
+                if is_leader:
+                    call = _Call()
+                    self._calls[key] = call
+
+            if is_leader:
+                record_cache(f"single_flight_{self.name}", False)
+                try:
+                    call.result = func()
+                except BaseException as e:
+                    call.error = e
+                    raise
+                finally:
+                    with self._lock:
+                        self._calls.pop(key, None)
+                    call.done.set()
+                return call.result
+
+            call.done.wait()
+            if call.error is not None and isinstance(call.error, retry_on):
+                continue
+            record_cache(f"single_flight_{self.name}", True)
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+
+class AsyncSingleFlight:
+    """같은 키의 동시 코루틴 실행을 하나의 태스크로 합침"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        key에 대한 진행 중인 태스크가 있으면 그 결과를 기다리고, 없으면 새로 시작합니다.
+        한 호출자가 취소되어도 공유 태스크는 취소되지 않습니다 (shield).
+        """
+        if not settings.single_flight_enabled:
+            return await factory()
+        task = self._tasks.get(key)
+        record_cache(f"single_flight_{self.name}", task is not None)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._tasks[key] = task
+
+            def forget(done_task: asyncio.Task) -> None:
+                if self._tasks.get(key) is done_task:
+                    del self._tasks[key]
+            task.add_done_callback(forget)
+        return await asyncio.shield(task)
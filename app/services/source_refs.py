@@ -0,0 +1,185 @@
+"""메시지 출처(sources)의 압축 저장과 조회 시 본문 채우기
+
+어시스턴트 메시지의 sources에 구절 본문(최대 200자)을 그대로 저장하면 메시지마다 말뭉치가
+복제됩니다. 저장할 때는 구절 위치만 남기고, 메시지 조회 API에서 bible_chunks(또는 공유 캐시)로
+본문을 다시 채워 이전과 같은 형식({book, chapter, verse, content})으로 돌려줍니다.
+
+저장 형식: {"translation": "krv", "book_no": 43, "chapter_no": 3, "verse_start": 16, "verse_end": 16}
+
+- 절 범위는 출처 표기의 "N절" 또는 본문의 "절:내용" 표시에서 읽으며, 읽지 못하면 장 전체(null)로 둡니다.
+- 책 이름을 알 수 없는 출처와 이전 형식(content 포함)으로 저장된 출처는 그대로 둡니다.
+"""
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.services.shared_cache import source_text_cache
+
+
+# 저장하는 출처 필드
+COMPACT_KEYS = ("translation", "book_no", "chapter_no", "verse_start", "verse_end")
+
+# 출처 미리보기 최대 길이
+SOURCE_PREVIEW_CHARS = 200
+
+# 청크 본문의 절 표시 ("16:하나님이 세상을...", 적재/평가 스크립트도 이 패턴을 사용)
+VERSE_MARKER_PATTERN = re.compile(r'(?:^|\s)(\d+):')
+
+# 한 장의 청크를 조회할 때의 최대 수
+_CHAPTER_ROW_LIMIT = 100
+
+
+def preview(content: str) -> str:
+    """출처 미리보기 (SOURCE_PREVIEW_CHARS자를 넘으면 자르고 ... 표시)"""
+    return content[:SOURCE_PREVIEW_CHARS] + "..." if len(content) > SOURCE_PREVIEW_CHARS else content
+
+
+def _verse_label(verse_start: Optional[int], verse_end: Optional[int]) -> str:
+    if verse_start is None:
+        return ""
+    if verse_end is None or verse_end == verse_start:
+        return str(verse_start)
+    return f"{verse_start}-{verse_end}"
+
+
+def describe_source(book: str, chapter: Optional[str], verse: Optional[str], content: str, translation: Optional[str] = None) -> Dict[str, Any]:
+    """
+    도구 출력에서 읽은 출처 하나를 응답 형식으로 변환 (표시용 필드 + 저장할 위치 필드)
+
+    Args:
+        book: 책 이름
+        chapter: 장 번호 문자열 (없으면 None)
+        verse: 출처 표기의 절 번호 (없으면 None → 본문의 절 표시에서 범위를 읽음)
+        content: 출처 본문 전체 (미리보기는 이 함수에서 자름)
+        translation: 번역본 코드 (None이면 settings.default_translation)
+    """
+    from app.langgraph.graph import KOREAN_BOOK_NAMES
+
+    source: Dict[str, Any] = {
+        "book": book,
+        "chapter": chapter or "",
+        "verse": verse or "",
+        "content": preview(content)
+    }
+    if book not in KOREAN_BOOK_NAMES or not (chapter or "").isdigit():
+        return source
+
+    if verse and verse.isdigit():
+        verse_start = verse_end = int(verse)
+    else:
+        verses = [int(number) for number in VERSE_MARKER_PATTERN.findall(content)]
+        verse_start, verse_end = (min(verses), max(verses)) if verses else (None, None)
+    source.update({
+        "verse": _verse_label(verse_start, verse_end),
+        "translation": translation or settings.default_translation,
+        "book_no": KOREAN_BOOK_NAMES.index(book) + 1,
+        "chapter_no": int(chapter),
+        "verse_start": verse_start,
+        "verse_end": verse_end
+    })
+    return source
+
+
+def is_compact(source: Dict[str, Any]) -> bool:
+    """본문 없이 위치만 저장된 출처인지"""
+    return "book_no" in source and "content" not in source
+
+
+def compact_sources(sources: Optional[List[Dict[str, Any]]]) -> Optional[List[Dict[str, Any]]]:
+    """저장용 출처 (위치를 아는 출처는 위치 필드만 남김)"""
+    if not sources:
+        return sources
+    return [
+        {key: source.get(key) for key in COMPACT_KEYS} if "book_no" in source else source
+        for source in sources
+    ]
+
+
+def _cache_key(source: Dict[str, Any]) -> str:
+    return f"{source.get('translation')}:{source['book_no']}:{source['chapter_no']}:{source.get('verse_start')}-{source.get('verse_end')}"
+
+
+def select_verses(rows: List[Dict[str, Any]], verse_start: Optional[int], verse_end: Optional[int]) -> str:
+    """
+    한 장의 청크(절 순서)에서 절 범위의 본문만 이어 붙임
+
+    청크 경계에서 겹치는 절(청크 오버랩)은 한 번만 넣습니다. 범위가 없으면 장 전체입니다.
+    """
+    text = " ".join(row.get("content", "") for row in rows)
+    markers = list(VERSE_MARKER_PATTERN.finditer(text))
+    if not markers:
+        return text.strip()
+    segments: Dict[int, str] = {}
+    for index, marker in enumerate(markers):
+        number = int(marker.group(1))
+        if verse_start is not None and not (verse_start <= number <= (verse_end or verse_start)):
+            continue
+        end = markers[index + 1].start() if index + 1 < len(markers) else len(text)
+        segments.setdefault(number, text[marker.start():end].strip())
+    return " ".join(segments[number] for number in sorted(segments))
+
+
+def _fetch_chapter(translation: Optional[str], book_no: int, chapter_no: int) -> List[Dict[str, Any]]:
+    from app.langgraph.graph import KOREAN_BOOK_NAMES, fetch_chapter_rows
+
+    rows = fetch_chapter_rows(KOREAN_BOOK_NAMES[book_no - 1], str(chapter_no), _CHAPTER_ROW_LIMIT, translation=translation)
+    # 텍스트 컬럼으로 조회한 경우(정수 참조 컬럼 없는 DB)에도 절 순서로
+    return sorted(rows, key=lambda row: row.get("verse_start") or 0)
+
+
+def hydrate_sources(sources_list: List[List[Dict[str, Any]]]) -> None:
+    """
+    위치만 저장된 출처에 본문과 표시용 필드를 채움 (제자리 수정)
+
+    공유 캐시에 없는 출처는 (번역본, 책, 장)마다 한 번씩 조회합니다.
+    조회에 실패한 출처는 본문 없이 위치 정보만 돌려줍니다.
+    """
+    from app.langgraph.graph import KOREAN_BOOK_NAMES
+
+    pending: Dict[Tuple[Optional[str], int, int], List[Dict[str, Any]]] = {}
+    for sources in sources_list:
+        for source in sources:
+            if not is_compact(source) or not 1 <= (source.get("book_no") or 0) <= len(KOREAN_BOOK_NAMES):
+                continue
+            source.update({
+                "book": KOREAN_BOOK_NAMES[source["book_no"] - 1],
+                "chapter": str(source["chapter_no"]),
+                "verse": _verse_label(source.get("verse_start"), source.get("verse_end"))
+            })
+            cached = source_text_cache.get(_cache_key(source))
+            if cached is not None:
+                source["content"] = cached
+                continue
+            pending.setdefault((source.get("translation"), source["book_no"], source["chapter_no"]), []).append(source)
+
+    for (translation, book_no, chapter_no), sources in pending.items():
+        try:
+            rows = _fetch_chapter(translation, book_no, chapter_no)
+        except Exception as e:
+            print(f"출처 본문 조회 오류: {str(e)}")
+            continue
+        for source in sources:
+            content = preview(select_verses(rows, source.get("verse_start"), source.get("verse_end")))
+            source["content"] = content
+            if content:
+                source_text_cache.set(_cache_key(source), content)
+
+
+def is_hydrated(messages: List[Dict[str, Any]]) -> bool:
+    """모든 위치 출처에 본문이 채워졌는지 (조회 실패로 빈 출처가 있으면 False → 응답을 오래 캐시하지 않음)"""
+    return not any(
+        "book_no" in source and not source.get("content")
+        for message in messages if isinstance(message.get("sources"), list)
+        for source in message["sources"]
+    )
+
+
+def hydrate_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """메시지 목록의 출처 본문 채우기 (조회 API 응답 직전에 호출)"""
+    sources_list = [
+        message["sources"] for message in messages
+        if isinstance(message.get("sources"), list) and any(is_compact(source) for source in message["sources"])
+    ]
+    if sources_list:
+        hydrate_sources(sources_list)
+    return messages
@@ -0,0 +1,99 @@
+"""추측 실행(speculative execution) 관리
+
+시스템 프롬프트상 에이전트는 항상 search_bible을 먼저 호출하므로, 라우터는
+에이전트의 첫 LLM 호출과 동시에 사용자 메시지로 검색을 미리 시작합니다.
+도구 호출이 같은(동등한) 쿼리로 도착하면 미리 받은 결과를 반환하고,
+쿼리가 다르면 추측 작업을 취소합니다.
+
+- 추측 작업은 전용 스레드 풀에서 실행되며 요청 컨텍스트(트레이스 등)를 복사해 사용합니다.
+  풀 크기는 speculative_search_workers(기본값 llm_max_concurrency)로, 슬롯을 받은 요청마다
+  추측 검색 하나가 대기 없이 실행됩니다.
+- 도구는 에이전트 실행 스레드에서 호출되므로 ContextVar로 현재 추측 작업을 전달합니다.
+"""
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from typing import Any, Callable, Hashable, Iterator, Optional
+
+from app.config import settings
+from app.services.stream_sessions import bind_cancel_event
+from app.services.telemetry import record_cache, trace_span
+
+
+_executor = ThreadPoolExecutor(
+    max_workers=max(1, settings.speculative_search_workers or settings.llm_max_concurrency),
+    thread_name_prefix="speculative"
+)
+
+_current_speculation: ContextVar[Optional["Speculation"]] = ContextVar("speculation", default=None)
+
+
+class Speculation:
+    """미리 시작한 작업 하나 (key가 같은 첫 요청만 결과를 가져감)"""
+
+    def __init__(self, name: str, key: Hashable, func: Callable[..., Any], *args: Any):
+        self.name = name
+        self.key = key
+        self.cancel_event = threading.Event()
+        self.settled = False
+        self._lock = threading.Lock()
+
+        context = copy_context()
+        # 추측 작업만 따로 취소할 수 있도록 별도의 취소 신호 사용
+        context.run(bind_cancel_event, self.cancel_event)
+        self.future: Future = _executor.submit(context.run, func, *args)
+
+    def take(self, key: Hashable) -> Optional[Any]:
+        """
+        key가 일치하면 결과를 기다려 반환하고, 다르면 작업을 취소합니다.
+
+        Returns:
+            미리 계산한 결과 (사용할 수 없으면 None → 호출자가 직접 실행)
+        """
+        with self._lock:
+            if self.settled:
+                return None
+            self.settled = True
+        if key != self.key:
+            self._cancel()
+            record_cache(self.name, False)
+            return None
+        record_cache(self.name, True)
+        with trace_span("speculative_wait", name=self.name, ready=self.future.done()):
+            return self.future.result()
+
+    def cancel(self) -> None:
+        """사용되지 않은 작업 취소 (요청 종료 시 호출)"""
+        with self._lock:
+            if self.settled:
+                return
+            self.settled = True
+        self._cancel()
+
+    def _cancel(self) -> None:
+        self.cancel_event.set()
+        self.future.cancel()
+
+
+@contextmanager
+def speculate(name: str, key: Hashable, func: Callable[..., Any], *args: Any) -> Iterator[Speculation]:
+    """
+    func(*args)를 미리 시작하고, 블록 안에서 실행되는 코드가 take_speculation으로 가져갈 수 있게 합니다.
+    블록을 벗어날 때까지 사용되지 않으면 취소합니다.
+    """
+    speculation = Speculation(name, key, func, *args)
+    token = _current_speculation.set(speculation)
+    try:
+        yield speculation
+    finally:
+        _current_speculation.reset(token)
+        speculation.cancel()
+
+
+def take_speculation(name: str, key: Hashable) -> Optional[Any]:
+    """현재 컨텍스트에 name 작업이 있으면 key로 결과 조회 (없거나 불일치면 None)"""
+    speculation = _current_speculation.get()
+    if speculation is None or speculation.name != name:
+        return None
+    return speculation.take(key)
@@ -0,0 +1,287 @@
+"""스트리밍 세션 관리
+
+에이전트 실행(생산자)을 HTTP 응답(구독자)과 분리합니다.
+
+- 생산자 태스크는 이벤트를 세션 버퍼에 순번(seq)과 함께 기록합니다.
+- 구독자는 원하는 순번 이후부터 이벤트를 읽어 SSE 프레임으로 보냅니다.
+  프레임에는 "id: <stream_id>:<seq>"가 붙어 Last-Event-ID로 이어받을 수 있습니다.
+- 구독자가 모두 떠나면 유예 시간 뒤 생산자를 취소합니다 (재연결이 없으면 LLM 비용 중단).
+"""
+import asyncio
+import threading
+from contextvars import ContextVar
+from typing import Any, AsyncGenerator, Callable, Coroutine, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from app.config import settings
+from app.services.streaming import SSEFrameCoalescer, sse_frame
+
+
+class StreamCancelledError(Exception):
+    """스트림이 취소되어 진행 중인 작업을 중단해야 함"""
+
+
+# 도구 실행 스레드에서도 취소 여부를 확인할 수 있도록 threading.Event를 전달
+_current_cancel_event: ContextVar[Optional[threading.Event]] = ContextVar("stream_cancel_event", default=None)
+
+
+def raise_if_cancelled() -> None:
+    """현재 스트림이 취소되었으면 StreamCancelledError 발생 (단계 사이에서 호출)"""
+    cancel_event = _current_cancel_event.get()
+    if cancel_event is not None and cancel_event.is_set():
+        raise StreamCancelledError("스트림이 취소되었습니다.")
+
+
+def bind_cancel_event(cancel_event: threading.Event) -> None:
+    """현재 컨텍스트의 취소 신호를 지정 (백그라운드 작업을 별도로 취소할 때 사용)"""
+    _current_cancel_event.set(cancel_event)
+
+
+class StreamSession:
+    """한 번의 답변 생성에 대한 이벤트 버퍼"""
+
+    def __init__(self, session_id: str):
+        self.id = session_id
+        self.events: List[Dict[str, Any]] = []
+        self.finished = False
+        self.subscribers = 0
+        self.cancel_event = threading.Event()
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    def publish(self, payload: Dict[str, Any]) -> int:
+        """이벤트 기록 후 순번 반환 (1부터 시작)"""
+        self.events.append(payload)
+        self._notify()
+        return len(self.events)
+
+    def finish(self) -> None:
+        """생산 종료 표시"""
+        self.finished = True
+        self._notify()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait(self, cursor: int, timeout: Optional[float]) -> None:
+        """cursor 이후 이벤트가 생기거나, 종료되거나, timeout이 지날 때까지 대기"""
+        if len(self.events) > cursor or self.finished:
+            return
+        changed = self._changed
+        try:
+            await asyncio.wait_for(changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def cancel(self) -> None:
+        """생산자 취소 (도구 스레드에도 취소 신호 전달)"""
+        self.cancel_event.set()
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+
+
+class StreamSessionRegistry:
+    """프로세스 내 스트리밍 세션 저장소"""
+
+    def __init__(self):
+        """초기화"""
+        self.sessions: Dict[str, StreamSession] = {}
+        # 진행 중인 첫 턴 답변 (같은 질문이 동시에 오면 하나의 생성을 함께 구독)
+        self.flights: Dict[str, StreamSession] = {}
+        self.resume_grace = settings.stream_resume_grace_seconds
+        self.session_ttl = settings.stream_session_ttl_seconds
+
+    def start(
+        self,
+        producer: Callable[[StreamSession], Coroutine[Any, Any, None]],
+        flight_key: Optional[str] = None
+    ) -> StreamSession:
+        """
+        새 세션을 만들고 생산자 태스크를 시작합니다.
+
+        Args:
+            producer: 세션에 이벤트를 기록하는 코루틴 함수
+            flight_key: 지정하면 생산이 끝날 때까지 find_flight로 이 세션을 찾을 수 있음
+        """
+        session = StreamSession(uuid4().hex)
+        self.sessions[session.id] = session
+        if flight_key is not None:
+            self.flights[flight_key] = session
+
+        async def run():
+            _current_cancel_event.set(session.cancel_event)
+            try:
+                await producer(session)
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                session.publish({"type": "error", "content": f"처리 중 오류가 발생했습니다: {str(e)}"})
+            finally:
+                if flight_key is not None and self.flights.get(flight_key) is session:
+                    del self.flights[flight_key]
+                session.finish()
+                asyncio.get_running_loop().call_later(self.session_ttl, self.sessions.pop, session.id, None)
+
+        session.task = asyncio.create_task(run())
+        return session
+
+    def find_flight(self, flight_key: str) -> Optional[StreamSession]:
+        """같은 키로 진행 중인 생산자 세션 조회 (없으면 None)"""
+        session = self.flights.get(flight_key)
+        if session is None or session.finished or session.cancel_event.is_set():
+            return None
+        return session
+
+    def resolve(self, last_event_id: Optional[str]) -> Optional[Tuple[StreamSession, int]]:
+        """Last-Event-ID("<stream_id>:<seq>")로 이어받을 세션과 순번 조회"""
+        if not last_event_id or ":" not in last_event_id:
+            return None
+        session_id, _, seq = last_event_id.strip().rpartition(":")
+        session = self.sessions.get(session_id)
+        if session is None or not seq.isdigit():
+            return None
+        return session, min(int(seq), len(session.events))
+
+    def _release(self, session: StreamSession) -> None:
+        session.subscribers -= 1
+        if session.subscribers > 0 or session.finished:
+            return
+        if self.resume_grace <= 0:
+            session.cancel()
+            return
+
+        def cancel_if_abandoned():
+            if session.subscribers == 0 and not session.finished:
+                print(f"클라이언트 연결 종료로 스트림 취소: {session.id}")
+                session.cancel()
+
+        asyncio.get_running_loop().call_later(self.resume_grace, cancel_if_abandoned)
+
+    async def follow(self, session: StreamSession, cursor: int = 0) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        다른 세션의 이벤트를 그대로 읽습니다 (같은 질문의 생성을 공유하는 세션용).
+        따라가는 동안은 구독자로 집계되므로 원래 클라이언트가 떠나도 생성이 취소되지 않습니다.
+        """
+        session.subscribers += 1
+        try:
+            while True:
+                while cursor < len(session.events):
+                    cursor += 1
+                    yield session.events[cursor - 1]
+                if session.finished:
+                    break
+                await session.wait(cursor, None)
+        finally:
+            self._release(session)
+
+    async def subscribe(self, session: StreamSession, cursor: int = 0) -> AsyncGenerator[str, None]:
+        """
+        세션 이벤트를 SSE 프레임으로 전송합니다.
+
+        연속된 token 이벤트는 시간/크기 기준으로 하나의 프레임으로 병합하며,
+        프레임 id는 포함된 마지막 이벤트의 순번입니다.
+        클라이언트 연결이 끊기면(제너레이터 취소) 구독을 해제합니다.
+        """
+        session.subscribers += 1
+        coalescer = SSEFrameCoalescer()
+        try:
+            while True:
+                while cursor < len(session.events):
+                    payload = session.events[cursor]
+                    cursor += 1
+                    event_id = f"{session.id}:{cursor}"
+                    if payload.get("type") == "token":
+                        frame = coalescer.push(payload.get("content", ""), event_id)
+                    else:
+                        pending = coalescer.flush()
+                        if pending:
+                            yield pending
+                        frame = sse_frame(payload, event_id)
+                    if frame:
+                        yield frame
+                if session.finished and cursor >= len(session.events):
+                    break
+                await session.wait(cursor, coalescer.time_until_flush())
+                if cursor >= len(session.events):
+                    frame = coalescer.flush()
+                    if frame:
+                        yield frame
+            frame = coalescer.flush()
+            if frame:
+                yield frame
+        finally:
+            self._release(session)
+
+
+
+class AnswerCheckpointer:
+    """스트리밍 중인 어시스턴트 답변을 주기적으로 저장 (연결이 끊겨도 부분 답변 보존)"""
+
+    def __init__(self, service, conversation_id: str, stream_id: str, user_saved: Optional[asyncio.Task] = None):
+        self.service = service
+        self.conversation_id = conversation_id
+        self.stream_id = stream_id
+        self.user_saved = user_saved
+        self.interval = settings.stream_checkpoint_interval
+        self.message_id: Optional[str] = None
+        self._last_at = asyncio.get_running_loop().time()
+        self._inflight: Optional[asyncio.Task] = None
+
+    def due(self) -> bool:
+        """체크포인트 주기가 지났고 진행 중인 저장이 없는지"""
+        if self._inflight is not None and not self._inflight.done():
+            return False
+        return asyncio.get_running_loop().time() - self._last_at >= self.interval
+
+    def checkpoint(self, content: str) -> None:
+        """부분 답변 저장을 백그라운드로 시작"""
+        self._last_at = asyncio.get_running_loop().time()
+        self._inflight = asyncio.create_task(self._save(content, None, {"status": "streaming", "stream_id": self.stream_id}))
+
+    async def _save(self, content: str, sources: Optional[List[Dict[str, str]]], metadata: Dict[str, Any]) -> None:
+        try:
+            if self.message_id is None:
+                # 사용자 메시지가 먼저 저장되어야 순서가 유지됨
+                if self.user_saved is not None:
+                    await self.user_saved
+                self.message_id = await asyncio.to_thread(
+                    self.service.append_message,
+                    conversation_id=self.conversation_id,
+                    role="assistant",
+                    content=content,
+                    sources=sources,
+                    metadata=metadata
+                )
+            else:
+                await asyncio.to_thread(
+                    self.service.update_message,
+                    self.message_id,
+                    content=content,
+                    sources=sources,
+                    metadata=metadata,
+                    conversation_id=self.conversation_id
+                )
+        except Exception as e:
+            print(f"AI 메시지 저장 오류: {e}")
+
+    async def finalize(
+        self,
+        content: str,
+        sources: Optional[List[Dict[str, str]]],
+        metadata: Dict[str, Any],
+        status: str = "complete"
+    ) -> None:
+        """최종(또는 취소 시점) 답변 저장"""
+        if self._inflight is not None:
+            try:
+                await self._inflight
+            except BaseException:
+                pass
+        if not content and self.message_id is None:
+            return
+        await self._save(content, sources, {**metadata, "status": status, "stream_id": self.stream_id})
+
+
+# 싱글톤 인스턴스
+stream_session_registry = StreamSessionRegistry()
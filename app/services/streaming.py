@@ -0,0 +1,137 @@
+"""SSE 스트리밍 델타 계산 및 프레임 병합
+
+- StreamDeltaTracker: 메시지 ID별로 전송한 길이(오프셋)만 기억하여
+  접두사 비교 없이 청크당 O(1)로 새 텍스트를 계산합니다.
+- SSEFrameCoalescer: 토큰을 시간(기본 20ms) / 크기(기본 512바이트) 기준으로
+  모아 하나의 SSE 프레임으로 보냅니다.
+"""
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:  # orjson이 없으면 표준 json 사용
+    orjson = None
+
+
+def encode_event(payload: Dict[str, Any]) -> str:
+    """SSE data 필드용 JSON 직렬화 (orjson 사용 가능 시 orjson)"""
+    if orjson is not None:
+        return orjson.dumps(payload).decode("utf-8")
+    return json.dumps(payload, ensure_ascii=False)
+
+
+def sse_frame(payload: Dict[str, Any], event_id: Optional[str] = None) -> str:
+    """SSE 프레임 문자열 생성"""
+    if event_id is not None:
+        return f"id: {event_id}\ndata: {encode_event(payload)}\n\n"
+    return f"data: {encode_event(payload)}\n\n"
+
+
+def chunk_text(content: Any) -> str:
+    """
+    메시지 content에서 사용자에게 보낼 텍스트만 추출합니다.
+
+    문자열이면 그대로, 리스트면 text 블록(문자열 또는 type이 text인 딕셔너리)만 이어 붙입니다.
+    (content_blocks 프로퍼티는 청크마다 블록을 새로 만들어 비용이 크므로 사용하지 않음)
+    """
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        parts = []
+        for item in content:
+            if isinstance(item, str):
+                parts.append(item)
+            elif isinstance(item, dict) and item.get("type", "text") == "text" and "text" in item:
+                parts.append(item["text"])
+        return "".join(parts)
+    if isinstance(content, dict) and "text" in content:
+        return content["text"]
+    return ""
+
+
+class StreamDeltaTracker:
+    """메시지 ID별 전송 오프셋 추적"""
+
+    def __init__(self):
+        self._offsets: Dict[str, int] = {}
+        self._parts: List[str] = []
+        self._text_cache: Optional[str] = ""
+
+    def add_chunk(self, message_id: str, text: str) -> str:
+        """
+        스트리밍 증분 청크를 반영합니다.
+
+        Returns:
+            새로 전송할 텍스트 (없으면 빈 문자열)
+        """
+        if not text:
+            return ""
+        self._offsets[message_id] = self._offsets.get(message_id, 0) + len(text)
+        self._parts.append(text)
+        self._text_cache = None
+        return text
+
+    def complete(self, message_id: str, full_text: str) -> str:
+        """
+        완성된 메시지를 반영합니다 (스트리밍 청크가 누락된 경우 대비).
+
+        이미 전송한 오프셋 이후 부분만 반환합니다.
+        """
+        offset = self._offsets.get(message_id, 0)
+        if len(full_text) <= offset:
+            return ""
+        return self.add_chunk(message_id, full_text[offset:])
+
+    @property
+    def text(self) -> str:
+        """지금까지 전송한 전체 텍스트"""
+        if self._text_cache is None:
+            self._text_cache = "".join(self._parts)
+            self._parts = [self._text_cache]
+        return self._text_cache
+
+    def __bool__(self) -> bool:
+        return bool(self._parts)
+
+
+class SSEFrameCoalescer:
+    """토큰을 시간/크기 기준으로 모아 하나의 token 프레임으로 병합"""
+
+    def __init__(self, max_delay: float = 0.02, max_bytes: int = 512):
+        self.max_delay = max_delay
+        self.max_bytes = max_bytes
+        self._buffer: List[str] = []
+        self._size = 0
+        self._first_at = 0.0
+        self._event_id: Optional[str] = None
+
+    def push(self, text: str, event_id: Optional[str] = None) -> Optional[str]:
+        """토큰 추가 (기준을 넘으면 병합된 프레임 반환, 프레임 id는 마지막 토큰의 id)"""
+        if event_id is not None:
+            self._event_id = event_id
+        if not text:
+            return None
+        if not self._buffer:
+            self._first_at = time.monotonic()
+        self._buffer.append(text)
+        self._size += len(text.encode("utf-8"))
+        if self._size >= self.max_bytes or time.monotonic() - self._first_at >= self.max_delay:
+            return self.flush()
+        return None
+
+    def time_until_flush(self) -> Optional[float]:
+        """버퍼를 비워야 할 때까지 남은 시간 (버퍼가 비어 있으면 None)"""
+        if not self._buffer:
+            return None
+        return max(0.0, self.max_delay - (time.monotonic() - self._first_at))
+
+    def flush(self) -> Optional[str]:
+        """버퍼에 남은 토큰을 하나의 프레임으로 반환"""
+        if not self._buffer:
+            return None
+        content = "".join(self._buffer)
+        self._buffer = []
+        self._size = 0
+        return sse_frame({"type": "token", "content": content}, self._event_id)
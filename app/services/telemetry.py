@@ -0,0 +1,426 @@
+"""요청 단계별 지연 시간 계측 및 Prometheus 메트릭 서비스"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Dict, Any, List, Tuple, Iterator
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+# 지연 시간 히스토그램 기본 버킷 (초)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    """Prometheus 라벨 문자열 생성"""
+    pairs = [
+        '%s="%s"' % (name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in zip(labelnames, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """누적 버킷 히스토그램 (Prometheus 텍스트 형식 호환)"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # 라벨 값 -> (버킷별 카운트, 합계, 개수)
+        self._series: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """관측값 기록"""
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [[0] * len(self.buckets), 0.0, 0]
+                self._series[key] = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        """Prometheus 텍스트 형식으로 변환"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    labels = _format_labels(self.labelnames, key, 'le="%s"' % bound)
+                    lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+                labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Counter:
+    """단조 증가 카운터"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """카운터 증가"""
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        """Prometheus 텍스트 형식으로 변환"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    """임의로 설정 가능한 게이지"""
+
+    def set(self, value: float, **labels: str) -> None:
+        """게이지 값 설정"""
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+    def render(self) -> List[str]:
+        """Prometheus 텍스트 형식으로 변환"""
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class MetricsRegistry:
+    """프로세스 내 메트릭 저장소"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        """히스토그램 등록 (이미 있으면 기존 것 반환)"""
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        """카운터 등록 (이미 있으면 기존 것 반환)"""
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        """게이지 등록 (이미 있으면 기존 것 반환)"""
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def render(self) -> str:
+        """전체 메트릭을 Prometheus 텍스트 형식으로 변환"""
+        lines: List[str] = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# 싱글톤 인스턴스
+metrics = MetricsRegistry()
+
+STAGE_DURATION = metrics.histogram(
+    "bible_qa_stage_duration_seconds",
+    "요청 처리 단계별 소요 시간",
+    labelnames=("stage",)
+)
+REQUEST_DURATION = metrics.histogram(
+    "bible_qa_request_duration_seconds",
+    "요청 전체 처리 시간",
+    labelnames=("endpoint",)
+)
+TIME_TO_FIRST_TOKEN = metrics.histogram(
+    "bible_qa_time_to_first_token_seconds",
+    "스트리밍 첫 토큰까지 걸린 시간",
+    labelnames=("endpoint",)
+)
+LLM_TOKENS = metrics.counter(
+    "bible_qa_llm_tokens_total",
+    "LLM 토큰 사용량",
+    labelnames=("kind", "tier")
+)
+LLM_CALL_DURATION = metrics.histogram(
+    "bible_qa_llm_call_duration_seconds",
+    "LLM 호출 1회 소요 시간 (모델 티어별)",
+    labelnames=("tier",)
+)
+ROUTE_DECISIONS = metrics.counter(
+    "bible_qa_route_decisions_total",
+    "질문 처리 경로 선택 (agent: 에이전트 루프, direct: 구절 직접 조회 후 1회 생성)",
+    labelnames=("route",)
+)
+DEGRADATIONS = metrics.counter(
+    "bible_qa_degradations_total",
+    "남은 시간 예산 부족으로 적용한 품질 저하 단계",
+    labelnames=("step",)
+)
+CACHE_LOOKUPS = metrics.counter(
+    "bible_qa_cache_lookups_total",
+    "캐시 조회 결과",
+    labelnames=("cache", "result")
+)
+
+WORKER_RSS = metrics.gauge(
+    "bible_qa_worker_rss_bytes",
+    "워커 프로세스 상주 메모리 (RSS)",
+    labelnames=("pid",)
+)
+
+
+def update_process_metrics() -> None:
+    """현재 워커의 RSS를 메트릭에 반영 (/metrics 렌더링 직전에 호출)"""
+    import os
+    pid = os.getpid()
+    try:
+        # Linux: /proc/self/statm의 두 번째 값이 상주 페이지 수
+        with open("/proc/self/statm") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        import sys
+        # /proc이 없으면 최대 RSS로 대체 (macOS는 바이트, Linux는 KB)
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform != "darwin":
+            rss *= 1024
+    WORKER_RSS.set(rss, pid=str(pid))
+
+
+# 처리 모드 (뒤로 갈수록 더 많이 단순화)
+MODE_SEVERITY = {"full": 0, "reduced": 1, "minimal": 2}
+
+
+class RequestTrace:
+    """한 요청의 단계별 타이밍, 토큰 수, 캐시 적중 여부 기록"""
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.started_at = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.first_token_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.tokens = {"input": 0, "output": 0, "total": 0}
+        self.llm_calls = 0
+        self.cache: Dict[str, bool] = {}
+        self.route = "agent"
+        self.tier = "default"
+        self.model: Optional[str] = None
+        # 지연 시간 예산 (set_budget 전에는 제한 없음)
+        self.deadline: Optional[float] = None
+        self.mode = "full"
+        self.degradations: List[str] = []
+        self.search_calls = 0
+        self._lock = threading.Lock()
+
+    def add_span(self, stage: str, duration: float, **attrs: Any) -> None:
+        """완료된 단계 기록"""
+        span = {
+            "stage": stage,
+            "start_ms": round((time.perf_counter() - duration - self.started_at) * 1000, 1),
+            "duration_ms": round(duration * 1000, 1),
+        }
+        span.update(attrs)
+        with self._lock:
+            self.spans.append(span)
+        STAGE_DURATION.observe(duration, stage=stage)
+
+    def mark_first_token(self) -> None:
+        """첫 토큰 전송 시점 기록 (최초 1회만)"""
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+            TIME_TO_FIRST_TOKEN.observe(self.first_token_at - self.started_at, endpoint=self.endpoint)
+
+    def record_llm_usage(self, usage: Optional[Dict[str, Any]]) -> None:
+        """LLM 호출 1회와 토큰 사용량 기록"""
+        with self._lock:
+            self.llm_calls += 1
+            if not usage:
+                return
+            input_tokens = int(usage.get("input_tokens", 0) or 0)
+            output_tokens = int(usage.get("output_tokens", 0) or 0)
+            self.tokens["input"] += input_tokens
+            self.tokens["output"] += output_tokens
+            self.tokens["total"] += int(usage.get("total_tokens", input_tokens + output_tokens) or 0)
+        LLM_TOKENS.inc(input_tokens, kind="input", tier=self.tier)
+        LLM_TOKENS.inc(output_tokens, kind="output", tier=self.tier)
+
+    def record_cache(self, name: str, hit: bool) -> None:
+        """캐시 적중 여부 기록 (같은 캐시는 한 번이라도 적중하면 True)"""
+        with self._lock:
+            self.cache[name] = self.cache.get(name, False) or hit
+
+    def set_budget(self, seconds: float, since: Optional[float] = None) -> None:
+        """
+        지연 시간 예산 설정
+
+        Args:
+            seconds: 예산 (초)
+            since: 예산 기준 시점 (perf_counter 값, 기본값은 트레이스 시작 시점)
+        """
+        self.deadline = (self.started_at if since is None else since) + seconds
+
+    def remaining(self) -> Optional[float]:
+        """남은 예산 (초, 예산이 없으면 None)"""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.perf_counter()
+
+    def degrade(self, mode: str, step: str, severity: int) -> None:
+        """품질 저하 단계 기록 (mode는 지금까지 가장 심한 단계로 유지)"""
+        with self._lock:
+            if step in self.degradations:
+                return
+            self.degradations.append(step)
+            if severity > MODE_SEVERITY.get(self.mode, 0):
+                self.mode = mode
+        DEGRADATIONS.inc(step=step)
+
+    def set_tier(self, tier: str, model: str) -> None:
+        """생성에 사용한 모델 티어 기록"""
+        self.tier = tier
+        self.model = model
+
+    def set_route(self, route: str) -> None:
+        """질문 처리 경로 기록 (metadata와 메트릭에 반영)"""
+        self.route = route
+        ROUTE_DECISIONS.inc(route=route)
+
+    def finish(self) -> None:
+        """요청 종료 시점 기록"""
+        if self.finished_at is None:
+            self.finished_at = time.perf_counter()
+            REQUEST_DURATION.observe(self.finished_at - self.started_at, endpoint=self.endpoint)
+
+    def stage_totals(self) -> Dict[str, float]:
+        """단계별 누적 소요 시간 (ms)"""
+        totals: Dict[str, float] = {}
+        with self._lock:
+            for span in self.spans:
+                totals[span["stage"]] = round(totals.get(span["stage"], 0) + span["duration_ms"], 1)
+        return totals
+
+    def to_metadata(self) -> Dict[str, Any]:
+        """messages.metadata에 저장할 형태로 변환"""
+        end = self.finished_at or time.perf_counter()
+        with self._lock:
+            spans = list(self.spans)
+            tokens = dict(self.tokens)
+            cache = dict(self.cache)
+        return {
+            "latency": {
+                "total_ms": round((end - self.started_at) * 1000, 1),
+                "ttft_ms": round((self.first_token_at - self.started_at) * 1000, 1) if self.first_token_at else None,
+                "stages_ms": self.stage_totals(),
+                "spans": spans,
+            },
+            "tokens": tokens,
+            "llm_calls": self.llm_calls,
+            "cache": cache,
+            "route": self.route,
+            "tier": self.tier,
+            "model": self.model,
+            "mode": self.mode,
+            "degradations": list(self.degradations),
+        }
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("request_trace", default=None)
+
+
+def start_trace(endpoint: str) -> RequestTrace:
+    """현재 컨텍스트에 새 요청 트레이스 시작"""
+    trace = RequestTrace(endpoint)
+    _current_trace.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[RequestTrace]:
+    """현재 컨텍스트의 요청 트레이스 (없으면 None)"""
+    return _current_trace.get()
+
+
+@contextmanager
+def trace_span(stage: str, **attrs: Any) -> Iterator[None]:
+    """
+    단계 소요 시간을 측정합니다.
+
+    요청 트레이스가 있으면 트레이스에 기록하고, 없으면 히스토그램에만 반영합니다.
+    (to_thread / 도구 실행 스레드에도 contextvars가 복사되므로 그대로 동작)
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add_span(stage, duration, **attrs)
+        else:
+            STAGE_DURATION.observe(duration, stage=stage)
+
+
+def record_cache(name: str, hit: bool) -> None:
+    """캐시 조회 결과를 메트릭과 현재 트레이스에 기록"""
+    CACHE_LOOKUPS.inc(cache=name, result="hit" if hit else "miss")
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.record_cache(name, hit)
+
+
+class TraceCallbackHandler(BaseCallbackHandler):
+    """LangChain 콜백으로 LLM 호출별 소요 시간과 토큰 사용량 기록"""
+
+    def __init__(self, trace: RequestTrace):
+        self.trace = trace
+        self._starts: Dict[UUID, float] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs) -> None:
+        self._starts[run_id] = time.perf_counter()
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs) -> None:
+        self._starts[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs) -> None:
+        start = self._starts.pop(run_id, None)
+        usage = None
+        try:
+            message = response.generations[0][0].message
+            usage = getattr(message, "usage_metadata", None)
+        except (IndexError, AttributeError):
+            pass
+        self.trace.record_llm_usage(usage)
+        if start is not None:
+            duration = time.perf_counter() - start
+            self.trace.add_span("llm_call", duration, call=self.trace.llm_calls, tier=self.trace.tier)
+            LLM_CALL_DURATION.observe(duration, tier=self.trace.tier)
+
+    def on_llm_error(self, error, *, run_id: UUID, **kwargs) -> None:
+        start = self._starts.pop(run_id, None)
+        if start is not None:
+            self.trace.add_span("llm_call", time.perf_counter() - start, error=type(error).__name__)
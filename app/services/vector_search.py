@@ -0,0 +1,189 @@
+"""벡터 검색 RPC 호출
+
+- 질문에 책/장 범위가 있으면 필터를 DB 쿼리 안으로 내려 보내는 match_documents_filtered
+- 범위가 없으면 장 라우팅 검색(match_documents_routed): 장 중심 임베딩으로 가까운 장을
+  route_chapter_count개 고른 뒤 그 장의 청크만 정확히 비교
+- 그다음 coarse-to-fine 검색(match_documents_coarse): Matryoshka 임베딩의 앞부분
+  (coarse_embedding_dimension차원, 재정규화)으로 후보를 고른 뒤 전체 차원 벡터로 다시 정렬
+- 위 함수가 DB에 없으면 벡터 인덱스(HNSW/IVFFlat)로 전체 말뭉치를 검색하는 match_documents
+
+관련 구절은 미리 계산한 이웃 테이블(bible_chunk_neighbors)에서 related_passages로 조회합니다.
+
+다중 번역본 DB(settings.translations 설정)면 모든 검색 함수에 filter_translation을 전달해
+한 번역본 파티션만 검색합니다.
+
+아직 배포되지 않은 함수는 경고를 한 번 출력하고 이 프로세스에서는 다시 호출하지 않습니다.
+"""
+import math
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.config import settings
+from app.services.providers import get_supabase
+
+
+# DB에 없는 것으로 확인된 선택 RPC 함수 이름
+_unavailable_rpcs: Set[str] = set()
+
+
+def truncate_embedding(embedding: List[float], dimension: int) -> List[float]:
+    """Matryoshka 임베딩의 앞 dimension개만 남기고 단위 길이로 다시 정규화"""
+    prefix = embedding[:dimension]
+    norm = math.sqrt(sum(value * value for value in prefix)) or 1.0
+    return [value / norm for value in prefix]
+
+
+def _call_optional_rpc(name: str, params: Dict) -> Optional[List[Dict]]:
+    """선택 RPC 호출 (함수가 DB에 없으면 None, 그 밖의 오류는 그대로 전달)"""
+    if name in _unavailable_rpcs:
+        return None
+    try:
+        response = get_supabase().rpc(name, params).execute()
+        return response.data if response.data else []
+    except Exception as e:
+        if name not in str(e):
+            raise
+        _unavailable_rpcs.add(name)
+        print(f"{name} 함수를 찾을 수 없어 기본 검색을 사용합니다 (supabase_setup.sql 참고): {str(e)}")
+        return None
+
+
+def _translation_params(translation: Optional[str]) -> Dict:
+    """번역본 인자 (단일 번역본 DB면 이전 함수 시그니처와 호환되도록 비움)"""
+    if not settings.translations_list:
+        return {}
+    return {'filter_translation': translation or settings.default_translation}
+
+
+def match_documents(
+    query_embedding: List[float],
+    match_threshold: float,
+    match_count: int,
+    books: Optional[List[str]] = None,
+    chapter_range: Optional[Tuple[int, int]] = None,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    translation: Optional[str] = None
+) -> List[Dict]:
+    """
+    임베딩과 가장 가까운 청크 검색
+
+    Args:
+        query_embedding: 쿼리 임베딩
+        match_threshold: 최소 유사도
+        match_count: 최대 결과 수
+        books: 검색할 책 이름 목록 (None이면 전체)
+        chapter_range: 검색할 장 범위 (시작, 끝), 양 끝 포함 (None이면 전체)
+        ef_search: HNSW 검색 후보 수 (None이면 settings.vector_ef_search)
+        probes: IVFFlat 검색 목록 수 (None이면 settings.vector_probes)
+        translation: 검색할 번역본 코드 (None이면 settings.default_translation)
+
+    범위가 없는 검색은 장 라우팅(chapter_routing_enabled) → coarse-to-fine(coarse_to_fine_enabled)
+    → match_documents 순서로, 켜져 있고 DB 함수가 있는 첫 경로를 사용합니다.
+    """
+    params = {
+        'query_embedding': query_embedding,
+        'match_threshold': match_threshold,
+        'match_count': match_count,
+        **_translation_params(translation)
+    }
+    ef_search = settings.vector_ef_search if ef_search is None else ef_search
+    probes = settings.vector_probes if probes is None else probes
+
+    if books or chapter_range:
+        docs = _call_optional_rpc('match_documents_filtered', {
+            **params,
+            'filter_books': books or None,
+            'chapter_from': chapter_range[0] if chapter_range else None,
+            'chapter_to': chapter_range[1] if chapter_range else None
+        })
+        if docs is not None:
+            return docs
+    else:
+        if settings.chapter_routing_enabled:
+            docs = match_documents_routed(query_embedding, match_threshold, match_count, translation=translation)
+            if docs is not None:
+                return docs
+        if settings.coarse_to_fine_enabled:
+            docs = match_documents_coarse(query_embedding, match_threshold, match_count, ef_search=ef_search, translation=translation)
+            if docs is not None:
+                return docs
+
+    # 인덱스 정확도 조정 값은 설정된 경우에만 전달 (이전 3개 인자 함수와 호환)
+    if ef_search:
+        params['ef_search'] = ef_search
+    if probes:
+        params['probes'] = probes
+    response = get_supabase().rpc('match_documents', params).execute()
+    return response.data if response.data else []
+
+
+def match_documents_coarse(
+    query_embedding: List[float],
+    match_threshold: float,
+    match_count: int,
+    candidate_count: Optional[int] = None,
+    ef_search: Optional[int] = None,
+    translation: Optional[str] = None
+) -> Optional[List[Dict]]:
+    """
+    coarse-to-fine 검색 (함수가 DB에 없으면 None)
+
+    Args:
+        candidate_count: 저차원 검색으로 고를 후보 수 (None이면 settings.coarse_candidates)
+    """
+    params = {
+        'query_embedding': query_embedding,
+        'coarse_embedding': truncate_embedding(query_embedding, settings.coarse_embedding_dimension),
+        'match_threshold': match_threshold,
+        'match_count': match_count,
+        'candidate_count': max(match_count, candidate_count or settings.coarse_candidates),
+        **_translation_params(translation)
+    }
+    if ef_search:
+        params['ef_search'] = ef_search
+    return _call_optional_rpc('match_documents_coarse', params)
+
+
+def match_documents_routed(
+    query_embedding: List[float],
+    match_threshold: float,
+    match_count: int,
+    chapter_count: Optional[int] = None,
+    translation: Optional[str] = None
+) -> Optional[List[Dict]]:
+    """
+    장 라우팅 검색 (함수가 DB에 없으면 None)
+
+    Args:
+        chapter_count: 장 중심 임베딩으로 고를 장 수 (None이면 settings.route_chapter_count)
+    """
+    return _call_optional_rpc('match_documents_routed', {
+        'query_embedding': query_embedding,
+        'match_threshold': match_threshold,
+        'match_count': match_count,
+        'chapter_count': max(1, chapter_count or settings.route_chapter_count),
+        **_translation_params(translation)
+    })
+
+
+def related_passages(chunk_ids: List[int], per_chunk: Optional[int] = None) -> Dict[int, List[Dict]]:
+    """
+    청크별 관련 구절 (이웃 테이블이나 함수가 없으면 빈 dict)
+
+    Args:
+        chunk_ids: 검색 결과 청크 id 목록
+        per_chunk: 청크마다 돌려줄 이웃 수 (None이면 settings.related_passages_per_hit)
+
+    Returns:
+        {청크 id: [{book, chapter, verse, similarity}, ...]} (가까운 순서)
+    """
+    if not chunk_ids:
+        return {}
+    rows = _call_optional_rpc('related_passages', {
+        'chunk_ids': chunk_ids,
+        'per_chunk': max(1, per_chunk or settings.related_passages_per_hit)
+    })
+    related: Dict[int, List[Dict]] = {}
+    for row in rows or []:
+        related.setdefault(row['chunk_id'], []).append(row)
+    return related
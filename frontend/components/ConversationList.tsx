@@ -45,11 +45,8 @@ export default function ConversationList({ onSelectConversation, selectedConvers
     try {
       setIsLoading(true)
       const response = await fetch(`${process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'}/api/conversations`, {
-        // 캐싱 헤더 추가 (5분간 캐시)
+        // 브라우저 HTTP 캐시가 ETag로 재검증 (바뀌지 않았으면 서버가 본문 없이 304로 응답)
         cache: 'default',
-        headers: {
-          'Cache-Control': 'max-age=300',
-        },
       })
       if (response.ok) {
         const data = await response.json()
@@ -60,6 +60,7 @@ export async function sendMessage(
 export interface StreamEvent {
   type: 'start' | 'token' | 'done' | 'error'
   conversation_id?: string
+  stream_id?: string
   content?: string
   sources?: Array<{
     book: string
@@ -69,90 +70,127 @@ export interface StreamEvent {
   }>
 }
 
+// 네트워크 단절 시 Last-Event-ID로 스트림을 이어받는 최대 재시도 횟수
+const STREAM_RESUME_MAX_ATTEMPTS = 3
+
 export async function* sendMessageStream(
   message: string,
   conversationId?: string | null
 ): AsyncGenerator<StreamEvent, void, unknown> {
-  const response = await fetch(`${API_BASE_URL}/api/chat/stream`, {
-    method: 'POST',
-    headers: {
+  // 마지막으로 받은 SSE 이벤트 id (재연결 시 서버가 이 위치부터 이어서 전송)
+  let lastEventId: string | null = null
+  let finished = false
+  let attempts = 0
+
+  while (true) {
+    const headers: Record<string, string> = {
       'Content-Type': 'application/json',
-    },
-    body: JSON.stringify({
-      message,
-      conversation_id: conversationId,
-    }),
-  })
+    }
+    if (lastEventId) {
+      headers['Last-Event-ID'] = lastEventId
+    }
 
-  if (!response.ok) {
-    const errorText = await response.text()
-    console.error('Stream API Error:', {
-      status: response.status,
-      statusText: response.statusText,
-      url: `${API_BASE_URL}/api/chat/stream`,
-      error: errorText
+    const response = await fetch(`${API_BASE_URL}/api/chat/stream`, {
+      method: 'POST',
+      headers,
+      body: JSON.stringify({
+        message,
+        conversation_id: conversationId,
+      }),
     })
-    
-    // 503 에러 (서비스 과부하) 처리
-    if (response.status === 503) {
-      const errorMessage = errorText.includes('overloaded') 
-        ? 'AI 모델이 일시적으로 과부하 상태입니다. 잠시 후 다시 시도해주세요.'
-        : '서비스가 일시적으로 사용 불가능합니다. 잠시 후 다시 시도해주세요.'
-      throw new Error(errorMessage)
+
+    if (!response.ok) {
+      const errorText = await response.text()
+      console.error('Stream API Error:', {
+        status: response.status,
+        statusText: response.statusText,
+        url: `${API_BASE_URL}/api/chat/stream`,
+        error: errorText
+      })
+      
+      // 503 에러 (서비스 과부하) 처리
+      if (response.status === 503) {
+        const retryAfter = response.headers.get('Retry-After')
+        const errorMessage = retryAfter
+          ? `요청이 많아 잠시 처리할 수 없습니다. ${retryAfter}초 후 다시 시도해주세요.`
+          : errorText.includes('overloaded')
+            ? 'AI 모델이 일시적으로 과부하 상태입니다. 잠시 후 다시 시도해주세요.'
+            : '서비스가 일시적으로 사용 불가능합니다. 잠시 후 다시 시도해주세요.'
+        throw new Error(errorMessage)
+      }
+      
+      throw new Error(`Failed to start stream: ${response.status} ${response.statusText}`)
     }
-    
-    throw new Error(`Failed to start stream: ${response.status} ${response.statusText}`)
-  }
 
-  const reader = response.body?.getReader()
-  const decoder = new TextDecoder()
+    const reader = response.body?.getReader()
+    const decoder = new TextDecoder()
 
-  if (!reader) {
-    throw new Error('No response body')
-  }
+    if (!reader) {
+      throw new Error('No response body')
+    }
 
-  let buffer = ''
+    let buffer = ''
 
-  try {
-    while (true) {
-      const { done, value } = await reader.read()
-      
-      if (done) {
-        // 스트리밍이 완료되면 남은 버퍼 처리
-        if (buffer.trim()) {
-          const lines = buffer.split('\n')
-          for (const line of lines) {
-            if (line.trim() && line.startsWith('data: ')) {
-              try {
-                const data = JSON.parse(line.slice(6))
-                yield data
-              } catch (e) {
-                console.error('Failed to parse SSE data:', e)
-              }
-            }
+    // SSE 한 줄 처리 (id: 줄은 재연결용으로 기억, data: 줄은 이벤트로 변환)
+    const parseLine = (line: string): StreamEvent | null => {
+      if (line.startsWith('id: ')) {
+        lastEventId = line.slice(4).trim()
+        return null
+      }
+      if (line.trim() && line.startsWith('data: ')) {
+        try {
+          const data = JSON.parse(line.slice(6)) as StreamEvent
+          if (data.type === 'done' || data.type === 'error') {
+            finished = true
           }
+          return data
+        } catch (e) {
+          console.error('Failed to parse SSE data:', e)
         }
-        break
       }
+      return null
+    }
 
-      buffer += decoder.decode(value, { stream: true })
-      const lines = buffer.split('\n')
-      buffer = lines.pop() || ''
-
-      for (const line of lines) {
-        if (line.trim() && line.startsWith('data: ')) {
-          try {
-            const data = JSON.parse(line.slice(6))
-            yield data
-          } catch (e) {
-            console.error('Failed to parse SSE data:', e)
+    try {
+      while (true) {
+        const { done, value } = await reader.read()
+        
+        if (done) {
+          // 스트리밍이 완료되면 남은 버퍼 처리
+          if (buffer.trim()) {
+            const lines = buffer.split('\n')
+            for (const line of lines) {
+              const data = parseLine(line)
+              if (data) yield data
+            }
           }
+          break
+        }
+
+        buffer += decoder.decode(value, { stream: true })
+        const lines = buffer.split('\n')
+        buffer = lines.pop() || ''
+
+        for (const line of lines) {
+          const data = parseLine(line)
+          if (data) yield data
         }
       }
+    } catch (e) {
+      // 응답 도중 연결이 끊긴 경우: 받은 위치부터 이어받기
+      if (finished || !lastEventId || attempts >= STREAM_RESUME_MAX_ATTEMPTS) {
+        throw e
+      }
+      attempts += 1
+      console.warn('Stream interrupted, resuming from', lastEventId)
+      await new Promise((resolve) => setTimeout(resolve, 500 * attempts))
+      continue
+    } finally {
+      // 리더 정리
+      reader.releaseLock()
     }
-  } finally {
-    // 리더 정리
-    reader.releaseLock()
+
+    return
   }
 }
 
@@ -0,0 +1,88 @@
+-- 2단계 장 라우팅 검색 추가 스크립트
+-- 기존 DB에 장 중심 임베딩 테이블과 match_documents_routed 함수를 추가하고,
+-- 이미 적재된 청크 임베딩으로 장 중심을 계산합니다.
+-- (pgvector 0.7 이상: l2_normalize. book_no/chapter_no 컬럼이 필요하므로
+--  supabase_reference_columns.sql을 먼저 실행하세요.)
+
+-- 1. 장 중심 임베딩 테이블
+CREATE TABLE IF NOT EXISTS bible_chapter_centroids (
+    book_no SMALLINT NOT NULL,
+    chapter_no SMALLINT NOT NULL,
+    book TEXT NOT NULL,
+    chapter TEXT NOT NULL,
+    embedding vector(1536),  -- 장에 속한 청크 임베딩(단위 길이)의 평균을 다시 정규화한 값
+    chunk_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (book_no, chapter_no)
+);
+
+-- 2. 기존 데이터로 장 중심 계산 (청크 임베딩을 단위 길이로 맞춘 뒤 평균, 다시 정규화)
+INSERT INTO bible_chapter_centroids (book_no, chapter_no, book, chapter, embedding, chunk_count)
+SELECT
+    book_no,
+    chapter_no,
+    MIN(book),
+    MIN(chapter),
+    l2_normalize(AVG(l2_normalize(embedding))),
+    COUNT(*)
+FROM bible_chunks
+WHERE embedding IS NOT NULL AND book_no IS NOT NULL AND chapter_no IS NOT NULL
+GROUP BY book_no, chapter_no
+ON CONFLICT (book_no, chapter_no) DO UPDATE
+SET book = EXCLUDED.book,
+    chapter = EXCLUDED.chapter,
+    embedding = EXCLUDED.embedding,
+    chunk_count = EXCLUDED.chunk_count;
+
+-- 3. 검색 함수
+CREATE OR REPLACE FUNCTION match_documents_routed(
+    query_embedding vector(1536),
+    match_threshold float,
+    match_count int,
+    chapter_count int DEFAULT 8
+)
+RETURNS TABLE (
+    id bigint,
+    book text,
+    chapter text,
+    verse text,
+    content text,
+    similarity float
+)
+LANGUAGE sql STABLE
+AS $$
+    -- 1단계: 장 중심 임베딩(약 1,189개)을 정확히 비교해 가까운 장 선택
+    WITH routed AS MATERIALIZED (
+        SELECT bible_chapter_centroids.book_no, bible_chapter_centroids.chapter_no
+        FROM bible_chapter_centroids
+        ORDER BY bible_chapter_centroids.embedding <=> query_embedding
+        LIMIT chapter_count
+    )
+    -- 2단계: 선택한 장의 청크만 전체 차원 벡터로 정확히 정렬 (bible_chunks_reference_idx 사용)
+    SELECT
+        ranked.id,
+        ranked.book,
+        ranked.chapter,
+        ranked.verse,
+        ranked.content,
+        1 - ranked.distance AS similarity
+    FROM (
+        SELECT
+            bible_chunks.id,
+            bible_chunks.book,
+            bible_chunks.chapter,
+            bible_chunks.verse,
+            bible_chunks.content,
+            bible_chunks.embedding <=> query_embedding AS distance
+        FROM bible_chunks
+        JOIN routed
+          ON routed.book_no = bible_chunks.book_no
+         AND routed.chapter_no = bible_chunks.chapter_no
+        ORDER BY bible_chunks.embedding <=> query_embedding
+        LIMIT match_count
+    ) AS ranked
+    WHERE 1 - ranked.distance > match_threshold
+    ORDER BY ranked.distance;
+$$;
+
+-- 4. 통계 갱신
+ANALYZE bible_chapter_centroids;
@@ -0,0 +1,91 @@
+-- 관련 구절 이웃 테이블 추가 스크립트
+-- 기존 DB에 bible_chunk_neighbors 테이블과 build_chunk_neighbors / related_passages 함수를 추가합니다.
+-- 테이블은 이 스크립트를 실행한 뒤 다음 명령으로 채웁니다 (기존 임베딩만 사용, 임베딩 API 호출 없음).
+--     python -m app.scripts.build_neighbors
+
+-- 1. 이웃 테이블 (청크당 neighbor_count행, 약 31,000청크 x 5 = 15만 행)
+CREATE TABLE IF NOT EXISTS bible_chunk_neighbors (
+    chunk_id BIGINT NOT NULL REFERENCES bible_chunks(id) ON DELETE CASCADE,
+    rank SMALLINT NOT NULL,  -- 1이 가장 가까운 이웃
+    neighbor_id BIGINT NOT NULL REFERENCES bible_chunks(id) ON DELETE CASCADE,
+    similarity REAL NOT NULL,
+    PRIMARY KEY (chunk_id, rank)
+);
+
+-- 2. 이웃 계산 / 조회 함수
+CREATE OR REPLACE FUNCTION build_chunk_neighbors(
+    from_id bigint,
+    to_id bigint,
+    neighbor_count int DEFAULT 5
+)
+RETURNS int
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    inserted int;
+BEGIN
+    -- 같은 장의 청크를 걸러낸 뒤에도 neighbor_count개가 남도록 HNSW 후보를 넉넉히 봄
+    PERFORM set_config('hnsw.ef_search', GREATEST(100, neighbor_count * 10)::text, true);
+
+    DELETE FROM bible_chunk_neighbors
+    WHERE chunk_id BETWEEN from_id AND to_id;
+
+    INSERT INTO bible_chunk_neighbors (chunk_id, rank, neighbor_id, similarity)
+    SELECT
+        source.id,
+        nearest.rank,
+        nearest.id,
+        nearest.similarity
+    FROM bible_chunks AS source
+    CROSS JOIN LATERAL (
+        SELECT
+            candidates.id,
+            (row_number() OVER (ORDER BY candidates.distance))::smallint AS rank,
+            (1 - candidates.distance)::real AS similarity
+        FROM (
+            SELECT
+                other.id,
+                other.embedding <=> source.embedding AS distance
+            FROM bible_chunks AS other
+            WHERE other.id <> source.id
+              AND (other.book, other.chapter) IS DISTINCT FROM (source.book, source.chapter)
+            ORDER BY other.embedding <=> source.embedding
+            LIMIT neighbor_count
+        ) AS candidates
+    ) AS nearest
+    WHERE source.id BETWEEN from_id AND to_id
+      AND source.embedding IS NOT NULL;
+
+    GET DIAGNOSTICS inserted = ROW_COUNT;
+    RETURN inserted;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION related_passages(
+    chunk_ids bigint[],
+    per_chunk int DEFAULT 3
+)
+RETURNS TABLE (
+    chunk_id bigint,
+    book text,
+    chapter text,
+    verse text,
+    similarity float
+)
+LANGUAGE sql STABLE
+AS $$
+    SELECT
+        bible_chunk_neighbors.chunk_id,
+        bible_chunks.book,
+        bible_chunks.chapter,
+        bible_chunks.verse,
+        bible_chunk_neighbors.similarity
+    FROM bible_chunk_neighbors
+    JOIN bible_chunks ON bible_chunks.id = bible_chunk_neighbors.neighbor_id
+    WHERE bible_chunk_neighbors.chunk_id = ANY(chunk_ids)
+      AND bible_chunk_neighbors.rank <= per_chunk
+    ORDER BY bible_chunk_neighbors.chunk_id, bible_chunk_neighbors.rank;
+$$;
+
+-- 3. 통계 갱신 (build_neighbors 실행 후 다시 실행 권장)
+ANALYZE bible_chunk_neighbors;
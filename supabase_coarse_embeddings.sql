@@ -0,0 +1,76 @@
+-- coarse-to-fine 검색 추가 스크립트
+-- 기존 DB에 embedding 앞 256차원을 재정규화한 embedding_coarse 컬럼, 저차원 HNSW 인덱스,
+-- match_documents_coarse 함수를 추가합니다. (pgvector 0.7 이상: subvector, l2_normalize)
+
+-- 1. 컬럼 추가 및 기존 데이터 채우기
+ALTER TABLE bible_chunks ADD COLUMN IF NOT EXISTS embedding_coarse vector(256);
+
+UPDATE bible_chunks
+SET embedding_coarse = l2_normalize(subvector(embedding, 1, 256))::vector(256)
+WHERE embedding IS NOT NULL;
+
+-- 2. coarse-to-fine 1단계용 저차원 벡터 인덱스
+CREATE INDEX IF NOT EXISTS bible_chunks_embedding_coarse_idx
+ON bible_chunks
+USING hnsw (embedding_coarse vector_cosine_ops)
+WITH (m = 16, ef_construction = 64);
+
+-- 3. 검색 함수
+CREATE OR REPLACE FUNCTION match_documents_coarse(
+    query_embedding vector(1536),
+    coarse_embedding vector(256),
+    match_threshold float,
+    match_count int,
+    candidate_count int DEFAULT 100,
+    ef_search int DEFAULT NULL
+)
+RETURNS TABLE (
+    id bigint,
+    book text,
+    chapter text,
+    verse text,
+    content text,
+    similarity float
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- HNSW는 ef_search개까지만 돌려주므로 후보 수 이상으로 설정
+    PERFORM set_config('hnsw.ef_search', GREATEST(candidate_count, COALESCE(ef_search, 40))::text, true);
+
+    RETURN QUERY
+    -- 1단계: 저차원 벡터 인덱스로 후보 선택 (전체 차원 대비 약 1/6 계산량)
+    WITH candidates AS MATERIALIZED (
+        SELECT bible_chunks.id AS candidate_id
+        FROM bible_chunks
+        ORDER BY bible_chunks.embedding_coarse <=> coarse_embedding
+        LIMIT candidate_count
+    )
+    -- 2단계: 후보만 전체 차원 벡터로 다시 정렬
+    SELECT
+        reranked.id,
+        reranked.book,
+        reranked.chapter,
+        reranked.verse,
+        reranked.content,
+        1 - reranked.distance AS similarity
+    FROM (
+        SELECT
+            bible_chunks.id,
+            bible_chunks.book,
+            bible_chunks.chapter,
+            bible_chunks.verse,
+            bible_chunks.content,
+            bible_chunks.embedding <=> query_embedding AS distance
+        FROM bible_chunks
+        JOIN candidates ON candidates.candidate_id = bible_chunks.id
+        ORDER BY bible_chunks.embedding <=> query_embedding
+        LIMIT match_count
+    ) AS reranked
+    WHERE 1 - reranked.distance > match_threshold
+    ORDER BY reranked.distance;
+END;
+$$;
+
+-- 4. 통계 갱신
+ANALYZE bible_chunks;
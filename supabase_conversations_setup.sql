@@ -16,7 +16,7 @@ CREATE TABLE IF NOT EXISTS messages (
     conversation_id UUID NOT NULL REFERENCES conversations(id) ON DELETE CASCADE,
     role TEXT NOT NULL CHECK (role IN ('user', 'assistant', 'system')),
     content TEXT NOT NULL,
-    sources JSONB,  -- 출처 정보 배열 [{book, chapter, verse, content}, ...]
+    sources JSONB,  -- 출처 위치 배열 [{translation, book_no, chapter_no, verse_start, verse_end}, ...] (본문은 조회 시 채움)
     metadata JSONB DEFAULT '{}'::jsonb,  -- 추가 메타데이터 (토큰 수, 지연 시간 등)
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
@@ -24,6 +24,8 @@ CREATE TABLE IF NOT EXISTS messages (
 -- 인덱스 생성 (조회 성능 향상)
 CREATE INDEX IF NOT EXISTS idx_messages_conversation_id ON messages(conversation_id);
 CREATE INDEX IF NOT EXISTS idx_messages_created_at ON messages(created_at);
+-- 대화의 메시지 조회와 마지막 메시지 id 조회(ETag 버전)를 인덱스만으로 처리
+CREATE INDEX IF NOT EXISTS idx_messages_conversation_created_at ON messages(conversation_id, created_at DESC);
 CREATE INDEX IF NOT EXISTS idx_conversations_user_id ON conversations(user_id);
 CREATE INDEX IF NOT EXISTS idx_conversations_updated_at ON conversations(updated_at);
 
@@ -5,27 +5,68 @@
 
 -- 1. 기존 함수 및 인덱스 삭제
 DROP FUNCTION IF EXISTS match_documents(vector, float, int) CASCADE;
+DROP FUNCTION IF EXISTS match_documents(vector, float, int, int, int) CASCADE;
+DROP FUNCTION IF EXISTS match_documents(vector, float, int, int, int, text) CASCADE;
 DROP INDEX IF EXISTS bible_chunks_embedding_idx CASCADE;
+DROP INDEX IF EXISTS bible_chunks_embedding_hnsw_idx CASCADE;
 
 -- 2. 기존 테이블 삭제 후 재생성
 DROP TABLE IF EXISTS bible_chunks CASCADE;
+DROP TABLE IF EXISTS bible_chunk_neighbors CASCADE;
+DROP TABLE IF EXISTS bible_chapter_centroids CASCADE;
 
--- 3. 테이블 재생성 (임베딩 차원: 1536, output_dimensionality로 설정)
+-- 3. 테이블 재생성 (임베딩 차원: 1536, output_dimensionality로 설정, 번역본별 파티션)
 CREATE TABLE bible_chunks (
-    id BIGSERIAL PRIMARY KEY,
+    id BIGSERIAL,
+    translation TEXT NOT NULL DEFAULT 'krv',  -- 번역본 코드 (krv: 개역한글, nkrv: 개역개정 등)
     book TEXT NOT NULL,
     chapter TEXT,
     verse TEXT,
     content TEXT NOT NULL,
+    -- 정수 참조 컬럼 (숫자 순서 정렬과 인덱스 범위 조회용)
+    book_no SMALLINT,  -- 정경 순서 (창세기 1 ~ 요한계시록 66)
+    chapter_no SMALLINT,
+    verse_start SMALLINT,  -- 청크에 들어 있는 첫 절
+    verse_end SMALLINT,  -- 청크에 들어 있는 마지막 절
     embedding vector(1536),  -- output_dimensionality로 설정된 차원
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    embedding_coarse vector(256),  -- embedding 앞 256차원을 재정규화한 값 (coarse-to-fine 1단계)
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (id, translation)
+) PARTITION BY LIST (translation);
+
+-- 기본 번역본(개역한글) 파티션. 다른 번역본 파티션은 적재 스크립트가
+-- ensure_translation_partition 함수로 만듭니다.
+CREATE TABLE IF NOT EXISTS bible_chunks_krv PARTITION OF bible_chunks FOR VALUES IN ('krv');
+
+-- 장 중심 임베딩 테이블 재생성 (match_documents_routed 등 다른 검색 함수는 supabase_setup.sql 참고)
+CREATE TABLE IF NOT EXISTS bible_chapter_centroids (
+    translation TEXT NOT NULL DEFAULT 'krv',
+    book_no SMALLINT NOT NULL,
+    chapter_no SMALLINT NOT NULL,
+    book TEXT NOT NULL,
+    chapter TEXT NOT NULL,
+    embedding vector(1536),  -- 장에 속한 청크 임베딩(단위 길이)의 평균을 다시 정규화한 값
+    chunk_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (translation, book_no, chapter_no)
+);
+
+-- 관련 구절 이웃 테이블 재생성 (데이터 적재 후 python -m app.scripts.build_neighbors로 채움)
+CREATE TABLE IF NOT EXISTS bible_chunk_neighbors (
+    chunk_id BIGINT NOT NULL,  -- bible_chunks.id (id는 모든 번역본 파티션에서 유일)
+    rank SMALLINT NOT NULL,  -- 1이 가장 가까운 이웃
+    neighbor_id BIGINT NOT NULL,  -- 같은 번역본의 청크
+    similarity REAL NOT NULL,
+    PRIMARY KEY (chunk_id, rank)
 );
 
 -- 4. 벡터 검색 함수 재생성 (1536 차원)
 CREATE OR REPLACE FUNCTION match_documents(
     query_embedding vector(1536),
     match_threshold float,
-    match_count int
+    match_count int,
+    ef_search int DEFAULT NULL,
+    probes int DEFAULT NULL,
+    filter_translation text DEFAULT 'krv'
 )
 RETURNS TABLE (
     id bigint,
@@ -38,25 +79,59 @@ RETURNS TABLE (
 LANGUAGE plpgsql
 AS $$
 BEGIN
+    -- 호출마다 근사 검색 정확도 조정 (이 트랜잭션에서만 적용, NULL이면 DB 기본값)
+    IF ef_search IS NOT NULL THEN
+        PERFORM set_config('hnsw.ef_search', ef_search::text, true);
+    END IF;
+    IF probes IS NOT NULL THEN
+        PERFORM set_config('ivfflat.probes', probes::text, true);
+    END IF;
+
+    -- 인덱스로 가까운 순서의 match_count개를 먼저 찾고, 임계값은 그 뒤에 적용
+    -- (WHERE에 거리 조건을 두면 모든 행의 거리를 계산하게 되어 인덱스를 쓰지 못함)
     RETURN QUERY
     SELECT
-        bible_chunks.id,
-        bible_chunks.book,
-        bible_chunks.chapter,
-        bible_chunks.verse,
-        bible_chunks.content,
-        1 - (bible_chunks.embedding <=> query_embedding) AS similarity
-    FROM bible_chunks
-    WHERE 1 - (bible_chunks.embedding <=> query_embedding) > match_threshold
-    ORDER BY bible_chunks.embedding <=> query_embedding
-    LIMIT match_count;
+        nearest.id,
+        nearest.book,
+        nearest.chapter,
+        nearest.verse,
+        nearest.content,
+        1 - nearest.distance AS similarity
+    FROM (
+        SELECT
+            bible_chunks.id,
+            bible_chunks.book,
+            bible_chunks.chapter,
+            bible_chunks.verse,
+            bible_chunks.content,
+            bible_chunks.embedding <=> query_embedding AS distance
+        FROM bible_chunks
+        WHERE bible_chunks.translation = filter_translation
+        ORDER BY bible_chunks.embedding <=> query_embedding
+        LIMIT match_count
+    ) AS nearest
+    WHERE 1 - nearest.distance > match_threshold
+    ORDER BY nearest.distance;
 END;
 $$;
 
--- 5. 인덱스 재생성 (1536 차원은 ivfflat 인덱스 지원, 최대 2000 차원까지 지원)
--- 데이터가 충분히 많을 때만 인덱스 생성 (최소 1000개 이상 권장)
-CREATE INDEX bible_chunks_embedding_idx 
-ON bible_chunks 
-USING ivfflat (embedding vector_cosine_ops)
-WITH (lists = 100);
+-- 5. 인덱스 재생성
+-- 1536 차원은 hnsw / ivfflat 인덱스를 모두 지원합니다 (최대 2000 차원까지 지원)
+-- 기본: HNSW. 빈 테이블에 먼저 만들어도 품질이 떨어지지 않고, 데이터(번역본)가 늘어도
+-- 검색 시간이 거의 늘지 않습니다. 검색 시 정확도는 hnsw.ef_search(기본 40)로 조정합니다.
+CREATE INDEX IF NOT EXISTS bible_chunks_embedding_hnsw_idx
+ON bible_chunks
+USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64);
+
+-- 대안: IVFFlat. 빌드가 빠르고 메모리를 덜 쓰지만 목록(lists)을 기존 데이터로 나누므로
+-- 반드시 데이터를 적재한 뒤에 만드세요 (빈 테이블에 만들면 재현율이 크게 떨어짐).
+-- lists ≈ 행 수 / 1000, 검색 시 ivfflat.probes ≈ sqrt(lists)
+-- CREATE INDEX bible_chunks_embedding_ivfflat_idx
+-- ON bible_chunks
+-- USING ivfflat (embedding vector_cosine_ops)
+-- WITH (lists = 100);
 
+-- 직접 조회(책 전체 / 장 / 절)용 인덱스
+CREATE INDEX IF NOT EXISTS bible_chunks_reference_idx
+ON bible_chunks (book_no, chapter_no, verse_start);
@@ -0,0 +1,101 @@
+-- 정수 참조 컬럼 추가 스크립트
+-- chapter/verse가 TEXT라서 숫자 순서로 정렬되지 않고("10"이 "2"보다 앞) 직접 조회에 인덱스가 없던
+-- 기존 DB에 book_no / chapter_no / verse_start / verse_end 컬럼과 복합 인덱스를 추가합니다.
+-- 기존 데이터는 책 이름, chapter 텍스트, 본문의 "절번호:" 표시로 채웁니다.
+
+-- 1. 컬럼 추가
+ALTER TABLE bible_chunks ADD COLUMN IF NOT EXISTS book_no SMALLINT;
+ALTER TABLE bible_chunks ADD COLUMN IF NOT EXISTS chapter_no SMALLINT;
+ALTER TABLE bible_chunks ADD COLUMN IF NOT EXISTS verse_start SMALLINT;
+ALTER TABLE bible_chunks ADD COLUMN IF NOT EXISTS verse_end SMALLINT;
+
+-- 2. 기존 데이터 채우기
+UPDATE bible_chunks
+SET
+    book_no = array_position(ARRAY[
+        '창세기', '출애굽기', '레위기', '민수기', '신명기',
+        '여호수아', '사사기', '룻기', '사무엘상', '사무엘하',
+        '열왕기상', '열왕기하', '역대상', '역대하', '에스라',
+        '느헤미야', '에스더', '욥기', '시편', '잠언',
+        '전도서', '아가', '이사야', '예레미야', '예레미야애가',
+        '에스겔', '다니엘', '호세아', '요엘', '아모스',
+        '오바댜', '요나', '미가', '나훔', '하박국',
+        '스바냐', '학개', '스가랴', '말라기',
+        '마태복음', '마가복음', '누가복음', '요한복음', '사도행전',
+        '로마서', '고린도전서', '고린도후서', '갈라디아서', '에베소서',
+        '빌립보서', '골로새서', '데살로니가전서', '데살로니가후서', '디모데전서',
+        '디모데후서', '디도서', '빌레몬서', '히브리서', '야고보서',
+        '베드로전서', '베드로후서', '요한일서', '요한이서', '요한삼서',
+        '유다서', '요한계시록'
+    ]::text[], book),
+    chapter_no = CASE WHEN chapter ~ '^[0-9]+$' THEN chapter::smallint END,
+    verse_start = (
+        SELECT MIN(marker[1]::smallint)
+        FROM regexp_matches(content, '(?:^|\s)([0-9]+):', 'g') AS marker
+    ),
+    verse_end = (
+        SELECT MAX(marker[1]::smallint)
+        FROM regexp_matches(content, '(?:^|\s)([0-9]+):', 'g') AS marker
+    );
+
+-- 3. 직접 조회(책 전체 / 장 / 절)용 복합 인덱스
+CREATE INDEX IF NOT EXISTS bible_chunks_reference_idx
+ON bible_chunks (book_no, chapter_no, verse_start);
+
+-- 4. 범위 필터 검색 인덱스를 정수 장 번호로 교체
+DROP INDEX IF EXISTS bible_chunks_book_chapter_idx;
+CREATE INDEX IF NOT EXISTS bible_chunks_book_chapter_idx
+ON bible_chunks (book, chapter_no);
+
+-- 5. 범위 필터 검색 함수를 정수 장 번호로 교체
+CREATE OR REPLACE FUNCTION match_documents_filtered(
+    query_embedding vector(1536),
+    match_threshold float,
+    match_count int,
+    filter_books text[] DEFAULT NULL,
+    chapter_from int DEFAULT NULL,
+    chapter_to int DEFAULT NULL
+)
+RETURNS TABLE (
+    id bigint,
+    book text,
+    chapter text,
+    verse text,
+    content text,
+    similarity float
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    RETURN QUERY
+    WITH scoped AS MATERIALIZED (
+        SELECT
+            bible_chunks.id,
+            bible_chunks.book,
+            bible_chunks.chapter,
+            bible_chunks.verse,
+            bible_chunks.content,
+            bible_chunks.embedding
+        FROM bible_chunks
+        WHERE (filter_books IS NULL OR bible_chunks.book = ANY(filter_books))
+          AND (
+              (chapter_from IS NULL AND chapter_to IS NULL)
+              OR bible_chunks.chapter_no BETWEEN COALESCE(chapter_from, 1) AND COALESCE(chapter_to, 32767)
+          )
+    )
+    SELECT
+        scoped.id,
+        scoped.book,
+        scoped.chapter,
+        scoped.verse,
+        scoped.content,
+        1 - (scoped.embedding <=> query_embedding) AS similarity
+    FROM scoped
+    WHERE 1 - (scoped.embedding <=> query_embedding) > match_threshold
+    ORDER BY scoped.embedding <=> query_embedding
+    LIMIT match_count;
+END;
+$$;
+
+-- 6. 통계 갱신
+ANALYZE bible_chunks;
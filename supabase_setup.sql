@@ -5,21 +5,183 @@
 CREATE EXTENSION IF NOT EXISTS vector;
 
 -- 2. 테이블 생성 (임베딩 차원: 1536, output_dimensionality로 설정)
+-- 번역본(translation)별 파티션으로 나눠, 번역본마다 벡터/참조 인덱스가 따로 만들어지고
+-- 한 번역본 검색은 그 파티션만 읽습니다 (번역본을 추가해도 기존 번역본 검색은 느려지지 않음).
 CREATE TABLE IF NOT EXISTS bible_chunks (
-    id BIGSERIAL PRIMARY KEY,
+    id BIGSERIAL,
+    translation TEXT NOT NULL DEFAULT 'krv',  -- 번역본 코드 (krv: 개역한글, nkrv: 개역개정 등)
     book TEXT NOT NULL,
     chapter TEXT,
     verse TEXT,
     content TEXT NOT NULL,
+    -- 정수 참조 컬럼 (숫자 순서 정렬과 인덱스 범위 조회용)
+    book_no SMALLINT,  -- 정경 순서 (창세기 1 ~ 요한계시록 66)
+    chapter_no SMALLINT,
+    verse_start SMALLINT,  -- 청크에 들어 있는 첫 절
+    verse_end SMALLINT,  -- 청크에 들어 있는 마지막 절
     embedding vector(1536),  -- output_dimensionality로 설정된 차원
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    embedding_coarse vector(256),  -- embedding 앞 256차원을 재정규화한 값 (coarse-to-fine 1단계)
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (id, translation)
+) PARTITION BY LIST (translation);
+
+-- 기본 번역본(개역한글) 파티션. 다른 번역본 파티션은 적재 스크립트가
+-- ensure_translation_partition 함수로 만듭니다.
+CREATE TABLE IF NOT EXISTS bible_chunks_krv PARTITION OF bible_chunks FOR VALUES IN ('krv');
+
+-- 2-2. 장 중심 임베딩 테이블 (2단계 장 라우팅 검색용, 적재 스크립트가 채움)
+CREATE TABLE IF NOT EXISTS bible_chapter_centroids (
+    translation TEXT NOT NULL DEFAULT 'krv',
+    book_no SMALLINT NOT NULL,
+    chapter_no SMALLINT NOT NULL,
+    book TEXT NOT NULL,
+    chapter TEXT NOT NULL,
+    embedding vector(1536),  -- 장에 속한 청크 임베딩(단위 길이)의 평균을 다시 정규화한 값
+    chunk_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (translation, book_no, chapter_no)
 );
 
--- 3. 벡터 검색 함수 생성
+-- 2-3. 관련 구절 이웃 테이블 (청크마다 다른 장에서 가장 가까운 청크 몇 개, build_neighbors 스크립트가 채움)
+CREATE TABLE IF NOT EXISTS bible_chunk_neighbors (
+    chunk_id BIGINT NOT NULL,  -- bible_chunks.id (id는 모든 번역본 파티션에서 유일)
+    rank SMALLINT NOT NULL,  -- 1이 가장 가까운 이웃
+    neighbor_id BIGINT NOT NULL,  -- 같은 번역본의 청크
+    similarity REAL NOT NULL,
+    PRIMARY KEY (chunk_id, rank)
+);
+
+-- 3. 벡터 검색 함수 생성 (번역본 인자가 없는 이전 버전이 있으면 먼저 삭제)
+-- 모든 검색 함수는 filter_translation 번역본 파티션 하나만 검색합니다.
+DROP FUNCTION IF EXISTS match_documents(vector, float, int);
+DROP FUNCTION IF EXISTS match_documents(vector, float, int, int, int);
+DROP FUNCTION IF EXISTS match_documents_filtered(vector, float, int, text[], int, int);
+DROP FUNCTION IF EXISTS match_documents_coarse(vector, vector, float, int, int, int);
+DROP FUNCTION IF EXISTS match_documents_routed(vector, float, int, int);
+
 CREATE OR REPLACE FUNCTION match_documents(
     query_embedding vector(1536),
     match_threshold float,
-    match_count int
+    match_count int,
+    ef_search int DEFAULT NULL,
+    probes int DEFAULT NULL,
+    filter_translation text DEFAULT 'krv'
+)
+RETURNS TABLE (
+    id bigint,
+    book text,
+    chapter text,
+    verse text,
+    content text,
+    similarity float
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- 호출마다 근사 검색 정확도 조정 (이 트랜잭션에서만 적용, NULL이면 DB 기본값)
+    IF ef_search IS NOT NULL THEN
+        PERFORM set_config('hnsw.ef_search', ef_search::text, true);
+    END IF;
+    IF probes IS NOT NULL THEN
+        PERFORM set_config('ivfflat.probes', probes::text, true);
+    END IF;
+
+    -- 인덱스로 가까운 순서의 match_count개를 먼저 찾고, 임계값은 그 뒤에 적용
+    -- (WHERE에 거리 조건을 두면 모든 행의 거리를 계산하게 되어 인덱스를 쓰지 못함)
+    RETURN QUERY
+    SELECT
+        nearest.id,
+        nearest.book,
+        nearest.chapter,
+        nearest.verse,
+        nearest.content,
+        1 - nearest.distance AS similarity
+    FROM (
+        SELECT
+            bible_chunks.id,
+            bible_chunks.book,
+            bible_chunks.chapter,
+            bible_chunks.verse,
+            bible_chunks.content,
+            bible_chunks.embedding <=> query_embedding AS distance
+        FROM bible_chunks
+        WHERE bible_chunks.translation = filter_translation
+        ORDER BY bible_chunks.embedding <=> query_embedding
+        LIMIT match_count
+    ) AS nearest
+    WHERE 1 - nearest.distance > match_threshold
+    ORDER BY nearest.distance;
+END;
+$$;
+
+-- 3-1. 범위 필터 벡터 검색 함수 (책 목록 / 장 범위를 검색 전에 적용)
+-- 신약, 복음서 같은 묶음은 애플리케이션에서 책 목록으로 바꿔 filter_books로 전달합니다.
+-- 범위 안의 행만 먼저 고른 뒤(MATERIALIZED) 그 안에서 정확한 거리 순으로 정렬하므로
+-- 근사 인덱스(hnsw/ivfflat)로 찾은 뒤 필터링할 때처럼 결과가 모자라지 않습니다.
+-- 필터 없이 호출하면 전체 정확 검색이 되므로 재현율 측정의 기준으로도 씁니다.
+CREATE OR REPLACE FUNCTION match_documents_filtered(
+    query_embedding vector(1536),
+    match_threshold float,
+    match_count int,
+    filter_books text[] DEFAULT NULL,
+    chapter_from int DEFAULT NULL,
+    chapter_to int DEFAULT NULL,
+    filter_translation text DEFAULT 'krv'
+)
+RETURNS TABLE (
+    id bigint,
+    book text,
+    chapter text,
+    verse text,
+    content text,
+    similarity float
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    RETURN QUERY
+    WITH scoped AS MATERIALIZED (
+        SELECT
+            bible_chunks.id,
+            bible_chunks.book,
+            bible_chunks.chapter,
+            bible_chunks.verse,
+            bible_chunks.content,
+            bible_chunks.embedding
+        FROM bible_chunks
+        WHERE bible_chunks.translation = filter_translation
+          AND (filter_books IS NULL OR bible_chunks.book = ANY(filter_books))
+          AND (
+              (chapter_from IS NULL AND chapter_to IS NULL)
+              OR bible_chunks.chapter_no BETWEEN COALESCE(chapter_from, 1) AND COALESCE(chapter_to, 32767)
+          )
+    )
+    SELECT
+        scoped.id,
+        scoped.book,
+        scoped.chapter,
+        scoped.verse,
+        scoped.content,
+        1 - (scoped.embedding <=> query_embedding) AS similarity
+    FROM scoped
+    WHERE 1 - (scoped.embedding <=> query_embedding) > match_threshold
+    ORDER BY scoped.embedding <=> query_embedding
+    LIMIT match_count;
+END;
+$$;
+
+-- 3-2. coarse-to-fine 벡터 검색 함수 (Matryoshka 임베딩)
+-- gemini-embedding-001은 앞부분 차원만 잘라 써도 의미가 유지되므로, 256차원 벡터로
+-- candidate_count개 후보를 고른 뒤 그 후보만 1536차원 벡터로 다시 정렬합니다.
+-- coarse_embedding은 애플리케이션에서 쿼리 임베딩 앞 256차원을 재정규화해 전달합니다
+-- (차원을 바꾸려면 embedding_coarse 컬럼, 이 함수, COARSE_EMBEDDING_DIMENSION을 함께 변경).
+CREATE OR REPLACE FUNCTION match_documents_coarse(
+    query_embedding vector(1536),
+    coarse_embedding vector(256),
+    match_threshold float,
+    match_count int,
+    candidate_count int DEFAULT 100,
+    ef_search int DEFAULT NULL,
+    filter_translation text DEFAULT 'krv'
 )
 RETURNS TABLE (
     id bigint,
@@ -32,28 +194,231 @@ RETURNS TABLE (
 LANGUAGE plpgsql
 AS $$
 BEGIN
+    -- HNSW는 ef_search개까지만 돌려주므로 후보 수 이상으로 설정
+    PERFORM set_config('hnsw.ef_search', GREATEST(candidate_count, COALESCE(ef_search, 40))::text, true);
+
     RETURN QUERY
+    -- 1단계: 저차원 벡터 인덱스로 후보 선택 (전체 차원 대비 약 1/6 계산량)
+    WITH candidates AS MATERIALIZED (
+        SELECT bible_chunks.id AS candidate_id
+        FROM bible_chunks
+        WHERE bible_chunks.translation = filter_translation
+        ORDER BY bible_chunks.embedding_coarse <=> coarse_embedding
+        LIMIT candidate_count
+    )
+    -- 2단계: 후보만 전체 차원 벡터로 다시 정렬
     SELECT
-        bible_chunks.id,
+        reranked.id,
+        reranked.book,
+        reranked.chapter,
+        reranked.verse,
+        reranked.content,
+        1 - reranked.distance AS similarity
+    FROM (
+        SELECT
+            bible_chunks.id,
+            bible_chunks.book,
+            bible_chunks.chapter,
+            bible_chunks.verse,
+            bible_chunks.content,
+            bible_chunks.embedding <=> query_embedding AS distance
+        FROM bible_chunks
+        JOIN candidates ON candidates.candidate_id = bible_chunks.id
+        WHERE bible_chunks.translation = filter_translation
+        ORDER BY bible_chunks.embedding <=> query_embedding
+        LIMIT match_count
+    ) AS reranked
+    WHERE 1 - reranked.distance > match_threshold
+    ORDER BY reranked.distance;
+END;
+$$;
+
+-- 3-3. 장 라우팅 벡터 검색 함수
+-- 질문과 가까운 장 chapter_count개를 장 중심 임베딩으로 먼저 고른 뒤, 그 장의 청크만
+-- 정확히 비교합니다. 장 중심은 약 1,189개라 인덱스 없이 전부 비교해도 빠르고,
+-- 2단계도 수백 행만 비교하므로 근사 인덱스 없이 정확한 순위를 돌려줍니다.
+CREATE OR REPLACE FUNCTION match_documents_routed(
+    query_embedding vector(1536),
+    match_threshold float,
+    match_count int,
+    chapter_count int DEFAULT 8,
+    filter_translation text DEFAULT 'krv'
+)
+RETURNS TABLE (
+    id bigint,
+    book text,
+    chapter text,
+    verse text,
+    content text,
+    similarity float
+)
+LANGUAGE sql STABLE
+AS $$
+    -- 1단계: 장 중심 임베딩(약 1,189개)을 정확히 비교해 가까운 장 선택
+    WITH routed AS MATERIALIZED (
+        SELECT bible_chapter_centroids.book_no, bible_chapter_centroids.chapter_no
+        FROM bible_chapter_centroids
+        WHERE bible_chapter_centroids.translation = filter_translation
+        ORDER BY bible_chapter_centroids.embedding <=> query_embedding
+        LIMIT chapter_count
+    )
+    -- 2단계: 선택한 장의 청크만 전체 차원 벡터로 정확히 정렬 (bible_chunks_reference_idx 사용)
+    SELECT
+        ranked.id,
+        ranked.book,
+        ranked.chapter,
+        ranked.verse,
+        ranked.content,
+        1 - ranked.distance AS similarity
+    FROM (
+        SELECT
+            bible_chunks.id,
+            bible_chunks.book,
+            bible_chunks.chapter,
+            bible_chunks.verse,
+            bible_chunks.content,
+            bible_chunks.embedding <=> query_embedding AS distance
+        FROM bible_chunks
+        JOIN routed
+          ON routed.book_no = bible_chunks.book_no
+         AND routed.chapter_no = bible_chunks.chapter_no
+        WHERE bible_chunks.translation = filter_translation
+        ORDER BY bible_chunks.embedding <=> query_embedding
+        LIMIT match_count
+    ) AS ranked
+    WHERE 1 - ranked.distance > match_threshold
+    ORDER BY ranked.distance;
+$$;
+
+-- 3-4. 관련 구절 이웃 계산 / 조회 함수
+-- build_chunk_neighbors는 id 범위의 청크마다 다른 장에서 가장 가까운 청크 neighbor_count개를
+-- 기존 임베딩으로 찾아 저장합니다 (python -m app.scripts.build_neighbors가 범위를 나눠 호출).
+-- related_passages는 검색 결과 청크들의 이웃을 한 번에 돌려주므로, 관련 구절을 찾는 데
+-- 쿼리 임베딩이나 추가 벡터 검색이 필요 없습니다.
+CREATE OR REPLACE FUNCTION build_chunk_neighbors(
+    from_id bigint,
+    to_id bigint,
+    neighbor_count int DEFAULT 5
+)
+RETURNS int
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    inserted int;
+BEGIN
+    -- 같은 장의 청크를 걸러낸 뒤에도 neighbor_count개가 남도록 HNSW 후보를 넉넉히 봄
+    PERFORM set_config('hnsw.ef_search', GREATEST(100, neighbor_count * 10)::text, true);
+
+    DELETE FROM bible_chunk_neighbors
+    WHERE chunk_id BETWEEN from_id AND to_id;
+
+    INSERT INTO bible_chunk_neighbors (chunk_id, rank, neighbor_id, similarity)
+    SELECT
+        source.id,
+        nearest.rank,
+        nearest.id,
+        nearest.similarity
+    FROM bible_chunks AS source
+    CROSS JOIN LATERAL (
+        SELECT
+            candidates.id,
+            (row_number() OVER (ORDER BY candidates.distance))::smallint AS rank,
+            (1 - candidates.distance)::real AS similarity
+        FROM (
+            SELECT
+                other.id,
+                other.embedding <=> source.embedding AS distance
+            FROM bible_chunks AS other
+            WHERE other.translation = source.translation
+              AND other.id <> source.id
+              AND (other.book, other.chapter) IS DISTINCT FROM (source.book, source.chapter)
+            ORDER BY other.embedding <=> source.embedding
+            LIMIT neighbor_count
+        ) AS candidates
+    ) AS nearest
+    WHERE source.id BETWEEN from_id AND to_id
+      AND source.embedding IS NOT NULL;
+
+    GET DIAGNOSTICS inserted = ROW_COUNT;
+    RETURN inserted;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION related_passages(
+    chunk_ids bigint[],
+    per_chunk int DEFAULT 3
+)
+RETURNS TABLE (
+    chunk_id bigint,
+    book text,
+    chapter text,
+    verse text,
+    similarity float
+)
+LANGUAGE sql STABLE
+AS $$
+    SELECT
+        bible_chunk_neighbors.chunk_id,
         bible_chunks.book,
         bible_chunks.chapter,
         bible_chunks.verse,
-        bible_chunks.content,
-        1 - (bible_chunks.embedding <=> query_embedding) AS similarity
-    FROM bible_chunks
-    WHERE 1 - (bible_chunks.embedding <=> query_embedding) > match_threshold
-    ORDER BY bible_chunks.embedding <=> query_embedding
-    LIMIT match_count;
+        bible_chunk_neighbors.similarity
+    FROM bible_chunk_neighbors
+    JOIN bible_chunks ON bible_chunks.id = bible_chunk_neighbors.neighbor_id
+    WHERE bible_chunk_neighbors.chunk_id = ANY(chunk_ids)
+      AND bible_chunk_neighbors.rank <= per_chunk
+    ORDER BY bible_chunk_neighbors.chunk_id, bible_chunk_neighbors.rank;
+$$;
+
+-- 3-5. 번역본 파티션 생성 함수 (적재 스크립트가 새 번역본을 올리기 전에 호출)
+-- 부모 테이블의 인덱스(HNSW, 참조 인덱스 등)는 새 파티션에도 자동으로 만들어집니다.
+CREATE OR REPLACE FUNCTION ensure_translation_partition(translation_code text)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF translation_code !~ '^[a-z0-9_]+$' THEN
+        RAISE EXCEPTION '번역본 코드는 영문 소문자/숫자/_만 사용할 수 있습니다: %', translation_code;
+    END IF;
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF bible_chunks FOR VALUES IN (%L)',
+        'bible_chunks_' || translation_code,
+        translation_code
+    );
 END;
 $$;
 
 -- 4. 인덱스 생성 (검색 성능 향상)
--- 1536 차원은 ivfflat 인덱스를 지원합니다 (최대 2000 차원까지 지원)
--- 데이터가 충분히 많을 때만 인덱스 생성 (최소 1000개 이상 권장)
-CREATE INDEX IF NOT EXISTS bible_chunks_embedding_idx 
-ON bible_chunks 
-USING ivfflat (embedding vector_cosine_ops)
-WITH (lists = 100);
+-- 부모 테이블에 만든 인덱스는 번역본 파티션마다 따로 만들어집니다.
+-- 1536 차원은 hnsw / ivfflat 인덱스를 모두 지원합니다 (최대 2000 차원까지 지원)
+-- 기본: HNSW. 빈 테이블에 먼저 만들어도 품질이 떨어지지 않고, 데이터(번역본)가 늘어도
+-- 검색 시간이 거의 늘지 않습니다. 검색 시 정확도는 hnsw.ef_search(기본 40)로 조정합니다.
+CREATE INDEX IF NOT EXISTS bible_chunks_embedding_hnsw_idx
+ON bible_chunks
+USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64);
+
+-- 대안: IVFFlat. 빌드가 빠르고 메모리를 덜 쓰지만 목록(lists)을 기존 데이터로 나누므로
+-- 반드시 데이터를 적재한 뒤에 만드세요 (빈 테이블에 만들면 재현율이 크게 떨어짐).
+-- lists ≈ 행 수 / 1000, 검색 시 ivfflat.probes ≈ sqrt(lists)
+-- CREATE INDEX bible_chunks_embedding_ivfflat_idx
+-- ON bible_chunks
+-- USING ivfflat (embedding vector_cosine_ops)
+-- WITH (lists = 100);
+
+-- coarse-to-fine 1단계용 저차원 벡터 인덱스
+CREATE INDEX IF NOT EXISTS bible_chunks_embedding_coarse_idx
+ON bible_chunks
+USING hnsw (embedding_coarse vector_cosine_ops)
+WITH (m = 16, ef_construction = 64);
+
+-- 직접 조회(책 전체 / 장 / 절)용 인덱스
+CREATE INDEX IF NOT EXISTS bible_chunks_reference_idx
+ON bible_chunks (book_no, chapter_no, verse_start);
+
+-- 범위 필터 검색용 인덱스
+CREATE INDEX IF NOT EXISTS bible_chunks_book_chapter_idx
+ON bible_chunks (book, chapter_no);
 
 -- 5. (선택사항) RLS 정책 추가 (보안 강화용)
 -- Table Editor에서 RLS를 활성화한 경우에만 아래 주석을 해제하세요
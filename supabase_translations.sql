@@ -0,0 +1,349 @@
+-- 번역본(translation) 추가 스크립트
+-- 기존 단일 번역본 DB를 번역본별 파티션 구조로 바꿉니다.
+-- - bible_chunks에 translation 컬럼을 추가하고, 기존 행(개역한글)은 bible_chunks_krv 파티션이 됩니다.
+-- - 기존 인덱스는 그대로 krv 파티션의 인덱스로 연결되므로 다시 만들지 않습니다.
+-- - 검색 함수는 filter_translation 인자(기본 'krv')를 받아 그 번역본 파티션만 검색합니다.
+-- 다른 마이그레이션 스크립트(supabase_*_*.sql)를 모두 적용한 뒤 마지막에 실행하세요.
+-- 적용 후 .env의 TRANSLATIONS에 적재한 번역본 코드를 적으면 백엔드가 번역본 인자를 전달합니다.
+
+BEGIN;
+
+-- 1. 기존 테이블을 krv 파티션으로 전환
+ALTER TABLE bible_chunks ADD COLUMN IF NOT EXISTS translation TEXT NOT NULL DEFAULT 'krv';
+ALTER TABLE bible_chunks RENAME TO bible_chunks_krv;
+ALTER TABLE bible_chunks_krv ADD CONSTRAINT bible_chunks_krv_translation_check CHECK (translation = 'krv');
+
+-- 기존 인덱스 이름은 부모 테이블 인덱스가 쓰도록 krv 파티션 이름으로 변경
+ALTER INDEX IF EXISTS bible_chunks_pkey RENAME TO bible_chunks_krv_pkey;
+ALTER INDEX IF EXISTS bible_chunks_embedding_hnsw_idx RENAME TO bible_chunks_krv_embedding_hnsw_idx;
+ALTER INDEX IF EXISTS bible_chunks_embedding_coarse_idx RENAME TO bible_chunks_krv_embedding_coarse_idx;
+ALTER INDEX IF EXISTS bible_chunks_reference_idx RENAME TO bible_chunks_krv_reference_idx;
+ALTER INDEX IF EXISTS bible_chunks_book_chapter_idx RENAME TO bible_chunks_krv_book_chapter_idx;
+
+CREATE TABLE bible_chunks (LIKE bible_chunks_krv INCLUDING DEFAULTS)
+PARTITION BY LIST (translation);
+ALTER TABLE bible_chunks ADD PRIMARY KEY (id, translation);
+ALTER SEQUENCE bible_chunks_id_seq OWNED BY bible_chunks.id;
+ALTER TABLE bible_chunks ATTACH PARTITION bible_chunks_krv FOR VALUES IN ('krv');
+
+-- 2. 부모 테이블 인덱스 (같은 정의의 krv 파티션 인덱스는 새로 만들지 않고 연결됨)
+CREATE INDEX IF NOT EXISTS bible_chunks_embedding_hnsw_idx
+ON bible_chunks
+USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64);
+
+CREATE INDEX IF NOT EXISTS bible_chunks_embedding_coarse_idx
+ON bible_chunks
+USING hnsw (embedding_coarse vector_cosine_ops)
+WITH (m = 16, ef_construction = 64);
+
+CREATE INDEX IF NOT EXISTS bible_chunks_reference_idx
+ON bible_chunks (book_no, chapter_no, verse_start);
+
+CREATE INDEX IF NOT EXISTS bible_chunks_book_chapter_idx
+ON bible_chunks (book, chapter_no);
+
+-- 3. 장 중심 임베딩과 이웃 테이블
+ALTER TABLE bible_chapter_centroids ADD COLUMN IF NOT EXISTS translation TEXT NOT NULL DEFAULT 'krv';
+ALTER TABLE bible_chapter_centroids DROP CONSTRAINT IF EXISTS bible_chapter_centroids_pkey;
+ALTER TABLE bible_chapter_centroids ADD PRIMARY KEY (translation, book_no, chapter_no);
+
+-- 이웃은 번역본 파티션에 걸쳐 있으므로 외래 키 대신 build_neighbors로 다시 계산
+ALTER TABLE bible_chunk_neighbors DROP CONSTRAINT IF EXISTS bible_chunk_neighbors_chunk_id_fkey;
+ALTER TABLE bible_chunk_neighbors DROP CONSTRAINT IF EXISTS bible_chunk_neighbors_neighbor_id_fkey;
+
+-- 4. 검색 함수 (번역본 인자가 없는 이전 버전 삭제 후 재생성)
+DROP FUNCTION IF EXISTS match_documents(vector, float, int);
+DROP FUNCTION IF EXISTS match_documents(vector, float, int, int, int);
+DROP FUNCTION IF EXISTS match_documents_filtered(vector, float, int, text[], int, int);
+DROP FUNCTION IF EXISTS match_documents_coarse(vector, vector, float, int, int, int);
+DROP FUNCTION IF EXISTS match_documents_routed(vector, float, int, int);
+
+CREATE OR REPLACE FUNCTION match_documents(
+    query_embedding vector(1536),
+    match_threshold float,
+    match_count int,
+    ef_search int DEFAULT NULL,
+    probes int DEFAULT NULL,
+    filter_translation text DEFAULT 'krv'
+)
+RETURNS TABLE (
+    id bigint,
+    book text,
+    chapter text,
+    verse text,
+    content text,
+    similarity float
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- 호출마다 근사 검색 정확도 조정 (이 트랜잭션에서만 적용, NULL이면 DB 기본값)
+    IF ef_search IS NOT NULL THEN
+        PERFORM set_config('hnsw.ef_search', ef_search::text, true);
+    END IF;
+    IF probes IS NOT NULL THEN
+        PERFORM set_config('ivfflat.probes', probes::text, true);
+    END IF;
+
+    -- 인덱스로 가까운 순서의 match_count개를 먼저 찾고, 임계값은 그 뒤에 적용
+    -- (WHERE에 거리 조건을 두면 모든 행의 거리를 계산하게 되어 인덱스를 쓰지 못함)
+    RETURN QUERY
+    SELECT
+        nearest.id,
+        nearest.book,
+        nearest.chapter,
+        nearest.verse,
+        nearest.content,
+        1 - nearest.distance AS similarity
+    FROM (
+        SELECT
+            bible_chunks.id,
+            bible_chunks.book,
+            bible_chunks.chapter,
+            bible_chunks.verse,
+            bible_chunks.content,
+            bible_chunks.embedding <=> query_embedding AS distance
+        FROM bible_chunks
+        WHERE bible_chunks.translation = filter_translation
+        ORDER BY bible_chunks.embedding <=> query_embedding
+        LIMIT match_count
+    ) AS nearest
+    WHERE 1 - nearest.distance > match_threshold
+    ORDER BY nearest.distance;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION match_documents_filtered(
+    query_embedding vector(1536),
+    match_threshold float,
+    match_count int,
+    filter_books text[] DEFAULT NULL,
+    chapter_from int DEFAULT NULL,
+    chapter_to int DEFAULT NULL,
+    filter_translation text DEFAULT 'krv'
+)
+RETURNS TABLE (
+    id bigint,
+    book text,
+    chapter text,
+    verse text,
+    content text,
+    similarity float
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    RETURN QUERY
+    WITH scoped AS MATERIALIZED (
+        SELECT
+            bible_chunks.id,
+            bible_chunks.book,
+            bible_chunks.chapter,
+            bible_chunks.verse,
+            bible_chunks.content,
+            bible_chunks.embedding
+        FROM bible_chunks
+        WHERE bible_chunks.translation = filter_translation
+          AND (filter_books IS NULL OR bible_chunks.book = ANY(filter_books))
+          AND (
+              (chapter_from IS NULL AND chapter_to IS NULL)
+              OR bible_chunks.chapter_no BETWEEN COALESCE(chapter_from, 1) AND COALESCE(chapter_to, 32767)
+          )
+    )
+    SELECT
+        scoped.id,
+        scoped.book,
+        scoped.chapter,
+        scoped.verse,
+        scoped.content,
+        1 - (scoped.embedding <=> query_embedding) AS similarity
+    FROM scoped
+    WHERE 1 - (scoped.embedding <=> query_embedding) > match_threshold
+    ORDER BY scoped.embedding <=> query_embedding
+    LIMIT match_count;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION match_documents_coarse(
+    query_embedding vector(1536),
+    coarse_embedding vector(256),
+    match_threshold float,
+    match_count int,
+    candidate_count int DEFAULT 100,
+    ef_search int DEFAULT NULL,
+    filter_translation text DEFAULT 'krv'
+)
+RETURNS TABLE (
+    id bigint,
+    book text,
+    chapter text,
+    verse text,
+    content text,
+    similarity float
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- HNSW는 ef_search개까지만 돌려주므로 후보 수 이상으로 설정
+    PERFORM set_config('hnsw.ef_search', GREATEST(candidate_count, COALESCE(ef_search, 40))::text, true);
+
+    RETURN QUERY
+    -- 1단계: 저차원 벡터 인덱스로 후보 선택 (전체 차원 대비 약 1/6 계산량)
+    WITH candidates AS MATERIALIZED (
+        SELECT bible_chunks.id AS candidate_id
+        FROM bible_chunks
+        WHERE bible_chunks.translation = filter_translation
+        ORDER BY bible_chunks.embedding_coarse <=> coarse_embedding
+        LIMIT candidate_count
+    )
+    -- 2단계: 후보만 전체 차원 벡터로 다시 정렬
+    SELECT
+        reranked.id,
+        reranked.book,
+        reranked.chapter,
+        reranked.verse,
+        reranked.content,
+        1 - reranked.distance AS similarity
+    FROM (
+        SELECT
+            bible_chunks.id,
+            bible_chunks.book,
+            bible_chunks.chapter,
+            bible_chunks.verse,
+            bible_chunks.content,
+            bible_chunks.embedding <=> query_embedding AS distance
+        FROM bible_chunks
+        JOIN candidates ON candidates.candidate_id = bible_chunks.id
+        WHERE bible_chunks.translation = filter_translation
+        ORDER BY bible_chunks.embedding <=> query_embedding
+        LIMIT match_count
+    ) AS reranked
+    WHERE 1 - reranked.distance > match_threshold
+    ORDER BY reranked.distance;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION match_documents_routed(
+    query_embedding vector(1536),
+    match_threshold float,
+    match_count int,
+    chapter_count int DEFAULT 8,
+    filter_translation text DEFAULT 'krv'
+)
+RETURNS TABLE (
+    id bigint,
+    book text,
+    chapter text,
+    verse text,
+    content text,
+    similarity float
+)
+LANGUAGE sql STABLE
+AS $$
+    -- 1단계: 장 중심 임베딩(약 1,189개)을 정확히 비교해 가까운 장 선택
+    WITH routed AS MATERIALIZED (
+        SELECT bible_chapter_centroids.book_no, bible_chapter_centroids.chapter_no
+        FROM bible_chapter_centroids
+        WHERE bible_chapter_centroids.translation = filter_translation
+        ORDER BY bible_chapter_centroids.embedding <=> query_embedding
+        LIMIT chapter_count
+    )
+    -- 2단계: 선택한 장의 청크만 전체 차원 벡터로 정확히 정렬 (bible_chunks_reference_idx 사용)
+    SELECT
+        ranked.id,
+        ranked.book,
+        ranked.chapter,
+        ranked.verse,
+        ranked.content,
+        1 - ranked.distance AS similarity
+    FROM (
+        SELECT
+            bible_chunks.id,
+            bible_chunks.book,
+            bible_chunks.chapter,
+            bible_chunks.verse,
+            bible_chunks.content,
+            bible_chunks.embedding <=> query_embedding AS distance
+        FROM bible_chunks
+        JOIN routed
+          ON routed.book_no = bible_chunks.book_no
+         AND routed.chapter_no = bible_chunks.chapter_no
+        WHERE bible_chunks.translation = filter_translation
+        ORDER BY bible_chunks.embedding <=> query_embedding
+        LIMIT match_count
+    ) AS ranked
+    WHERE 1 - ranked.distance > match_threshold
+    ORDER BY ranked.distance;
+$$;
+
+CREATE OR REPLACE FUNCTION build_chunk_neighbors(
+    from_id bigint,
+    to_id bigint,
+    neighbor_count int DEFAULT 5
+)
+RETURNS int
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    inserted int;
+BEGIN
+    -- 같은 장의 청크를 걸러낸 뒤에도 neighbor_count개가 남도록 HNSW 후보를 넉넉히 봄
+    PERFORM set_config('hnsw.ef_search', GREATEST(100, neighbor_count * 10)::text, true);
+
+    DELETE FROM bible_chunk_neighbors
+    WHERE chunk_id BETWEEN from_id AND to_id;
+
+    INSERT INTO bible_chunk_neighbors (chunk_id, rank, neighbor_id, similarity)
+    SELECT
+        source.id,
+        nearest.rank,
+        nearest.id,
+        nearest.similarity
+    FROM bible_chunks AS source
+    CROSS JOIN LATERAL (
+        SELECT
+            candidates.id,
+            (row_number() OVER (ORDER BY candidates.distance))::smallint AS rank,
+            (1 - candidates.distance)::real AS similarity
+        FROM (
+            SELECT
+                other.id,
+                other.embedding <=> source.embedding AS distance
+            FROM bible_chunks AS other
+            WHERE other.translation = source.translation
+              AND other.id <> source.id
+              AND (other.book, other.chapter) IS DISTINCT FROM (source.book, source.chapter)
+            ORDER BY other.embedding <=> source.embedding
+            LIMIT neighbor_count
+        ) AS candidates
+    ) AS nearest
+    WHERE source.id BETWEEN from_id AND to_id
+      AND source.embedding IS NOT NULL;
+
+    GET DIAGNOSTICS inserted = ROW_COUNT;
+    RETURN inserted;
+END;
+$$;
+
+-- 5. 번역본 파티션 생성 함수
+CREATE OR REPLACE FUNCTION ensure_translation_partition(translation_code text)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF translation_code !~ '^[a-z0-9_]+$' THEN
+        RAISE EXCEPTION '번역본 코드는 영문 소문자/숫자/_만 사용할 수 있습니다: %', translation_code;
+    END IF;
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF bible_chunks FOR VALUES IN (%L)',
+        'bible_chunks_' || translation_code,
+        translation_code
+    );
+END;
+$$;
+
+COMMIT;
+
+-- 6. 통계 갱신
+ANALYZE bible_chunks;
@@ -0,0 +1,83 @@
+-- 벡터 검색 함수 / 인덱스 교체 스크립트
+-- 기존 DB(ivfflat 인덱스, 거리 조건을 WHERE에 둔 match_documents)를 인덱스 우선 검색으로 바꿉니다.
+-- 테이블 데이터는 그대로 유지됩니다.
+
+-- 1. 이전 검색 함수 삭제 (인자 3개 버전)
+DROP FUNCTION IF EXISTS match_documents(vector, float, int);
+
+-- 2. 새 검색 함수 (가까운 순서로 먼저 자르고 임계값은 나중에 적용, 호출별 ef_search/probes)
+CREATE OR REPLACE FUNCTION match_documents(
+    query_embedding vector(1536),
+    match_threshold float,
+    match_count int,
+    ef_search int DEFAULT NULL,
+    probes int DEFAULT NULL
+)
+RETURNS TABLE (
+    id bigint,
+    book text,
+    chapter text,
+    verse text,
+    content text,
+    similarity float
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- 호출마다 근사 검색 정확도 조정 (이 트랜잭션에서만 적용, NULL이면 DB 기본값)
+    IF ef_search IS NOT NULL THEN
+        PERFORM set_config('hnsw.ef_search', ef_search::text, true);
+    END IF;
+    IF probes IS NOT NULL THEN
+        PERFORM set_config('ivfflat.probes', probes::text, true);
+    END IF;
+
+    -- 인덱스로 가까운 순서의 match_count개를 먼저 찾고, 임계값은 그 뒤에 적용
+    -- (WHERE에 거리 조건을 두면 모든 행의 거리를 계산하게 되어 인덱스를 쓰지 못함)
+    RETURN QUERY
+    SELECT
+        nearest.id,
+        nearest.book,
+        nearest.chapter,
+        nearest.verse,
+        nearest.content,
+        1 - nearest.distance AS similarity
+    FROM (
+        SELECT
+            bible_chunks.id,
+            bible_chunks.book,
+            bible_chunks.chapter,
+            bible_chunks.verse,
+            bible_chunks.content,
+            bible_chunks.embedding <=> query_embedding AS distance
+        FROM bible_chunks
+        ORDER BY bible_chunks.embedding <=> query_embedding
+        LIMIT match_count
+    ) AS nearest
+    WHERE 1 - nearest.distance > match_threshold
+    ORDER BY nearest.distance;
+END;
+$$;
+
+-- 3. 빈 테이블에 만들어졌을 수 있는 이전 ivfflat 인덱스 삭제
+DROP INDEX IF EXISTS bible_chunks_embedding_idx;
+
+-- 4. 새 인덱스
+-- 1536 차원은 hnsw / ivfflat 인덱스를 모두 지원합니다 (최대 2000 차원까지 지원)
+-- 기본: HNSW. 빈 테이블에 먼저 만들어도 품질이 떨어지지 않고, 데이터(번역본)가 늘어도
+-- 검색 시간이 거의 늘지 않습니다. 검색 시 정확도는 hnsw.ef_search(기본 40)로 조정합니다.
+CREATE INDEX IF NOT EXISTS bible_chunks_embedding_hnsw_idx
+ON bible_chunks
+USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64);
+
+-- 대안: IVFFlat. 빌드가 빠르고 메모리를 덜 쓰지만 목록(lists)을 기존 데이터로 나누므로
+-- 반드시 데이터를 적재한 뒤에 만드세요 (빈 테이블에 만들면 재현율이 크게 떨어짐).
+-- lists ≈ 행 수 / 1000, 검색 시 ivfflat.probes ≈ sqrt(lists)
+-- CREATE INDEX bible_chunks_embedding_ivfflat_idx
+-- ON bible_chunks
+-- USING ivfflat (embedding vector_cosine_ops)
+-- WITH (lists = 100);
+
+-- 5. 통계 갱신
+ANALYZE bible_chunks;
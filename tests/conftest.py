@@ -0,0 +1,6 @@
+"""테스트 공통 설정 (설정 검증을 통과할 더미 환경 변수, 실제 연결은 하지 않음)"""
+import os
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_KEY", "test")
+os.environ.setdefault("GOOGLE_API_KEY", "test")
@@ -0,0 +1,56 @@
+"""캐시 예열(cache_warmer)과 공유 캐시 선점(SharedCache.add) 테스트"""
+import threading
+import time
+
+import pytest
+
+from app.config import settings
+from app.services import shared_cache
+from app.services.cache_warmer import frequent_questions
+from app.services.shared_cache import SharedCache
+
+
+@pytest.fixture
+def cache_file(monkeypatch, tmp_path):
+    """테스트마다 새 SQLite 파일 (스레드별 연결과 스키마 상태도 초기화)"""
+    monkeypatch.setattr(settings, "shared_cache_enabled", True)
+    monkeypatch.setattr(settings, "shared_cache_path", str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(shared_cache, "_local", threading.local())
+    monkeypatch.setattr(shared_cache, "_schema_ready", False)
+
+
+def test_frequent_questions_groups_references_and_skips_topical_questions():
+    questions = [
+        "요한복음 3:16",
+        "요한복음 3장 16절",
+        "요한복음 3:16",
+        "사랑에 대한 구절",
+        "사랑에 대한 구절",
+        "창세기 1장",
+    ]
+    assert frequent_questions(questions, min_count=2, max_queries=10) == [("요한복음 3:16", 3)]
+
+
+def test_add_claims_only_once_until_expiry(cache_file):
+    lease = SharedCache("lease_test", 0.05, 1)
+    assert lease.add("lease", True)
+    assert not lease.add("lease", True)
+    time.sleep(0.06)
+    assert lease.add("lease", True)
+
+
+def test_add_is_atomic_across_threads(cache_file):
+    lease = SharedCache("lease_test", 60, 1)
+    results = []
+    barrier = threading.Barrier(8)
+
+    def claim():
+        barrier.wait()
+        results.append(lease.add("lease", True))
+
+    threads = [threading.Thread(target=claim) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results.count(True) == 1
@@ -0,0 +1,36 @@
+"""구절 참조/검색 범위 파싱 테스트"""
+import pytest
+
+from app.langgraph.graph import BOOK_GROUPS, is_topical_book_query, parse_bible_reference, parse_search_filter
+
+
+@pytest.mark.parametrize("query", [
+    "요한복음 요약해줘",
+    "요한복음 정리해줘",
+    "요한복음 읽어줘",
+    "요한복음 내용 알려줘",
+    "요한복음에 대한 설명",
+    "요한복음에서 알려줘",
+])
+def test_book_only_query_keeps_full_book_path(query):
+    book, chapter, _, is_full_book = parse_bible_reference(query)
+    assert (book, chapter, is_full_book) == ("요한복음", None, True)
+    assert not is_topical_book_query(query, book)
+
+
+@pytest.mark.parametrize("query", [
+    "요한복음에서 사랑에 대한 말씀",
+    "요한복음에 나오는 기적",
+])
+def test_explicit_topical_cue_searches_within_book(query):
+    assert is_topical_book_query(query, "요한복음")
+
+
+def test_book_group_matches_longest_name_first():
+    books, _ = parse_search_filter("공관복음서의 비유")
+    assert books == BOOK_GROUPS["공관복음"]
+
+
+def test_book_group_matches_shorter_name_alone():
+    books, _ = parse_search_filter("복음서의 비유")
+    assert books == BOOK_GROUPS["복음서"]
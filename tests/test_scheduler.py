@@ -0,0 +1,161 @@
+"""LLM 동시성 제어(LLMScheduler) 테스트"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.routers import chat
+from app.services.scheduler import (
+    PRIORITY_CONVERSATION,
+    PRIORITY_DEFAULT,
+    PRIORITY_STREAM,
+    PRIORITY_STREAM_CONVERSATION,
+    LLMScheduler,
+    SchedulerOverloaded,
+    request_priority,
+)
+
+
+def make_scheduler(max_concurrency=1, max_queue=10, queue_timeout=1.0) -> LLMScheduler:
+    scheduler = LLMScheduler()
+    scheduler.max_concurrency = max_concurrency
+    scheduler.max_queue = max_queue
+    scheduler.queue_timeout = queue_timeout
+    return scheduler
+
+
+def test_request_priority_order():
+    assert request_priority(streaming=True, has_conversation=True) == PRIORITY_STREAM_CONVERSATION
+    assert request_priority(streaming=True, has_conversation=False) == PRIORITY_STREAM
+    assert request_priority(streaming=False, has_conversation=True) == PRIORITY_CONVERSATION
+    assert request_priority(streaming=False, has_conversation=False) == PRIORITY_DEFAULT
+    assert PRIORITY_STREAM_CONVERSATION < PRIORITY_STREAM < PRIORITY_CONVERSATION < PRIORITY_DEFAULT
+
+
+def test_waiters_are_served_in_priority_order():
+    async def scenario():
+        scheduler = make_scheduler()
+        holder = await scheduler.acquire()
+        order = []
+
+        async def wait(priority, name):
+            slot = await scheduler.acquire(priority)
+            order.append(name)
+            slot.release()
+
+        tasks = [
+            asyncio.create_task(wait(PRIORITY_DEFAULT, "default")),
+            asyncio.create_task(wait(PRIORITY_CONVERSATION, "conversation")),
+            asyncio.create_task(wait(PRIORITY_STREAM_CONVERSATION, "stream_conversation")),
+            asyncio.create_task(wait(PRIORITY_STREAM, "stream")),
+        ]
+        await asyncio.sleep(0)
+        assert scheduler.queue_depth == 4
+        holder.release()
+        await asyncio.gather(*tasks)
+        return order, scheduler.inflight
+
+    order, inflight = asyncio.run(scenario())
+    assert order == ["stream_conversation", "stream", "conversation", "default"]
+    assert inflight == 0
+
+
+def test_release_hands_slot_to_next_waiter():
+    async def scenario():
+        scheduler = make_scheduler()
+        first = await scheduler.acquire()
+        waiter = asyncio.create_task(scheduler.acquire())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        first.release()
+        second = await waiter
+        # 슬롯이 그대로 넘어가므로 실행 수는 1로 유지
+        inflight_after_handoff = scheduler.inflight
+        second.release()
+        second.release()
+        return inflight_after_handoff, scheduler.inflight, scheduler.queue_depth
+
+    assert asyncio.run(scenario()) == (1, 0, 0)
+
+
+def test_queue_timeout_is_rejected():
+    async def scenario():
+        scheduler = make_scheduler(queue_timeout=0.01)
+        await scheduler.acquire()
+        with pytest.raises(SchedulerOverloaded) as excinfo:
+            await scheduler.acquire()
+        return excinfo.value, scheduler.queue_depth
+
+    error, queue_depth = asyncio.run(scenario())
+    assert error.reason == "deadline"
+    assert error.retry_after >= 1
+    assert queue_depth == 0
+
+
+def test_full_queue_is_rejected_without_waiting():
+    async def scenario():
+        scheduler = make_scheduler(max_queue=1)
+        await scheduler.acquire()
+        waiter = asyncio.create_task(scheduler.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(SchedulerOverloaded) as excinfo:
+            await scheduler.acquire()
+        waiter.cancel()
+        return excinfo.value
+
+    assert asyncio.run(scenario()).reason == "queue_full"
+
+
+def test_admit_turns_queue_timeout_into_503_with_retry_after(monkeypatch):
+    scheduler = make_scheduler(queue_timeout=0.01)
+    monkeypatch.setattr(chat, "llm_scheduler", scheduler)
+
+    async def scenario():
+        await chat.admit(streaming=False, has_conversation=False)
+        with pytest.raises(HTTPException) as excinfo:
+            await chat.admit(streaming=False, has_conversation=False)
+        return excinfo.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 503
+    assert int(error.headers["Retry-After"]) >= 1
+
+
+def test_cancelled_waiter_leaves_queue_and_keeps_capacity():
+    async def scenario():
+        scheduler = make_scheduler()
+        holder = await scheduler.acquire()
+        cancelled = asyncio.create_task(scheduler.acquire())
+        waiting = asyncio.create_task(scheduler.acquire())
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        queue_depth_after_cancel = scheduler.queue_depth
+        holder.release()
+        slot = await waiting
+        slot.release()
+        return queue_depth_after_cancel, scheduler.inflight, scheduler.queue_depth
+
+    assert asyncio.run(scenario()) == (1, 0, 0)
+
+
+def test_cancel_after_handoff_returns_slot():
+    async def scenario():
+        scheduler = make_scheduler()
+        holder = await scheduler.acquire()
+        waiter = asyncio.create_task(scheduler.acquire())
+        await asyncio.sleep(0)
+        # 슬롯이 넘어간 직후, 대기자가 깨어나기 전에 취소
+        holder.release()
+        waiter.cancel()
+        try:
+            # Python 3.11의 wait_for는 이미 끝난 대기를 취소하면 결과를 그대로 돌려줌
+            slot = await waiter
+        except asyncio.CancelledError:
+            pass
+        else:
+            slot.release()
+        return scheduler.inflight
+
+    assert asyncio.run(scenario()) == 0
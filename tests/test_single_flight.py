@@ -0,0 +1,133 @@
+"""동시 요청 합치기(SingleFlight / AsyncSingleFlight) 테스트"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.single_flight import AsyncSingleFlight, SingleFlight
+from app.services.stream_sessions import StreamCancelledError
+
+
+def run_concurrently(flight: SingleFlight, key, funcs, **kwargs):
+    """funcs를 각각 스레드에서 같은 key로 실행하고 (결과 또는 예외) 목록을 돌려줌"""
+    outcomes = [None] * len(funcs)
+
+    def call(index, func):
+        try:
+            outcomes[index] = flight.do(key, func, **kwargs)
+        except BaseException as e:
+            outcomes[index] = e
+
+    threads = [threading.Thread(target=call, args=(index, func)) for index, func in enumerate(funcs)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join(timeout=5)
+    return outcomes
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight("test")
+    calls = []
+    release = threading.Event()
+
+    def work():
+        calls.append(1)
+        release.wait(5)
+        return "result"
+
+    threading.Timer(0.1, release.set).start()
+    outcomes = run_concurrently(flight, "key", [work] * 4)
+    assert outcomes == ["result"] * 4
+    assert len(calls) == 1
+
+
+def test_leader_error_reaches_every_waiter():
+    flight = SingleFlight("test")
+    release = threading.Event()
+
+    def fail():
+        release.wait(5)
+        raise ValueError("검색 실패")
+
+    threading.Timer(0.1, release.set).start()
+    outcomes = run_concurrently(flight, "key", [fail] * 3)
+    assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+
+
+def test_follower_retries_when_only_leader_stream_was_cancelled():
+    flight = SingleFlight("test")
+    release = threading.Event()
+    calls = []
+
+    def cancelled_leader():
+        calls.append("leader")
+        release.wait(5)
+        raise StreamCancelledError()
+
+    def follower():
+        calls.append("follower")
+        return "result"
+
+    threading.Timer(0.1, release.set).start()
+    outcomes = run_concurrently(flight, "key", [cancelled_leader, follower], retry_on=(StreamCancelledError,))
+    assert isinstance(outcomes[0], StreamCancelledError)
+    assert outcomes[1] == "result"
+    assert calls == ["leader", "follower"]
+
+
+def test_key_is_forgotten_after_completion():
+    flight = SingleFlight("test")
+    assert flight.do("key", lambda: 1) == 1
+    assert flight.do("key", lambda: 2) == 2
+
+
+def test_async_concurrent_callers_share_one_task():
+    flight = AsyncSingleFlight("test")
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do("key", work) for _ in range(4)))
+
+    assert asyncio.run(scenario()) == ["result"] * 4
+    assert len(calls) == 1
+
+
+def test_async_error_reaches_every_waiter():
+    flight = AsyncSingleFlight("test")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("생성 실패")
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+
+    outcomes = asyncio.run(scenario())
+    assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+
+
+def test_async_cancelled_caller_does_not_cancel_shared_task():
+    flight = AsyncSingleFlight("test")
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return "result"
+
+    async def scenario():
+        first = asyncio.create_task(flight.do("key", work))
+        second = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario()) == "result"
@@ -0,0 +1,114 @@
+"""메시지 출처 압축 저장/본문 채우기(source_refs) 테스트"""
+import pytest
+
+from app.services import source_refs
+from app.services.source_refs import (
+    compact_sources,
+    describe_source,
+    hydrate_messages,
+    is_hydrated,
+    select_verses,
+)
+
+
+class FakeCache:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value):
+        self.values[key] = value
+
+
+@pytest.fixture
+def chapter_rows(monkeypatch):
+    """요한복음 3장 청크 (두 번째 청크가 17절을 겹쳐 가짐)"""
+    rows = [
+        {"content": "16:하나님이 세상을 이처럼 사랑하사 17:하나님이 그 아들을"},
+        {"content": "17:하나님이 그 아들을 18:저를 믿는 자는"},
+    ]
+    fetched = []
+
+    def fetch(translation, book_no, chapter_no):
+        fetched.append((translation, book_no, chapter_no))
+        return rows
+
+    monkeypatch.setattr(source_refs, "_fetch_chapter", fetch)
+    monkeypatch.setattr(source_refs, "source_text_cache", FakeCache())
+    return fetched
+
+
+def test_describe_source_reads_verse_range_from_markers():
+    source = describe_source("요한복음", "3", None, "16:하나님이 세상을 17:하나님이 그 아들을", translation="krv")
+    assert source["verse"] == "16-17"
+    assert (source["book_no"], source["chapter_no"], source["verse_start"], source["verse_end"]) == (43, 3, 16, 17)
+    assert source["translation"] == "krv"
+
+
+def test_describe_source_prefers_explicit_verse():
+    source = describe_source("요한복음", "3", "16", "15:... 16:하나님이 17:...")
+    assert (source["verse_start"], source["verse_end"], source["verse"]) == (16, 16, "16")
+
+
+def test_describe_source_without_known_book_stays_display_only():
+    source = describe_source("알 수 없는 책", "3", None, "내용")
+    assert "book_no" not in source
+    assert compact_sources([source]) == [source]
+
+
+def test_select_verses_skips_overlapping_verses():
+    rows = [
+        {"content": "16:하나님이 17:그 아들을"},
+        {"content": "17:그 아들을 18:저를 믿는 자는"},
+    ]
+    assert select_verses(rows, None, None) == "16:하나님이 17:그 아들을 18:저를 믿는 자는"
+    assert select_verses(rows, 17, 18) == "17:그 아들을 18:저를 믿는 자는"
+    assert select_verses(rows, 16, None) == "16:하나님이"
+
+
+def test_compact_then_hydrate_keeps_response_shape(chapter_rows):
+    source = describe_source("요한복음", "3", "17", "17:하나님이 그 아들을", translation="krv")
+    stored = compact_sources([source])
+    assert stored == [{"translation": "krv", "book_no": 43, "chapter_no": 3, "verse_start": 17, "verse_end": 17}]
+
+    messages = hydrate_messages([{"role": "assistant", "sources": stored}])
+    hydrated = messages[0]["sources"][0]
+    assert {key: hydrated[key] for key in ("book", "chapter", "verse", "content")} == {
+        "book": "요한복음",
+        "chapter": "3",
+        "verse": "17",
+        "content": "17:하나님이 그 아들을",
+    }
+    assert is_hydrated(messages)
+    assert chapter_rows == [("krv", 43, 3)]
+
+
+def test_hydrate_reads_each_chapter_once_then_uses_cache(chapter_rows):
+    stored = [
+        {"translation": "krv", "book_no": 43, "chapter_no": 3, "verse_start": 16, "verse_end": 16},
+        {"translation": "krv", "book_no": 43, "chapter_no": 3, "verse_start": 18, "verse_end": 18},
+    ]
+    hydrate_messages([{"sources": [dict(source) for source in stored]}])
+    hydrate_messages([{"sources": [dict(source) for source in stored]}])
+    assert chapter_rows == [("krv", 43, 3)]
+
+
+def test_legacy_sources_are_left_unchanged(chapter_rows):
+    legacy = [{"book": "요한복음", "chapter": "3", "verse": "16", "content": "16:하나님이 세상을..."}]
+    assert compact_sources(legacy) == legacy
+    messages = [{"sources": [dict(source) for source in legacy]}]
+    assert hydrate_messages(messages)[0]["sources"] == legacy
+    assert chapter_rows == []
+
+
+def test_failed_fetch_is_reported_as_not_hydrated(monkeypatch):
+    def fail(translation, book_no, chapter_no):
+        raise RuntimeError("연결 실패")
+
+    monkeypatch.setattr(source_refs, "_fetch_chapter", fail)
+    monkeypatch.setattr(source_refs, "source_text_cache", FakeCache())
+    messages = hydrate_messages([{"sources": [{"translation": "krv", "book_no": 43, "chapter_no": 3, "verse_start": 16, "verse_end": 16}]}])
+    assert messages[0]["sources"][0]["book"] == "요한복음"
+    assert not is_hydrated(messages)
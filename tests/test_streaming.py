@@ -0,0 +1,92 @@
+"""SSE 델타 계산(StreamDeltaTracker)과 프레임 병합(SSEFrameCoalescer) 테스트"""
+import json
+
+import pytest
+
+from app.services import streaming
+from app.services.streaming import SSEFrameCoalescer, StreamDeltaTracker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(streaming.time, "monotonic", fake)
+    return fake
+
+
+def frame_content(frame: str) -> str:
+    data = [line for line in frame.splitlines() if line.startswith("data: ")][0]
+    return json.loads(data[len("data: "):])["content"]
+
+
+def test_complete_sends_only_text_after_streamed_offset():
+    tracker = StreamDeltaTracker()
+    assert tracker.add_chunk("m1", "태초에 ") == "태초에 "
+    assert tracker.add_chunk("m1", "하나님이") == "하나님이"
+    # 완성 메시지는 이미 보낸 부분과 겹치므로 뒷부분만
+    assert tracker.complete("m1", "태초에 하나님이 천지를") == " 천지를"
+    assert tracker.text == "태초에 하나님이 천지를"
+
+
+def test_repeated_or_shorter_completion_sends_nothing():
+    tracker = StreamDeltaTracker()
+    tracker.add_chunk("m1", "abc")
+    assert tracker.complete("m1", "abc") == ""
+    assert tracker.complete("m1", "ab") == ""
+    assert tracker.add_chunk("m1", "") == ""
+    assert tracker.text == "abc"
+
+
+def test_offsets_are_tracked_per_message():
+    tracker = StreamDeltaTracker()
+    tracker.add_chunk("m1", "first")
+    assert tracker.complete("m2", "second") == "second"
+    assert tracker.complete("m1", "first!") == "!"
+    assert tracker.text == "firstsecond!"
+    assert tracker
+
+
+def test_empty_tracker_is_falsy():
+    tracker = StreamDeltaTracker()
+    assert not tracker
+    assert tracker.text == ""
+
+
+def test_flushes_when_size_limit_is_reached(clock):
+    coalescer = SSEFrameCoalescer(max_delay=1.0, max_bytes=8)
+    assert coalescer.push("abc", "s:1") is None
+    # 한글 한 글자는 3바이트 → 3 + 6 = 9바이트
+    frame = coalescer.push("가나", "s:2")
+    assert frame is not None
+    assert frame.startswith("id: s:2\n")
+    assert frame_content(frame) == "abc가나"
+    assert coalescer.time_until_flush() is None
+
+
+def test_flushes_when_time_limit_is_reached(clock):
+    coalescer = SSEFrameCoalescer(max_delay=0.02, max_bytes=512)
+    assert coalescer.push("a") is None
+    clock.now += 0.01
+    assert coalescer.push("b") is None
+    assert coalescer.time_until_flush() == pytest.approx(0.01)
+    clock.now += 0.01
+    frame = coalescer.push("c")
+    assert frame_content(frame) == "abc"
+
+
+def test_flush_at_end_of_stream_returns_remaining_tokens(clock):
+    coalescer = SSEFrameCoalescer()
+    coalescer.push("남은", "s:1")
+    coalescer.push(" 토큰", "s:2")
+    frame = coalescer.flush()
+    assert frame_content(frame) == "남은 토큰"
+    assert frame.startswith("id: s:2\n")
+    assert coalescer.flush() is None